@@ -0,0 +1,89 @@
+"""
+Micro-benchmark of the per-turn model setup of the agents.
+
+Compares creating the chat model and binding the tools on every turn, as the agents
+used to, with the cached bound model of `get_bound_chat_model`, and reports the setup
+time per turn of both. With `--first-token`, a short prompt is also streamed on every
+turn, and the time to the first token is reported, which includes the connection setup
+when the client is new.
+
+Run with:
+    python examples/benchmarks/model_setup_benchmark.py [--model openai:gpt-4.1] [--turns 50]
+
+The setup alone needs no network access, but some providers need their API key set to
+create the client.
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+from langchain_core.language_models import BaseChatModel
+
+from judigpt.agents.agent_base import _init_chat_model, get_bound_chat_model
+from judigpt.agents.autonomous_agent import autonomous_agent
+from judigpt.configuration import LLM_MODEL_NAME, LLM_TEMPERATURE
+
+PROMPT = "Answer with one word: which language is JUDI.jl written in?"
+
+
+def time_turns(
+    load_model: Callable[[], BaseChatModel], turns: int, first_token: bool
+) -> tuple[List[float], List[float]]:
+    setup_times, first_token_times = [], []
+    for _ in range(turns):
+        start = time.perf_counter()
+        model = load_model()
+        setup_times.append(time.perf_counter() - start)
+        if first_token:
+            next(iter(model.stream(PROMPT)))
+            first_token_times.append(time.perf_counter() - start)
+    return setup_times, first_token_times
+
+
+def report(name: str, times: List[float]) -> None:
+    if times:
+        print(
+            f"{name:<28} {statistics.median(times) * 1e3:>10.3f} "
+            f"{statistics.mean(times) * 1e3:>10.3f} {max(times) * 1e3:>10.3f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=LLM_MODEL_NAME)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument(
+        "--first-token", action="store_true", help="Also stream a prompt every turn."
+    )
+    args = parser.parse_args()
+
+    tools = autonomous_agent.tool_classes
+    print(f"Model {args.model} with {len(tools)} tools, {args.turns} turns\n")
+    print(f"{'':<28} {'p50 [ms]':>10} {'mean [ms]':>10} {'max [ms]':>10}")
+
+    uncached = time_turns(
+        lambda: _init_chat_model(args.model, LLM_TEMPERATURE).bind_tools(tools),
+        args.turns,
+        args.first_token,
+    )
+    # The first turn creates the cached model, like the first turn of a server
+    cached = time_turns(
+        lambda: get_bound_chat_model(args.model, tools),
+        args.turns,
+        args.first_token,
+    )
+
+    report("setup, per turn", uncached[0])
+    report("setup, cached", cached[0])
+    report("first token, per turn", uncached[1])
+    report("first token, cached", cached[1])
+    print(
+        f"\nMedian setup speedup: "
+        f"{statistics.median(uncached[0]) / statistics.median(cached[0]):.0f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
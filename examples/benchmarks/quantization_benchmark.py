@@ -0,0 +1,109 @@
+"""
+Benchmark of compressed FAISS indices against the flat index.
+
+Builds the FAISS index of the JUDI examples with each index type (compressing the flat
+index, which is built first if needed), and reports for each type the size on disk,
+the load time, the growth of the resident memory when loading it, and the recall@k.
+Two recalls are reported: the fraction of the exact top k of the flat index that is
+found (`exact`), and the recall of the labeled answers in `judi_queries.json`
+(`labeled`).
+
+Run with:
+    python examples/benchmarks/quantization_benchmark.py [--index-types Flat SQfp16 SQ8 PQ64x4] [--k 4]
+"""
+
+import argparse
+import gc
+import json
+import os
+import time
+
+from retrieval_benchmark import QUERIES_PATH, SPEC, rss_mb
+
+from judigpt.configuration import BaseConfiguration
+from judigpt.rag.index_manifest import get_relative_source
+from judigpt.rag.retrieval import (
+    RetrievalParams,
+    get_faiss_persist_path,
+    get_text_encoder,
+    invalidate_retrievers,
+    make_retriever,
+)
+
+
+def build_index(index_type: str) -> str:
+    """Build the index of the given type if it does not exist, and return its directory."""
+    config = {
+        "configurable": {"retriever_provider": "faiss", "faiss_index_type": index_type}
+    }
+    with make_retriever(
+        config=config,
+        spec=SPEC,
+        retrieval_params=RetrievalParams(
+            search_type="similarity", search_kwargs={"k": 1}
+        ),
+    ):
+        pass
+    invalidate_retrievers()
+    return get_faiss_persist_path(
+        SPEC, BaseConfiguration.from_runnable_config(config).embedding_model, index_type
+    )
+
+
+def main() -> None:
+    from langchain_community.vectorstores import FAISS
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--index-types", nargs="+", default=["Flat", "SQfp16", "SQ8", "PQ64x4"]
+    )
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    queries = json.loads(QUERIES_PATH.read_text())
+    embedding_model = BaseConfiguration().embedding_model
+    encoder = get_text_encoder(embedding_model)
+    query_vectors = [encoder.embed_query(labeled["query"]) for labeled in queries]
+
+    exact_ids = None
+    print(f"{len(queries)} labeled queries on the JUDI examples, k={args.k}\n")
+    print(
+        f"{'index type':>10} {'disk [MB]':>9} {'load [s]':>9} {'RAM [MB]':>9} "
+        f"{'exact':>6} {'labeled':>8}"
+    )
+    for index_type in ["Flat"] + [t for t in args.index_types if t != "Flat"]:
+        path = build_index(index_type)
+        disk_mb = os.path.getsize(os.path.join(path, "index.faiss")) / 2**20
+
+        gc.collect()
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        vectorstore = FAISS.load_local(
+            path, encoder, allow_dangerous_deserialization=True
+        )
+        load_s = time.perf_counter() - start
+        memory_mb = rss_mb() - rss_before
+
+        ids, labeled_recalls = [], []
+        for labeled, vector in zip(queries, query_vectors):
+            docs = vectorstore.similarity_search_by_vector(vector, k=args.k)
+            ids.append({(doc.metadata.get("source"), doc.page_content) for doc in docs})
+            sources = {get_relative_source(doc, SPEC) for doc in docs}
+            relevant = set(labeled["relevant"])
+            labeled_recalls.append(len(sources & relevant) / min(len(relevant), args.k))
+        if exact_ids is None:
+            exact_ids = ids
+        exact_recall = sum(
+            len(found & exact) / len(exact) for found, exact in zip(ids, exact_ids)
+        ) / len(ids)
+
+        if index_type in args.index_types:
+            print(
+                f"{index_type:>10} {disk_mb:>9.2f} {load_s:>9.3f} {memory_mb:>9.1f} "
+                f"{exact_recall:>6.3f} {sum(labeled_recalls) / len(queries):>8.3f}"
+            )
+        del vectorstore
+
+
+if __name__ == "__main__":
+    main()
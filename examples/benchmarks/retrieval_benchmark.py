@@ -0,0 +1,233 @@
+"""
+Benchmark and recall harness for the retrieval of JUDI examples.
+
+Runs the labeled queries in `judi_queries.json` through `make_retriever` for every
+combination of retriever provider, search type and k. For each combination it records
+the recall@k and the p50/p95 latency. For each provider it records the index load time
+and the growth of the resident memory when loading the index.
+
+Every query is run once before timing, so the query embeddings are cached and the
+latencies are those of the search itself. The results are written to a JSON file
+together with the git commit, and can be compared with the results of another commit:
+
+    python examples/benchmarks/retrieval_benchmark.py --output before.json
+    ... change the retrieval ...
+    python examples/benchmarks/retrieval_benchmark.py --compare before.json
+
+With `--compare`, the exit code is 1 if the recall of a combination dropped by more
+than `--recall-tolerance`, or its p95 latency grew by more than `--latency-tolerance`.
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from judigpt.configuration import EMBEDDING_MODEL_NAME
+from judigpt.rag.index_manifest import get_relative_source
+from judigpt.rag.retrieval import (
+    RetrievalParams,
+    get_keyword_index,
+    invalidate_retrievers,
+    make_retriever,
+)
+from judigpt.rag.retriever_specs import RETRIEVER_SPECS
+
+QUERIES_PATH = Path(__file__).parent / "judi_queries.json"
+SPEC = RETRIEVER_SPECS["judi"]["examples"]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def rss_mb() -> float:
+    """Current resident memory of the process, or the peak where it is not available."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def retrieval_params(search_type: str, k: int) -> RetrievalParams:
+    match search_type:
+        case "mmr":
+            search_kwargs = {"k": k, "fetch_k": 5 * k, "lambda_mult": 0.5}
+        case "hybrid":
+            search_kwargs = {"k": k, "fetch_k": 5 * k}
+        case _:
+            search_kwargs = {"k": k}
+    return RetrievalParams(search_type=search_type, search_kwargs=search_kwargs)
+
+
+def retrieve_sources(config: dict, params: RetrievalParams, query: str) -> list[str]:
+    with make_retriever(config=config, spec=SPEC, retrieval_params=params) as retriever:
+        docs = retriever.invoke(query)
+    return [get_relative_source(doc, SPEC) for doc in docs]
+
+
+def measure_load(provider: str) -> dict:
+    """Load the vector store and BM25 index of a provider from disk, building them if needed."""
+    invalidate_retrievers()
+    gc.collect()
+    config = {"configurable": {"retriever_provider": provider}}
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    with make_retriever(
+        config=config, spec=SPEC, retrieval_params=retrieval_params("similarity", 1)
+    ):
+        pass
+    load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    get_keyword_index(SPEC)
+    keyword_index_s = time.perf_counter() - start
+
+    return {
+        "index_load_s": load_s,
+        "keyword_index_s": keyword_index_s,
+        "memory_mb": rss_mb() - rss_before,
+    }
+
+
+def measure_search(
+    provider: str, search_type: str, k: int, queries: list[dict], repeats: int
+) -> dict:
+    config = {"configurable": {"retriever_provider": provider}}
+    params = retrieval_params(search_type, k)
+
+    recalls = []
+    for labeled in queries:
+        sources = set(retrieve_sources(config, params, labeled["query"]))
+        relevant = set(labeled["relevant"])
+        recalls.append(len(sources & relevant) / min(len(relevant), k))
+
+    latencies = []
+    for _ in range(repeats):
+        for labeled in queries:
+            start = time.perf_counter()
+            retrieve_sources(config, params, labeled["query"])
+            latencies.append(1000 * (time.perf_counter() - start))
+
+    return {
+        "provider": provider,
+        "search_type": search_type,
+        "k": k,
+        "recall": statistics.mean(recalls),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": statistics.quantiles(latencies, n=20)[-1],
+    }
+
+
+def compare(
+    results: dict, baseline: dict, recall_tolerance: float, latency_tolerance: float
+) -> bool:
+    """Print the changes relative to the baseline. Returns False if there is a regression."""
+    if results["queries_sha256"] != baseline["queries_sha256"]:
+        print("Warning: the labeled queries differ from those of the baseline.")
+
+    baseline_runs = {
+        (run["provider"], run["search_type"], run["k"]): run for run in baseline["runs"]
+    }
+    ok = True
+    print(f"\nCompared with {baseline['commit']}:")
+    for run in results["runs"]:
+        key = (run["provider"], run["search_type"], run["k"])
+        old = baseline_runs.get(key)
+        if old is None:
+            continue
+        recall_change = run["recall"] - old["recall"]
+        latency_ratio = run["p95_ms"] / old["p95_ms"] if old["p95_ms"] else 1.0
+        regression = (
+            recall_change < -recall_tolerance or latency_ratio > 1 + latency_tolerance
+        )
+        ok = ok and not regression
+        print(
+            f"{key[0]:>8} {key[1]:>12} {key[2]:>3} "
+            f"recall {recall_change:+.3f}  p95 x{latency_ratio:.2f}"
+            + ("  REGRESSION" if regression else "")
+        )
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--providers", nargs="+", default=["faiss", "chroma"])
+    parser.add_argument(
+        "--search-types", nargs="+", default=["similarity", "mmr", "hybrid"]
+    )
+    parser.add_argument("--k", nargs="+", type=int, default=[2, 4, 8])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="Where to write the results.")
+    parser.add_argument("--compare", type=Path, help="Results of the baseline.")
+    parser.add_argument("--recall-tolerance", type=float, default=0.02)
+    parser.add_argument("--latency-tolerance", type=float, default=0.5)
+    args = parser.parse_args()
+
+    queries_text = QUERIES_PATH.read_text()
+    queries = json.loads(queries_text)
+    results = {
+        "commit": git_commit(),
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "queries_sha256": hashlib.sha256(queries_text.encode()).hexdigest(),
+        "loads": {},
+        "runs": [],
+    }
+
+    print(
+        f"{len(queries)} labeled queries on the JUDI examples, commit {results['commit']}\n"
+    )
+    for provider in args.providers:
+        load = measure_load(provider)
+        results["loads"][provider] = load
+        print(
+            f"{provider}: index loaded in {load['index_load_s']:.2f} s "
+            f"(+{load['memory_mb']:.0f} MB), "
+            f"BM25 index in {load['keyword_index_s']:.2f} s"
+        )
+
+    print(
+        f"\n{'provider':>8} {'search type':>12} {'k':>3} {'recall@k':>9} {'p50 [ms]':>9} {'p95 [ms]':>9}"
+    )
+    for provider in args.providers:
+        for search_type in args.search_types:
+            for k in args.k:
+                run = measure_search(provider, search_type, k, queries, args.repeats)
+                results["runs"].append(run)
+                print(
+                    f"{provider:>8} {search_type:>12} {k:>3} {run['recall']:>9.3f} "
+                    f"{run['p50_ms']:>9.2f} {run['p95_ms']:>9.2f}"
+                )
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=1))
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if not compare(
+            results, baseline, args.recall_tolerance, args.latency_tolerance
+        ):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
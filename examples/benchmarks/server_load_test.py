@@ -0,0 +1,184 @@
+"""
+Load test of the server mode.
+
+Runs N concurrent sessions, where each session asks `--turns` questions one after
+another, and reports the throughput and the latency of the turns for every N. The
+questions are made from the natural language queries in `judi_queries.json`.
+
+By default the sessions run in this process against `judigpt.server.server_graph`,
+sharing its warm resources. With `--url` they are sent to a running LangGraph server,
+one LangGraph thread per session:
+
+    python examples/benchmarks/server_load_test.py --sessions 1 4 16
+
+    JUDIGPT_SERVER=1 langgraph dev  # In another terminal
+    python examples/benchmarks/server_load_test.py --url http://127.0.0.1:2024 --sessions 1 4 16
+
+The model calls are real, so the results depend on the model provider and its rate
+limits as well as on the server.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import uuid
+from functools import partial
+from pathlib import Path
+from typing import Awaitable, Callable, List
+
+QUERIES_PATH = Path(__file__).parent / "judi_queries.json"
+
+Ask = Callable[[str], Awaitable[None]]
+
+
+def load_questions() -> List[str]:
+    queries = [labeled["query"] for labeled in json.loads(QUERIES_PATH.read_text())]
+    return [
+        f"{query}. Show how to do this with JUDI.jl in a short code example."
+        for query in queries
+        if " " in query
+    ]
+
+
+def in_process_session() -> Ask:
+    """A session against the graph in this process, keeping its own messages."""
+    from langchain_core.messages import HumanMessage
+
+    from judigpt.configuration import RECURSION_LIMIT
+    from judigpt.server import server_graph
+
+    config = {
+        "recursion_limit": RECURSION_LIMIT,
+        "configurable": {"thread_id": str(uuid.uuid4())},
+    }
+    messages = []
+
+    async def ask(question: str) -> None:
+        nonlocal messages
+        result = await server_graph.ainvoke(
+            {"messages": [*messages, HumanMessage(content=question)]}, config
+        )
+        messages = result["messages"]
+
+    return ask
+
+
+def remote_session(url: str, assistant_id: str) -> Ask:
+    """A session against a LangGraph server, as a thread of its own."""
+    from langgraph_sdk import get_client
+
+    client = get_client(url=url)
+    thread_id = None
+
+    async def ask(question: str) -> None:
+        nonlocal thread_id
+        if thread_id is None:
+            thread_id = (await client.threads.create())["thread_id"]
+        await client.runs.wait(
+            thread_id,
+            assistant_id,
+            input={"messages": [{"role": "user", "content": question}]},
+        )
+
+    return ask
+
+
+async def run_session(ask: Ask, questions: List[str]) -> List[float]:
+    latencies = []
+    for question in questions:
+        start = time.perf_counter()
+        await ask(question)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def run_load(
+    n_sessions: int, turns: int, questions: List[str], make_session: Callable[[], Ask]
+) -> dict:
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            run_session(
+                make_session(),
+                [questions[(i * turns + t) % len(questions)] for t in range(turns)],
+            )
+            for i in range(n_sessions)
+        ),
+        return_exceptions=True,
+    )
+    wall_s = time.perf_counter() - start
+
+    latencies = [
+        latency
+        for result in results
+        if not isinstance(result, BaseException)
+        for latency in result
+    ]
+    errors = [result for result in results if isinstance(result, BaseException)]
+    for error in errors[:3]:
+        print(f"Session failed: {error!r}")
+
+    quantiles = (
+        statistics.quantiles(latencies, n=100, method="inclusive")
+        if len(latencies) > 1
+        else latencies * 99
+    )
+    return {
+        "sessions": n_sessions,
+        "turns": len(latencies),
+        "failed_sessions": len(errors),
+        "wall_s": wall_s,
+        "turns_per_s": len(latencies) / wall_s,
+        "p50_s": quantiles[49] if latencies else float("nan"),
+        "p95_s": quantiles[94] if latencies else float("nan"),
+        "p99_s": quantiles[98] if latencies else float("nan"),
+        "max_s": max(latencies, default=float("nan")),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--url", help="URL of a running LangGraph server.")
+    parser.add_argument("--assistant-id", default="judigpt_server")
+    parser.add_argument("--output", type=Path, help="Where to write the results.")
+    args = parser.parse_args()
+
+    if args.url:
+        make_session = partial(remote_session, args.url, args.assistant_id)
+    else:
+        # Must be set before judigpt is imported
+        os.environ["JUDIGPT_SERVER"] = "1"
+        make_session = in_process_session
+
+    questions = load_questions()
+
+    # Let the server load the shared resources before measuring
+    print("Warming up...")
+    await run_session(make_session(), questions[:1])
+
+    print(
+        f"\n{'sessions':>8} {'turns':>6} {'failed':>6} {'turns/s':>8} "
+        f"{'p50 [s]':>8} {'p95 [s]':>8} {'p99 [s]':>8} {'max [s]':>8}"
+    )
+    runs = []
+    for n_sessions in args.sessions:
+        run = await run_load(n_sessions, args.turns, questions, make_session)
+        runs.append(run)
+        print(
+            f"{run['sessions']:>8} {run['turns']:>6} {run['failed_sessions']:>6} "
+            f"{run['turns_per_s']:>8.3f} {run['p50_s']:>8.2f} {run['p95_s']:>8.2f} "
+            f"{run['p99_s']:>8.2f} {run['max_s']:>8.2f}"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(runs, indent=1))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""
+Benchmark of the splitting stage of index building versus the number of processes.
+
+Splits the JUDI documentation and examples with 1, 2, 4, ... worker processes, up to
+the number of cores, and reports the time and speedup relative to a single process.
+The chunks must be identical, and in the same order, for every worker count.
+
+Run with:
+    python examples/benchmarks/split_benchmark.py [--repeats 3]
+"""
+
+import argparse
+import os
+import time
+
+from judigpt.rag.index_manifest import list_source_files, split_files
+from judigpt.rag.retriever_specs import RETRIEVER_SPECS
+
+
+def worker_counts() -> list[int]:
+    max_workers = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+
+def split_corpus(workers: int) -> list[tuple[str, dict]]:
+    chunks = []
+    for spec in RETRIEVER_SPECS["judi"].values():
+        paths = list(list_source_files(spec).values())
+        for file_chunks in split_files(paths, spec.split_func, workers=workers):
+            chunks.extend((chunk.page_content, chunk.metadata) for chunk in file_chunks)
+    return chunks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    n_files = sum(
+        len(list_source_files(spec)) for spec in RETRIEVER_SPECS["judi"].values()
+    )
+    print(f"Splitting {n_files} JUDI source files, best of {args.repeats} runs\n")
+    print(f"{'workers':>8} {'chunks':>8} {'time [s]':>10} {'speedup':>8}")
+
+    reference = None
+    baseline = None
+    for workers in worker_counts():
+        best = float("inf")
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            chunks = split_corpus(workers)
+            best = min(best, time.perf_counter() - start)
+
+        if reference is None:
+            reference, baseline = chunks, best
+        elif chunks != reference:
+            raise RuntimeError(f"Chunks differ with {workers} workers")
+
+        print(f"{workers:>8} {len(chunks):>8} {best:>10.3f} {baseline / best:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
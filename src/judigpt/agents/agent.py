@@ -8,16 +8,18 @@ from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import BaseTool
 from langgraph.graph import END, StateGraph
 from langgraph.prebuilt import ToolNode
+from langgraph.utils.runnable import RunnableCallable
 
 from judigpt.agents.agent_base import BaseAgent
 from judigpt.configuration import BaseConfiguration, cli_mode, mcp_mode
-from judigpt.nodes import check_code
+from judigpt.nodes import acheck_code, check_code
 from judigpt.state import MCPInputState, MCPOutputState, State
 from judigpt.tools import (
     grep_search,
     list_files_in_directory,
     read_from_file,
     retrieve_function_documentation,
+    retrieve_judi_docs_and_examples,
     retrieve_judi_examples,
     write_to_file,
 )
@@ -64,10 +66,12 @@ class Agent(BaseAgent):
             )
 
         # Add nodes
-        workflow.add_node("agent", self.call_model)
+        workflow.add_node("agent", self._model_node())
         workflow.add_node("tools", self.tool_node)
         workflow.add_node("finalize", self.finalize)
-        workflow.add_node("check_code", check_code)
+        workflow.add_node(
+            "check_code", RunnableCallable(check_code, acheck_code, name="check_code")
+        )
 
         if mcp_mode:
             workflow.add_node("mcp_input", self.state_from_mcp_input)
@@ -124,9 +128,15 @@ class Agent(BaseAgent):
 
     def call_model(self, state: State, config: RunnableConfig) -> dict:
         """Call the model with the current state."""
-
         response = self.invoke_model(state=state, config=config)
+        return self._state_update_from_response(state, response)
+
+    async def acall_model(self, state: State, config: RunnableConfig) -> dict:
+        """Async variant of `call_model`."""
+        response = await self.ainvoke_model(state=state, config=config)
+        return self._state_update_from_response(state, response)
 
+    def _state_update_from_response(self, state: State, response: AIMessage) -> dict:
         # Check if we need more steps
         if self._are_more_steps_needed(state, response):
             return {
@@ -162,6 +172,7 @@ agent = Agent(
         grep_search,
         retrieve_function_documentation,
         retrieve_judi_examples,
+        retrieve_judi_docs_and_examples,
     ],
     print_chat_output=True,
 )
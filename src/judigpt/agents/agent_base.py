@@ -1,18 +1,28 @@
 from __future__ import annotations
 
-import os
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Callable, List, Literal, Optional, Sequence, Union, cast
+from collections import OrderedDict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
 
 from langchain_core.language_models import BaseChatModel, LanguageModelLike
-from langchain_core.language_models.base import LanguageModelInput
 from langchain_core.messages import (
     AIMessage,
     BaseMessage,
     HumanMessage,
     SystemMessage,
     ToolMessage,
-    trim_messages,
 )
 from langchain_core.runnables import (
     Runnable,
@@ -26,12 +36,96 @@ from langgraph.prebuilt.tool_node import ToolNode
 from langgraph.utils.runnable import RunnableCallable
 
 import judigpt.state as state
-from judigpt.cli import colorscheme, show_startup_screen, stream_to_console
-from judigpt.configuration import LLM_TEMPERATURE, PROJECT_ROOT, RECURSION_LIMIT
+from judigpt.cli import (
+    astream_to_console,
+    colorscheme,
+    show_startup_screen,
+    stream_to_console,
+)
+from judigpt.configuration import (
+    BOUND_MODEL_CACHE_SIZE,
+    LLM_TEMPERATURE,
+    PROJECT_ROOT,
+    RECURSION_LIMIT,
+    BaseConfiguration,
+)
 from judigpt.globals import console
+from judigpt.julia.doc_index import warm_up_doc_index
+from judigpt.julia.julia_lint_server import get_lint_server
+from judigpt.julia.julia_worker_pool import get_worker_pool
+from judigpt.session import (
+    restore_session_working_directory,
+    session_working_directory,
+)
 from judigpt.state import State
+from judigpt.token_counting import history_token_budget, trim_state_messages
 from judigpt.utils import get_provider_and_model
 
+_chat_models: Dict[Tuple[str, float], BaseChatModel] = {}
+_bound_chat_models: Dict[Tuple[str, float, Tuple[str, ...]], BaseChatModel] = {}
+_chat_models_lock = threading.RLock()
+
+
+def _init_chat_model(model: str, temperature: float) -> BaseChatModel:
+    try:
+        from langchain.chat_models import init_chat_model
+    except ImportError:
+        raise ImportError("Please install langchain to use string model names")
+
+    provider, model_name = get_provider_and_model(model)
+
+    if (
+        provider == "ollama" and model_name == "qwen3:14b"
+    ):  # WARNING: This is bad practice!
+        chat_model = init_chat_model(
+            model_name,
+            model_provider=provider,
+            temperature=temperature,
+            reasoning=True,
+            streaming=True,
+        )
+    else:
+        chat_model = init_chat_model(
+            model_name,
+            model_provider=provider,
+            temperature=temperature,
+            streaming=True,
+        )
+    return cast(BaseChatModel, chat_model)
+
+
+def get_chat_model(model: str, temperature: float = LLM_TEMPERATURE) -> BaseChatModel:
+    """
+    Get the shared chat model for a model name, creating it on first use. The client,
+    and with it the HTTP connection pool, is reused by all agents and sessions.
+    """
+    key = (model, temperature)
+    with _chat_models_lock:
+        if key not in _chat_models:
+            _chat_models[key] = _init_chat_model(model, temperature)
+        return _chat_models[key]
+
+
+def get_bound_chat_model(
+    model: str, tools: Sequence[BaseTool], temperature: float = LLM_TEMPERATURE
+) -> BaseChatModel:
+    """
+    Get the shared chat model for a model name with the tools bound, creating it on first
+    use. The tool schemas are converted once, and the binding wraps the shared client.
+
+    The tool set is identified by the tool names, which are unique in an agent.
+    """
+    if not tools:
+        return get_chat_model(model, temperature)
+
+    key = (model, temperature, tuple(tool.name for tool in tools))
+    with _chat_models_lock:
+        if key not in _bound_chat_models:
+            _bound_chat_models[key] = cast(
+                BaseChatModel, get_chat_model(model, temperature).bind_tools(tools)
+            )
+        return _bound_chat_models[key]
+
 
 class BaseAgent(ABC):
     """
@@ -58,6 +152,12 @@ class BaseAgent(ABC):
         self.printed_name = printed_name if printed_name else name
         self.state_schema = state.State
         self.print_chat_output = print_chat_output
+        # Models given as objects, with the tools bound, keyed by the id of the model and
+        # least recently used first. Model objects are not hashable.
+        self._bound_models: OrderedDict[
+            int, Tuple[LanguageModelLike, BaseChatModel]
+        ] = OrderedDict()
+        self._bound_models_lock = threading.Lock()
 
         # Process tools
         if isinstance(tools, ToolNode):
@@ -147,31 +247,7 @@ class BaseAgent(ABC):
     def _get_chat_model(self, model: Union[str, LanguageModelLike]) -> BaseChatModel:
         """Setup and bind tools to the model."""
         if isinstance(model, str):
-            try:
-                from langchain.chat_models import init_chat_model
-            except ImportError:
-                raise ImportError("Please install langchain to use string model names")
-
-            provider, model_name = get_provider_and_model(model)
-
-            if (
-                provider == "ollama" and model_name == "qwen3:14b"
-            ):  # WARNING: This is bad practice!
-                chat_model = init_chat_model(
-                    model_name,
-                    model_provider=provider,
-                    temperature=LLM_TEMPERATURE,
-                    reasoning=True,
-                    streaming=True,
-                )
-            else:
-                chat_model = init_chat_model(
-                    model_name,
-                    model_provider=provider,
-                    temperature=LLM_TEMPERATURE,
-                    streaming=True,
-                )
-            model = cast(BaseChatModel, chat_model)
+            model = get_chat_model(model)
 
         # Get the underlying model
         if isinstance(model, RunnableSequence):
@@ -193,11 +269,29 @@ class BaseAgent(ABC):
         return cast(BaseChatModel, model)
 
     def _load_model(self, config: RunnableConfig) -> BaseChatModel:
-        """Load the model from the name specified in the configuration."""
-        chat_model = self._get_chat_model(self.get_model_from_config(config=config))
-        if self._should_bind_tools(chat_model):
-            chat_model = chat_model.bind_tools(self.tool_classes)
-        return cast(BaseChatModel, chat_model)
+        """
+        Load the model from the name specified in the configuration, with the tools bound.
+        The bound model is cached, so it is only created on the first turn.
+        """
+        model = self.get_model_from_config(config=config)
+        if isinstance(model, str):
+            return get_bound_chat_model(model, self.tool_classes)
+
+        # The model is kept in its entry, so its id is not reused while the entry exists
+        with self._bound_models_lock:
+            entry = self._bound_models.get(id(model))
+            if entry is not None and entry[0] is model:
+                self._bound_models.move_to_end(id(model))
+                return entry[1]
+
+            chat_model = self._get_chat_model(model)
+            if self._should_bind_tools(chat_model):
+                chat_model = chat_model.bind_tools(self.tool_classes)
+            self._bound_models[id(model)] = (model, cast(BaseChatModel, chat_model))
+            self._bound_models.move_to_end(id(model))
+            while len(self._bound_models) > BOUND_MODEL_CACHE_SIZE:
+                self._bound_models.popitem(last=False)
+            return cast(BaseChatModel, chat_model)
 
     def generate_graph_visualization(self):
         """Generate mermaid visualization of the graph."""
@@ -208,6 +302,35 @@ class BaseAgent(ABC):
             # Don't fail if visualization generation fails
             print(f"Warning: Could not generate graph visualization: {e}")
 
+    def _get_messages_list(
+        self,
+        state: state.State,
+        config: RunnableConfig,
+    ) -> List[BaseMessage]:
+        """Get the system prompts followed by the trimmed messages of the state."""
+        workspace_message = f"**Current workspace:** {session_working_directory(config)} \n**JUDI.jl documentation and examples can be found at:** {str(PROJECT_ROOT / 'rag' / 'judi')}"
+
+        messages_list: List[BaseMessage] = [
+            SystemMessage(content=self.get_prompt_from_config(config=config)),
+            SystemMessage(content=workspace_message),
+        ]
+        max_tokens = history_token_budget(
+            self._get_model_name(config),
+            BaseConfiguration.from_runnable_config(config).max_history_tokens,
+        )
+        messages_list.extend(self._trim_state_messages(state.messages, max_tokens))
+        return messages_list
+
+    def _get_model_name(self, config: RunnableConfig) -> str:
+        """Get the name of the model in the configuration, also for model objects."""
+        model = self.get_model_from_config(config=config)
+        if isinstance(model, str):
+            return model
+        chat_model = self._get_chat_model(model)
+        return str(
+            getattr(chat_model, "model_name", None) or getattr(chat_model, "model", "")
+        )
+
     def invoke_model(
         self,
         state: state.State,
@@ -215,17 +338,11 @@ class BaseAgent(ABC):
         messages_list: Optional[List] = None,
     ) -> AIMessage:
         """Invoke the model with the given prompt and state."""
+        restore_session_working_directory(state.working_directory, config)
         model = self._load_model(config=config)
 
-        workspace_message = f"**Current workspace:** {os.getcwd()} \n**JUDI.jl documentation and examples can be found at:** {str(PROJECT_ROOT / 'rag' / 'judi')}"
-
         if not messages_list:
-            messages_list = [
-                SystemMessage(content=self.get_prompt_from_config(config=config)),
-                SystemMessage(content=workspace_message),
-            ]
-            trimmed_state_messages = self._trim_state_messages(state.messages, model)
-            messages_list.extend(trimmed_state_messages)
+            messages_list = self._get_messages_list(state, config)
 
         # Invoke the model
         if self.print_chat_output:
@@ -246,6 +363,38 @@ class BaseAgent(ABC):
 
         return response
 
+    async def ainvoke_model(
+        self,
+        state: state.State,
+        config: RunnableConfig,
+        messages_list: Optional[List] = None,
+    ) -> AIMessage:
+        """Async variant of `invoke_model`, which does not block the event loop."""
+        restore_session_working_directory(state.working_directory, config)
+        model = self._load_model(config=config)
+
+        if not messages_list:
+            messages_list = self._get_messages_list(state, config)
+
+        # Invoke the model
+        if self.print_chat_output:
+            chat_response = await astream_to_console(
+                llm=model,
+                message_list=messages_list,
+                config=config,
+                title=self.printed_name,
+                border_style=colorscheme.normal,
+            )
+
+            response = cast(AIMessage, chat_response)
+        else:
+            response = cast(AIMessage, await model.ainvoke(messages_list, config))
+
+        # Add agent name to the response
+        response.name = self.name
+
+        return response
+
     def _should_bind_tools(self, model: BaseChatModel) -> bool:
         """Check if we need to bind tools to the model."""
         if len(self.tool_classes) == 0:
@@ -333,19 +482,9 @@ class BaseAgent(ABC):
         )
 
     def _trim_state_messages(
-        self,
-        messages: Sequence[BaseMessage],
-        model: Union[BaseChatModel, Runnable[LanguageModelInput, BaseMessage]],
+        self, messages: Sequence[BaseMessage], max_tokens: int
     ) -> Sequence[BaseMessage]:
-        trimmed_state_messages = trim_messages(
-            messages,
-            max_tokens=40000,  # adjust for model's context window minus system & files message
-            strategy="last",
-            token_counter=model,
-            include_system=False,  # Not needed since systemMessage is added separately
-            allow_partial=True,
-        )
-        return trimmed_state_messages
+        return trim_state_messages(messages, max_tokens)
 
     def should_continue(self, state: state.State) -> Literal["tools", "continue"]:
         """
@@ -365,6 +504,19 @@ class BaseAgent(ABC):
         response = self.invoke_model(state=state, config=config)
         return {"messages": [response]}
 
+    async def acall_model(self, state: state.State, config: RunnableConfig) -> dict:
+        """Async variant of `call_model`."""
+        response = await self.ainvoke_model(state=state, config=config)
+        return {"messages": [response]}
+
+    def _model_node(self) -> RunnableCallable:
+        """
+        Node calling the model. Runs `call_model` when the graph is invoked, and
+        `acall_model` when it is awaited (f.ex. with `ainvoke` or under the LangGraph
+        server), so a model call does not block other sessions.
+        """
+        return RunnableCallable(self.call_model, self.acall_model, name="agent")
+
     def get_user_input(self, state: state.State, config: RunnableConfig) -> dict:
         """Get user input for standalone mode."""
 
@@ -415,6 +567,11 @@ Here is the question asked by the other agent:
         try:
             show_startup_screen()
 
+            # Start the Julia workers, the linter and the docstring index in the background while the user writes the first prompt
+            get_worker_pool().warm_up()
+            get_lint_server().warm_up()
+            warm_up_doc_index()
+
             # Create configuration
             config = RunnableConfig(configurable={}, recursion_limit=RECURSION_LIMIT)
 
@@ -19,6 +19,7 @@ from judigpt.tools import (
     list_files_in_directory,
     read_from_file,
     retrieve_function_documentation,
+    retrieve_judi_docs_and_examples,
     retrieve_judi_examples,
     run_julia_code,
     run_julia_linter,
@@ -67,7 +68,7 @@ class AutonomousAgent(BaseAgent):
             )
 
         # Add nodes
-        workflow.add_node("agent", self.call_model)
+        workflow.add_node("agent", self._model_node())
         workflow.add_node("tools", self.tool_node)
 
         if mcp_mode:
@@ -113,9 +114,15 @@ class AutonomousAgent(BaseAgent):
 
     def call_model(self, state: State, config: RunnableConfig) -> dict:
         """Call the model with the current state."""
-
         response = self.invoke_model(state=state, config=config)
+        return self._state_update_from_response(state, response)
+
+    async def acall_model(self, state: State, config: RunnableConfig) -> dict:
+        """Async variant of `call_model`."""
+        response = await self.ainvoke_model(state=state, config=config)
+        return self._state_update_from_response(state, response)
 
+    def _state_update_from_response(self, state: State, response: AIMessage) -> dict:
         # Check if we need more steps
         if self._are_more_steps_needed(state, response):
             return {
@@ -150,6 +157,7 @@ autonomous_agent = AutonomousAgent(
         grep_search,
         retrieve_function_documentation,
         retrieve_judi_examples,
+        retrieve_judi_docs_and_examples,
     ],
     print_chat_output=True,
 )
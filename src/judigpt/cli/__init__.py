@@ -1,12 +1,14 @@
 import judigpt.cli.cli_utils as utils
 from judigpt.cli.cli_colorscheme import colorscheme
 from judigpt.cli.cli_utils import (
+    astream_to_console,
     print_to_console,
     show_startup_screen,
     stream_to_console,
 )
 
 __all__ = [
+    "astream_to_console",
     "colorscheme",
     "print_to_console",
     "show_startup_screen",
@@ -96,6 +96,65 @@ def stream_to_console(
     return ai_message
 
 
+async def astream_to_console(
+    llm,
+    message_list: List,
+    config: RunnableConfig,
+    title: Optional[str] = "",
+    border_style: str = "",
+    panel_kwargs: dict = {},
+    with_markdown: bool = True,
+) -> AIMessage:
+    """Async variant of `stream_to_console`, which does not block the event loop."""
+    ai_message: Optional[AIMessage] = None
+    streamed_text: str = ""
+    panel_kwargs = panel_kwargs.copy()  # prevent mutation
+
+    if border_style:
+        panel_kwargs["border_style"] = border_style
+    if title:
+        panel_kwargs["title"] = title
+
+    # Stream the chunks, but don't create Live until the first meaningful one
+    stream = llm.astream(message_list, config=config)
+
+    async for chunk in stream:
+        if chunk.content:
+            streamed_text += chunk.content
+            ai_message = chunk if ai_message is None else ai_message + chunk
+
+            # Now that we have some content, start the Live panel
+            with Live(
+                Panel(
+                    Markdown(streamed_text) if with_markdown else streamed_text,
+                    **panel_kwargs,
+                ),
+                console=console,
+                refresh_per_second=4,
+            ) as live:
+                async for chunk in stream:
+                    ai_message += chunk
+                    if chunk.content:
+                        streamed_text += chunk.content
+                        live.update(
+                            Panel.fit(
+                                Markdown(streamed_text)
+                                if with_markdown
+                                else streamed_text,
+                                **panel_kwargs,
+                            )
+                        )
+            break  # We've handled all remaining chunks inside the Live context
+        elif ai_message is None:
+            ai_message = chunk
+        else:
+            ai_message += chunk
+
+    if ai_message is None:
+        raise ValueError("No message content received from the model")
+    return ai_message
+
+
 def show_startup_screen():
     subtitle = Text(
         "AI Assistant for JUDI.jl",
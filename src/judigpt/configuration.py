@@ -21,6 +21,10 @@ cli_mode: bool = True  # If the agent is run from using the CLI
 mcp_mode: bool = (
     False  # If the agent is run as an MPC server that can be called from VSCode
 )
+# If the agent is served to many sessions by judigpt.server. Set with JUDIGPT_SERVER=1.
+server_mode: bool = bool(os.environ.get("JUDIGPT_SERVER"))
+if server_mode:
+    cli_mode = False  # The server has no console to prompt the user in
 assert not (cli_mode and mcp_mode), "cli_mode and mcp_mode cannot both be true."
 
 # Select whether to use local models through Ollama or hosted OpenAI models.
@@ -40,6 +44,54 @@ else:
 
 RECURSION_LIMIT = 200  # Number of recursions before an error is thrown.
 LLM_TEMPERATURE = 0
+BOUND_MODEL_CACHE_SIZE = 8  # Number of chat models given as objects whose tool binding is kept per agent.
+
+# Julia code execution. Code is run in a pool of warm Julia processes that have
+# already loaded JUDI, instead of starting a new Julia process for every run.
+JULIA_CODE_TIMEOUT = 180  # Seconds before a code run is aborted.
+JULIA_WORKER_POOL_SIZE = 2  # Number of warm Julia workers. Set to 0 to disable the pool.
+JULIA_WORKER_MAX_EXECUTIONS = 25  # Recycle a worker after this many code runs.
+JULIA_WORKER_STARTUP_TIMEOUT = 600  # Seconds allowed for a worker to load JUDI.
+JULIA_WORKER_RETRY_BACKOFF = 30  # Seconds before starting a worker is tried again after it failed. Doubles with each failure in a row.
+JULIA_WORKER_RETRY_MAX_BACKOFF = 600  # Upper limit of the backoff after failed worker starts.
+JULIA_LINT_TIMEOUT = 30  # Seconds before linting is skipped.
+JULIA_LINT_RETRY_BACKOFF = 30  # Seconds before starting the lint server is tried again after it failed. Doubles with each failure in a row.
+JULIA_LINT_RETRY_MAX_BACKOFF = 600  # Upper limit of the backoff after failed lint server starts.
+CANCEL_RUN_ON_SYNTAX_ERROR = True  # Do not start the code run, or stop a cold Julia process, when the linter finds a syntax error.
+JULIA_RESULT_CACHE_SIZE = 128  # Number of code run results kept in memory. Set to 0 to disable.
+JULIA_RESULT_CACHE_TTL = 3600  # Seconds a cached code run result is valid for.
+JULIA_RESULT_CACHE_MAX_FILES = 5000  # Code runs in working directories with more files are not cached.
+JULIA_LINT_CACHE_SIZE = 512  # Number of linting results kept on disk. Set to 0 to disable.
+JULIA_DOC_INDEX_TIMEOUT = 900  # Seconds allowed for building the docstring index.
+USE_JULIA_SYSIMAGE = True  # Use the custom sysimage if it has been built. See judigpt.julia.sysimage.
+
+# Retrieval
+QUERY_EMBEDDING_CACHE_SIZE = 4096  # Number of query embeddings cached on disk per embedding model. Set to 0 to disable.
+EMBEDDING_BATCH_SIZE = 64  # Number of chunks embedded per request when building an index.
+EMBEDDING_CONCURRENCY = 4  # Number of embedding requests in flight when building an index.
+EMBEDDING_MAX_RETRIES = 5  # Retries of an embedding request failing with a rate limit, timeout or connection error, with exponential backoff.
+EMBEDDING_RETRY_BACKOFF = 1.0  # Seconds before the first retry.
+SPLIT_WORKERS = os.cpu_count() or 1  # Processes splitting the source files when building an index.
+
+# Message history
+MAX_HISTORY_TOKENS = 40000  # Upper limit of the tokens of the message history sent to the model.
+RESERVED_CONTEXT_TOKENS = 16000  # Tokens of the context window left for the prompts, tool schemas and response.
+DEFAULT_CONTEXT_WINDOW = 128000  # Context window of models not in MODEL_CONTEXT_WINDOWS.
+MODEL_CONTEXT_WINDOWS = {  # Context window of the models, by the start of the model name.
+    "gpt-4.1": 1047576,
+    "gpt-4o": 128000,
+    "gpt-5": 400000,
+    "o3": 200000,
+    "o4-mini": 200000,
+    "qwen2.5": 32768,
+    "qwen3": 40960,
+}
+TOKENIZER_ENCODING = "o200k_base"  # tiktoken encoding counting the tokens of the messages.
+TOKEN_COUNT_CACHE_SIZE = 8192  # Number of messages whose token count is kept in memory. Set to 0 to disable.
+
+# Server mode
+SERVER_WORKSPACE_ROOT = os.path.join(os.getcwd(), "judigpt_workspaces")  # Parent of the working directories of the sessions.
+SESSION_DIRECTORY_CACHE_SIZE = 1024  # Number of sessions whose changed working directory is kept in memory. Older ones are restored from the graph state.
 
 
 # Setup of the environment and some logging. Not neccessary to touch this.
@@ -120,13 +172,23 @@ class BaseConfiguration:
         metadata={"description": "The vector store provider to use for retrieval."},
     )
 
+    faiss_index_type: str = field(
+        default="Flat",
+        metadata={
+            "description": "FAISS index factory string of the index built by the 'faiss' retriever_provider. "
+            "'Flat' stores the vectors as float32. 'SQfp16', 'SQ8' and 'PQ<M>x<bits>' (f.ex. 'PQ64x4') store compressed vectors, which load faster and use less memory at some cost in recall. "
+            "IVF indices are not supported, since their vectors cannot be deleted when the index is updated."
+        },
+    )
+
     examples_search_type: Annotated[
-        Literal["similarity", "mmr", "similarity_score_threshold"],
+        Literal["similarity", "mmr", "similarity_score_threshold", "hybrid"],
         {"__template_metadata__": {"kind": "reranker"}},
     ] = field(
         default="mmr",
         metadata={
-            "description": "Defines the type of search that the retriever should perform."
+            "description": "Defines the type of search that the retriever should perform. "
+            "'hybrid' fuses a similarity search with a BM25 keyword search, using the 'k', 'fetch_k' and optionally 'rrf_k' search kwargs."
         },
     )
 
@@ -149,7 +211,27 @@ class BaseConfiguration:
 
     rerank_kwargs: dict[str, Any] = field(
         default_factory=lambda: {},
-        metadata={"description": "Keyword arguments provided to the reranker"},
+        metadata={
+            "description": "Keyword arguments provided to the reranker. For 'flash': 'model', 'top_n', 'batch_size', 'max_length' and 'score_threshold'. "
+            "The examples search 'k' should then be larger than 'top_n', f.ex. 10, since the reranker picks the 'top_n' best of the 'k' retrieved examples."
+        },
+    )
+
+    max_history_tokens: int = field(
+        default=0,
+        metadata={
+            "description": "Number of tokens of the message history sent to the model. The older messages are trimmed. "
+            "Derived from the context window of the model if 0, see MODEL_CONTEXT_WINDOWS."
+        },
+    )
+
+    # Session
+    working_directory: str = field(
+        default="",
+        metadata={
+            "description": "Working directory of the session, used by the file and code tools. "
+            "The working directory of the process if empty, or a directory of its own in server mode."
+        },
     )
 
     # Models
@@ -0,0 +1,214 @@
+"""
+Index of the docstrings of the names exported by JUDI and Base.
+
+Looking up documentation with `julia_get_function_documentation.jl` starts a Julia
+process and loads JUDI for every call. The index extracts all docstrings once and
+stores them in a JSON file, which is rebuilt when the Julia or JUDI version in the
+Manifest.toml changes. Names missing from the index are looked up in Julia. A missing
+or outdated index is built in the background, and the names are looked up in Julia
+until it is ready.
+
+Build the index ahead of time by running
+
+```bash
+python -m judigpt.julia.doc_index build
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import tomllib
+from typing import Dict, List, Optional
+
+from judigpt.configuration import JULIA_DOC_INDEX_TIMEOUT, PROJECT_ROOT
+from judigpt.julia.sysimage import julia_command
+
+DOC_INDEX_PATH = str(PROJECT_ROOT / "julia" / "cache" / "doc_index.json")
+BUILD_SCRIPT = str(PROJECT_ROOT / "julia" / "julia_build_doc_index.jl")
+
+
+def get_manifest_versions(project_dir: str) -> Dict[str, Optional[str]]:
+    """The Julia and JUDI versions in the Manifest.toml of the project."""
+    versions: Dict[str, Optional[str]] = {"julia": None, "JUDI": None}
+    manifest_path = os.path.join(project_dir, "Manifest.toml")
+    try:
+        with open(manifest_path, "rb") as f:
+            manifest = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError):
+        return versions
+
+    versions["julia"] = manifest.get("julia_version")
+    # Manifest format 2.0 nests the packages under `deps`
+    packages = manifest.get("deps", manifest)
+    judi_entries = packages.get("JUDI", [])
+    if judi_entries:
+        versions["JUDI"] = judi_entries[0].get("version")
+    return versions
+
+
+def format_documentation(name: str, doc: str) -> str:
+    """Format a docstring the same way as `julia_get_function_documentation.jl`."""
+    doc = re.sub(r"^#", "##", doc, flags=re.MULTILINE)
+    doc = "\n".join(line.lstrip() for line in doc.split("\n"))
+    return f"\n# Documentation for '{name}':\n{doc}\n"
+
+
+class DocIndex:
+    """
+    Docstrings of the names exported by JUDI and Base, keyed on the name.
+
+    Args:
+        docs (Dict[str, str]): The docstring of each name.
+        versions (Dict[str, Optional[str]]): The Julia and JUDI versions the docstrings were extracted from.
+    """
+
+    def __init__(self, docs: Dict[str, str], versions: Dict[str, Optional[str]]):
+        self.docs = docs
+        self.versions = versions
+
+    def lookup(self, func_names: List[str]) -> tuple[Dict[str, str], List[str]]:
+        """
+        Returns:
+            Dict[str, str]: The docstrings of the names found in the index.
+            List[str]: The names not found in the index.
+        """
+        found = {name: self.docs[name] for name in func_names if name in self.docs}
+        missing = [name for name in func_names if name not in self.docs]
+        return found, missing
+
+    def save(self, path: str = DOC_INDEX_PATH) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"versions": self.versions, "docs": self.docs}, f)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str = DOC_INDEX_PATH) -> Optional[DocIndex]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(docs=data["docs"], versions=data["versions"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def _parse_build_output(data: bytes) -> Dict[str, str]:
+    docs = {}
+    position = 0
+    while position < len(data):
+        name_end = data.index(b"\n", position)
+        size_end = data.index(b"\n", name_end + 1)
+        name = data[position:name_end].decode("utf-8")
+        size = int(data[name_end + 1 : size_end])
+        doc_start = size_end + 1
+        docs[name] = data[doc_start : doc_start + size].decode(
+            "utf-8", errors="replace"
+        )
+        position = doc_start + size + 1  # Skip the newline after the docstring
+    return docs
+
+
+def build_doc_index(project_dir: Optional[str] = None) -> DocIndex:
+    """
+    Extract the docstrings with Julia and save the index to `DOC_INDEX_PATH`.
+
+    Args:
+        project_dir (Optional[str]): The Julia project containing JUDI. Defaults to the current working directory.
+    """
+    if project_dir is None:
+        project_dir = os.getcwd()
+
+    fd, output_path = tempfile.mkstemp(suffix=".docs")
+    os.close(fd)
+    try:
+        subprocess.run(
+            [*julia_command(project_dir), BUILD_SCRIPT, output_path],
+            cwd=project_dir,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=JULIA_DOC_INDEX_TIMEOUT,
+        )
+        with open(output_path, "rb") as f:
+            docs = _parse_build_output(f.read())
+    finally:
+        os.unlink(output_path)
+
+    index = DocIndex(docs=docs, versions=get_manifest_versions(project_dir))
+    index.save()
+    return index
+
+
+_index: Optional[DocIndex] = None
+_index_lock = threading.Lock()
+_build_thread: Optional[threading.Thread] = None
+_build_failed = False
+
+
+def _build_in_background(project_dir: str) -> None:
+    global _index, _build_failed
+    try:
+        index = build_doc_index(project_dir)
+    except (OSError, ValueError, subprocess.SubprocessError):
+        with _index_lock:
+            _build_failed = True
+        return
+    with _index_lock:
+        _index = index
+
+
+def get_doc_index(project_dir: Optional[str] = None) -> Optional[DocIndex]:
+    """
+    Get the docstring index. If it is missing or was built for other package versions,
+    it is built in the background, and None is returned until it is ready.
+
+    Returns:
+        Optional[DocIndex]: The index, or None if it is being built or could not be built.
+    """
+    global _index, _build_thread
+
+    if project_dir is None:
+        project_dir = os.getcwd()
+    versions = get_manifest_versions(project_dir)
+
+    with _index_lock:
+        building = _build_thread is not None and _build_thread.is_alive()
+        if not building and (_index is None or _index.versions != versions):
+            _index = DocIndex.load()
+        if _index is not None and _index.versions == versions:
+            return _index
+
+        # Only try building once per session, the live lookup still works without it
+        if not building and not _build_failed:
+            _build_thread = threading.Thread(
+                target=_build_in_background, args=(project_dir,), daemon=True
+            )
+            _build_thread.start()
+        return None
+
+
+def warm_up_doc_index(project_dir: Optional[str] = None) -> None:
+    """Start building the docstring index in the background if it is missing or outdated."""
+    get_doc_index(project_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument(
+        "--project",
+        default=None,
+        help="The Julia project directory. Defaults to the current working directory.",
+    )
+    args = parser.parse_args()
+
+    index = build_doc_index(project_dir=args.project)
+    print(f"Indexed documentation for {len(index.docs)} names in {DOC_INDEX_PATH}")
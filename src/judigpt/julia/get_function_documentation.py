@@ -1,4 +1,5 @@
 from judigpt.cli import colorscheme, print_to_console
+from judigpt.julia.doc_index import format_documentation, get_doc_index
 from judigpt.julia.julia_code_runner import run_julia_file
 
 
@@ -80,17 +81,35 @@ def get_function_documentation_from_list_of_funcs(
     """
     Get function documentation from a list of function names.
 
+    The documentation is read from the docstring index. Only names missing from the
+    index are looked up by running Julia.
+
     Args:
         funcs (list[str]): List of function names to get documentation for.
 
     Returns:
         tuple[list[str], str]: A tuple containing a list of function names and their documentation.
     """
-    code = "\n".join(f"{func_name}();" for func_name in func_names)
-
     print_to_console(
         text="Retrieving documentation for functions: " + ", ".join(func_names),
         title="Function Documentation Retriever",
         border_style=colorscheme.message,
     )
-    return get_function_documentation(code)
+
+    doc_index = get_doc_index()
+    if doc_index is None:
+        found_docs, missing_names = {}, list(func_names)
+    else:
+        found_docs, missing_names = doc_index.lookup(func_names)
+
+    documentation = "".join(
+        format_documentation(name, doc) for name, doc in found_docs.items()
+    ).strip()
+    if not missing_names:
+        return list(found_docs), documentation
+
+    code = "\n".join(f"{func_name}();" for func_name in missing_names)
+    live_names, live_documentation = get_function_documentation(code)
+    return list(found_docs) + live_names, "\n\n".join(
+        text for text in [documentation, live_documentation] if text
+    )
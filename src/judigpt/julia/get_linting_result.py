@@ -1,13 +1,128 @@
+import os
 import subprocess
+from dataclasses import asdict
+from typing import Callable, List, Optional
 
 from judigpt.cli import colorscheme, print_to_console
+from judigpt.configuration import JULIA_LINT_TIMEOUT
 from judigpt.julia.julia_code_runner import run_julia_file
+from judigpt.julia.julia_lint_server import (
+    LintDiagnostic,
+    LintServerNotReady,
+    format_diagnostics,
+    get_lint_server,
+)
+from judigpt.julia.julia_process import JuliaProcessError, JuliaProcessTimeout
+from judigpt.julia.result_cache import lint_result_cache, make_cache_key
 
 
-def get_linting_result(code: str) -> str:
+def _print_linting_result(linting_result: str, cached: bool = False) -> None:
+    title = "Linter Result (cached)" if cached else "Linter Result"
+    if linting_result:
+        print_to_console(
+            text=linting_result,
+            title=title,
+            border_style=colorscheme.error,
+        )
+    else:
+        print_to_console(
+            text="No linting issues found!",
+            title=title,
+            border_style=colorscheme.success,
+        )
+
+
+def _lint_cache_key(code: str) -> str:
+    return make_cache_key(code, os.getcwd(), normalize=False)
+
+
+def _lint_with_server(code: str, cache_key: str) -> Optional[List[LintDiagnostic]]:
+    """
+    Lint the code using the resident lint server, and cache the diagnostics.
+
+    Returns:
+        Optional[List[LintDiagnostic]]: The issues found in the code, or None if the linter was skipped.
+    """
+    server = get_lint_server()
+    try:
+        diagnostics = server.lint(code, timeout=JULIA_LINT_TIMEOUT)
+        lint_result_cache.put(
+            cache_key, [asdict(diagnostic) for diagnostic in diagnostics]
+        )
+        return diagnostics
+    except LintServerNotReady:
+        print_to_console(
+            text="The linter is still loading the Julia environment in the background. Skipping the linter check for now, it will be available for the next check.",
+            title="Linter Loading - Skipped",
+            border_style=colorscheme.warning,
+        )
+    except JuliaProcessTimeout:
+        print_to_console(
+            text=f"Linter timed out after {JULIA_LINT_TIMEOUT} seconds. Skipping linter check. The code will still be checked by running it.",
+            title="Linter Timeout - Skipped",
+            border_style=colorscheme.warning,
+        )
+    except JuliaProcessError as e:
+        if server.available:
+            print_to_console(
+                text=f"Linter error: {str(e)}",
+                title="Linter Error",
+                border_style=colorscheme.warning,
+            )
+    return None
+
+
+def _report_diagnostics(
+    diagnostics: List[LintDiagnostic],
+    on_diagnostics: Optional[Callable[[List[LintDiagnostic]], None]],
+    cached: bool = False,
+) -> str:
+    if on_diagnostics is not None:
+        on_diagnostics(diagnostics)
+    linting_result = format_diagnostics(diagnostics)
+    _print_linting_result(linting_result, cached=cached)
+    return linting_result
+
+
+def get_linting_result(
+    code: str,
+    on_diagnostics: Optional[Callable[[List[LintDiagnostic]], None]] = None,
+) -> str:
+    """
+    Lint the code and return the issues found, formatted as text. Empty if no issues were found.
+
+    The results of both the lint server and the fallback lint script are cached on disk,
+    keyed on the code and the Julia environment.
+
+    Args:
+        on_diagnostics (Optional[Callable[[List[LintDiagnostic]], None]]): Called with the
+            structured diagnostics before they are printed, when the lint server was used.
+    """
+    cache_key = _lint_cache_key(code)
+    cached_result = lint_result_cache.get(cache_key)
+    if isinstance(cached_result, list):  # From the lint server
+        diagnostics = [LintDiagnostic(**diagnostic) for diagnostic in cached_result]
+        return _report_diagnostics(diagnostics, on_diagnostics, cached=True)
+    if isinstance(cached_result, str):  # From the lint script
+        _print_linting_result(cached_result, cached=True)
+        return cached_result
+
+    server = get_lint_server()
+    if server.available:
+        diagnostics = _lint_with_server(code, cache_key)
+        if diagnostics is not None:
+            return _report_diagnostics(diagnostics, on_diagnostics)
+        if server.available:
+            return ""
+
+    # The lint server could not be started, fall back to linting in a new Julia process
+    return _get_linting_result_from_script(code, cache_key)
+
+
+def _get_linting_result_from_script(code: str, cache_key: str) -> str:
     try:
         res, err = run_julia_file(code=code, julia_file_name="julia_lint_script.jl")
-        
+
         # Check if there was a timeout error in stderr
         if err and "timed out" in err.lower():
             print_to_console(
@@ -16,24 +131,13 @@ def get_linting_result(code: str) -> str:
                 border_style=colorscheme.warning,
             )
             return ""
-        
+
         lines = res.splitlines()
         for i, line in enumerate(lines):
             if "STARTING LINT:" in line:
                 linting_result = "\n".join(lines[i + 1 :])
-
-                if linting_result:
-                    print_to_console(
-                        text=linting_result,
-                        title="Linter Result",
-                        border_style=colorscheme.error,
-                    )
-                else:
-                    print_to_console(
-                        text="No linting issues found!",
-                        title="Linter Result",
-                        border_style=colorscheme.success,
-                    )
+                lint_result_cache.put(cache_key, linting_result)
+                _print_linting_result(linting_result)
                 return linting_result
 
         # If no "STARTING LINT:" marker found, linter may have failed silently
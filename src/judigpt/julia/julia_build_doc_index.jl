@@ -0,0 +1,35 @@
+# Extract the docstrings of all names exported by JUDI and Base, used by
+# `judigpt.julia.doc_index` to answer documentation lookups without starting Julia.
+#
+# Usage:
+#   julia --project=<project dir> julia_build_doc_index.jl <output path>
+#
+# The names are looked up from Main after `using JUDI`, the same way as in
+# julia_get_function_documentation.jl. The output file contains one record per name:
+#   <name>
+#   <number of bytes in the docstring>
+#   <docstring>
+
+using JUDI
+
+output_path = abspath(ARGS[1])
+
+names_to_index = sort(unique(vcat(names(JUDI), names(Base))))
+
+n_docs = 0
+open(output_path, "w") do io
+    for sym in names_to_index
+        isdefined(Main, sym) || continue
+        doc = try
+            string(Base.Docs.doc(Base.Docs.Binding(Main, sym)))
+        catch
+            continue
+        end
+        if isempty(strip(doc)) || startswith(doc, "No documentation found")
+            continue
+        end
+        write(io, string(sym), "\n", string(sizeof(doc)), "\n", doc, "\n")
+        global n_docs += 1
+    end
+end
+println("Wrote documentation for $n_docs names to $output_path")
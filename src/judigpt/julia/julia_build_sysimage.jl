@@ -0,0 +1,30 @@
+# Build a custom sysimage with JUDI and the linting packages precompiled.
+#
+# Usage:
+#   julia --project=<project dir> julia_build_sysimage.jl <sysimage path> [example files...]
+#
+# The example files are run while building the sysimage so that the code paths used
+# by typical JUDI scripts are compiled into it (see julia_sysimage_precompile.jl).
+
+try
+    using PackageCompiler
+catch
+    error(
+        "PackageCompiler is not installed. Install it in your default environment with " *
+        "`julia -e 'using Pkg; Pkg.add(\"PackageCompiler\")'`.",
+    )
+end
+
+sysimage_path = abspath(ARGS[1])
+examples = abspath.(ARGS[2:end])
+
+# The precompile execution file is run in a separate process, so the examples are passed through ENV
+ENV["JUDIGPT_SYSIMAGE_EXAMPLES"] = join(examples, "\n")
+
+mkpath(dirname(sysimage_path))
+create_sysimage(
+    [:JUDI, :CSTParser, :StaticLint, :SymbolServer, :LanguageServer];
+    sysimage_path=sysimage_path,
+    precompile_execution_file=joinpath(@__DIR__, "julia_sysimage_precompile.jl"),
+)
+println("Sysimage written to $sysimage_path")
@@ -2,8 +2,25 @@ import os
 import re
 import subprocess
 import tempfile
+import threading
 import time
-from typing import Union
+from typing import Optional, Union
+
+from judigpt.configuration import JULIA_CODE_TIMEOUT, JULIA_LINT_TIMEOUT
+from judigpt.julia.julia_process import (
+    CANCEL_POLL_INTERVAL,
+    JuliaProcessCancelled,
+    JuliaProcessError,
+    JuliaProcessTimeout,
+)
+from judigpt.julia.julia_worker_pool import get_worker_pool
+from judigpt.julia.result_cache import (
+    TEMP_FILE_PREFIX,
+    code_result_cache,
+    get_directory_state,
+    make_cache_key,
+)
+from judigpt.julia.sysimage import julia_command
 
 
 def run_julia_file(code: str, julia_file_name: str, project_dir: str | None = None):
@@ -14,7 +31,12 @@ def run_julia_file(code: str, julia_file_name: str, project_dir: str | None = No
 
     # Create a temporary file with Julia code in the project directory
     with tempfile.NamedTemporaryFile(
-        mode="w", suffix=".jl", delete=False, encoding="utf-8", dir=project_dir
+        mode="w",
+        prefix=TEMP_FILE_PREFIX,
+        suffix=".jl",
+        delete=False,
+        encoding="utf-8",
+        dir=project_dir,
     ) as temp_file:
         temp_file.write(code)
         temp_file.flush()  # Ensure content is written to disk
@@ -27,8 +49,7 @@ def run_julia_file(code: str, julia_file_name: str, project_dir: str | None = No
         )
         result = subprocess.run(
             [
-                "julia",
-                f"--project={project_dir}",
+                *julia_command(project_dir),
                 julia_script,
                 project_dir,
                 temp_file_path,
@@ -37,7 +58,7 @@ def run_julia_file(code: str, julia_file_name: str, project_dir: str | None = No
             stderr=subprocess.PIPE,
             text=True,
             cwd=project_dir,
-            timeout=30,  # 30 second timeout for linting (reduced from 60)
+            timeout=JULIA_LINT_TIMEOUT,
         )
         return result.stdout, result.stderr
     except subprocess.TimeoutExpired as e:
@@ -48,7 +69,7 @@ def run_julia_file(code: str, julia_file_name: str, project_dir: str | None = No
                 process.kill()
         except:
             pass
-        return "", "Error: Julia process timed out after 30 seconds. This may happen when loading large packages like JUDI. The linter check was skipped."
+        return "", f"Error: Julia process timed out after {JULIA_LINT_TIMEOUT} seconds. This may happen when loading large packages like JUDI. The linter check was skipped."
     finally:
         # Clean up the temporary file
         try:
@@ -57,23 +78,40 @@ def run_julia_file(code: str, julia_file_name: str, project_dir: str | None = No
             pass  # File might already be deleted
 
 
-def run_code_string_direct(code: str, project_dir: str | None = None):
+def run_code_string_direct(
+    code: str,
+    project_dir: str | None = None,
+    cancel_event: Optional[threading.Event] = None,
+    working_dir: str | None = None,
+):
     """
     Alternative approach: Run Julia code directly using -e flag instead of temporary file.
+
+    Args:
+        working_dir (str | None): Directory the code runs in. The project directory if None.
+
+    Raises:
+        JuliaProcessCancelled: If the cancel event was set before the code finished.
     """
     if project_dir is None:
         project_dir = os.getcwd()
+    if working_dir is None:
+        working_dir = project_dir
 
     try:
-        result = subprocess.run(
-            ["julia", f"--project={project_dir}", "-e", code],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            cwd=project_dir,
-            timeout=180,  # 180 second timeout for code execution (JUDI package loading can be slow)
+        if cancel_event is None:
+            result = subprocess.run(
+                [*julia_command(project_dir), "-e", code],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                cwd=working_dir,
+                timeout=JULIA_CODE_TIMEOUT,  # JUDI package loading can be slow
+            )
+            return result.stdout, result.stderr
+        return _run_cancellable(
+            [*julia_command(project_dir), "-e", code], working_dir, cancel_event
         )
-        return result.stdout, result.stderr
     except subprocess.TimeoutExpired as e:
         # Kill the process if it's still running
         try:
@@ -82,11 +120,86 @@ def run_code_string_direct(code: str, project_dir: str | None = None):
                 process.kill()
         except:
             pass
-        return "", "Error: Julia code execution timed out after 180 seconds. This may happen with complex simulations or when loading large packages."
+        return "", f"Error: Julia code execution timed out after {JULIA_CODE_TIMEOUT} seconds. This may happen with complex simulations or when loading large packages."
+    except JuliaProcessCancelled:
+        raise
     except Exception as e:
         return "", f"Error running Julia: {e}"
 
 
+def _run_cancellable(
+    cmd: list[str], cwd: str, cancel_event: threading.Event
+) -> tuple[str, str]:
+    """Like `subprocess.run`, but kills the process when the cancel event is set."""
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=cwd,
+    )
+    deadline = time.monotonic() + JULIA_CODE_TIMEOUT
+    while True:
+        if cancel_event.is_set():
+            process.kill()
+            process.communicate()
+            raise JuliaProcessCancelled("Julia code execution was cancelled.")
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            process.kill()
+            process.communicate()
+            raise subprocess.TimeoutExpired(cmd, JULIA_CODE_TIMEOUT)
+        try:
+            return process.communicate(timeout=min(remaining, CANCEL_POLL_INTERVAL))
+        except subprocess.TimeoutExpired:
+            pass
+
+
+def run_code_string_pooled(
+    code: str,
+    project_dir: str | None = None,
+    cancel_event: Optional[threading.Event] = None,
+    working_dir: str | None = None,
+):
+    """
+    Run Julia code on a warm worker from the worker pool, where JUDI is already loaded.
+    Falls back to `run_code_string_direct` if no worker can be started.
+
+    Args:
+        working_dir (str | None): Directory the code runs in. The project directory if None.
+
+    Raises:
+        JuliaProcessCancelled: If the cancel event was set before the code was sent to a
+            worker. A code run on a worker is not stopped, see `JuliaWorkerPool.run`.
+    """
+    pool = get_worker_pool(project_dir)
+    if not pool.available:
+        return run_code_string_direct(
+            code=code,
+            project_dir=project_dir,
+            cancel_event=cancel_event,
+            working_dir=working_dir,
+        )
+
+    try:
+        return pool.run(
+            code,
+            timeout=JULIA_CODE_TIMEOUT,
+            cancel_event=cancel_event,
+            working_dir=working_dir,
+        )
+    except JuliaProcessTimeout:
+        return "", f"Error: Julia code execution timed out after {JULIA_CODE_TIMEOUT} seconds. This may happen with complex simulations."
+    except JuliaProcessError:
+        # Workers could not be started (f.ex. JUDI failed to load), run the code directly instead
+        return run_code_string_direct(
+            code=code,
+            project_dir=project_dir,
+            cancel_event=cancel_event,
+            working_dir=working_dir,
+        )
+
+
 def _split_stacktrace(msg: str):
     """
     Split a Julia error message into the main error message and the stacktrace.
@@ -147,9 +260,79 @@ def get_error_message(result) -> str:
     return out_string
 
 
-def run_code(code: str) -> dict:
+# Errors caused by the execution environment rather than the code. These results are not cached.
+_EXECUTION_FAILURES = (
+    "Error: Julia code execution timed out",
+    "Error running Julia:",
+    "Julia worker exited unexpectedly",
+)
+
+
+def run_code(
+    code: str,
+    project_dir: str | None = None,
+    use_cache: bool = True,
+    cancel_event: Optional[threading.Event] = None,
+    working_dir: str | None = None,
+) -> dict:
+    """
+    Run Julia code and return a result dictionary with the output and error message.
+
+    Results are cached on the normalized code, the hash of the Julia environment and
+    the state of the files in the working directory, so resubmitting the same code
+    returns the previous result without running Julia, unless a file has changed in
+    between. Working directories with too many files to check are not cached.
+
+    Args:
+        cancel_event (Optional[threading.Event]): Stops the code run when set, f.ex. when
+            the linter has already found a syntax error in the code. A run on a warm
+            worker is only stopped before it starts.
+        working_dir (str | None): Directory the code runs in, f.ex. the working directory
+            of the session. The project directory if None.
+
+    Raises:
+        JuliaProcessCancelled: If the run was stopped by the cancel event.
+    """
+    if project_dir is None:
+        project_dir = os.getcwd()
+
+    # Taken before the run, since the code may change the files itself. None if the
+    # working directory has too many files to check, and then the result is not cached.
+    directory_state = (
+        get_directory_state(working_dir or project_dir) if use_cache else None
+    )
+    use_cache = directory_state is not None
+    cache_key = make_cache_key(code, project_dir, directory_state=directory_state)
+    if use_cache:
+        result = code_result_cache.get(cache_key)
+        if result is not None:
+            result["cached"] = True
+            return result
+
+    result = _run_code(code, project_dir, cancel_event, working_dir)
+    result["cached"] = False
+
+    is_execution_failure = any(
+        failure in (result["error_message"] or "") for failure in _EXECUTION_FAILURES
+    )
+    if use_cache and not is_execution_failure:
+        code_result_cache.put(cache_key, result)
+    return result
+
+
+def _run_code(
+    code: str,
+    project_dir: str,
+    cancel_event: Optional[threading.Event],
+    working_dir: str | None = None,
+) -> dict:
     start_time = time.time()
-    stdout, stderr = run_code_string_direct(code=code)
+    stdout, stderr = run_code_string_pooled(
+        code=code,
+        project_dir=project_dir,
+        cancel_event=cancel_event,
+        working_dir=working_dir,
+    )
     end_time = time.time()
 
     if stderr:
@@ -0,0 +1,109 @@
+# Resident linter used by `judigpt.julia.julia_lint_server`.
+#
+# Building the SymbolServer store for the project is by far the most expensive part
+# of linting, so it is done once at startup. Afterwards each request only parses the
+# code buffer and runs the StaticLint checks on it.
+#
+# Request:
+#   LINT
+#   <path to file containing the code>
+# Response:
+#   JUDIGPT_LINT DIAGNOSTIC <severity>\t<start line>\t<start char>\t<end line>\t<end char>\t<code>\t<message>
+#   ...
+#   JUDIGPT_LINT DONE
+#
+# The code of a diagnostic is the code reported by LanguageServer, if any. If the Julia
+# parser cannot parse the file, so that running it fails as well, an extra diagnostic
+# with the code `ParseError` and the message of the parser is sent.
+
+const PROTOCOL_PREFIX = "JUDIGPT_LINT"
+const PARSE_ERROR_CODE = "ParseError"
+
+using LanguageServer, StaticLint, SymbolServer;
+
+function send_message(message::AbstractString)
+    println(stdout, PROTOCOL_PREFIX, " ", message)
+    flush(stdout)
+end
+
+path = abspath(ARGS[1])
+
+s = LanguageServerInstance(Pipe(), devnull, path)
+_, symbols = SymbolServer.getstore(s.symbol_server, path)
+s.global_env.symbols = symbols
+s.global_env.extended_methods = SymbolServer.collect_extended_methods(s.global_env.symbols)
+s.global_env.project_deps = collect(keys(s.global_env.symbols))
+
+function send_diagnostic(severity, start_line, start_char, end_line, end_char, code, message)
+    message = replace(message, r"[\t\r\n]+" => " ")
+    send_message("DIAGNOSTIC " * join([severity, start_line, start_char, end_line, end_char, code, message], "\t"))
+end
+
+# The first error of the Julia parser in the file, as (line, message), or nothing
+function parse_error(root_file::String)
+    ex = Meta.parseall(read(root_file, String); filename=root_file)
+    line = 1
+    for arg in ex.args
+        if arg isa LineNumberNode
+            line = arg.line
+        elseif Meta.isexpr(arg, (:error, :incomplete))
+            detail = arg.args[1]
+            return line, detail isa AbstractString ? detail : sprint(showerror, detail)
+        end
+    end
+    return nothing
+end
+
+function lint_file(root_file::String)
+    # Drop the documents from the previous request, the symbol store is kept
+    for uri in collect(LanguageServer.getdocuments_key(s))
+        LanguageServer.deletedocument!(s, uri)
+    end
+
+    f = StaticLint.loadfile(s, root_file)
+    StaticLint.semantic_pass(LanguageServer.getroot(f))
+
+    for doc in LanguageServer.getdocuments_value(s)
+        StaticLint.check_all(LanguageServer.getcst(doc), s.lint_options, LanguageServer.getenv(doc, s))
+        LanguageServer.mark_errors(doc, doc.diagnostics)
+
+        for diag in doc.diagnostics
+            range = diag.range
+            severity_code = something(diag.severity, 2)
+            severity_str = ["Error", "Warning", "Information", "Hint"][severity_code]
+            code = diag.code === nothing || diag.code === missing ? "" : string(diag.code)
+            send_diagnostic(
+                severity_str,
+                range.start.line + 1,
+                range.start.character + 1,
+                range.stop.line + 1,
+                range.stop.character + 1,
+                code,
+                diag.message,
+            )
+        end
+    end
+
+    failure = parse_error(root_file)
+    if failure !== nothing
+        line, message = failure
+        send_diagnostic("Error", line, 1, line, 1, PARSE_ERROR_CODE, message)
+    end
+end
+
+send_message("READY")
+
+while !eof(stdin)
+    command = strip(readline(stdin))
+    if command == "LINT"
+        root_file = abspath(readline(stdin))
+        try
+            lint_file(root_file)
+            send_message("DONE")
+        catch e
+            send_message("FAILED " * replace(sprint(showerror, e), r"[\r\n]+" => " "))
+        end
+    elseif command == "EXIT"
+        break
+    end
+end
@@ -0,0 +1,271 @@
+"""
+Resident Julia linter.
+
+`julia_lint_script.jl` builds a new LanguageServer instance and SymbolServer store
+for every call, which rarely finishes within the lint timeout. The server in this
+module runs `julia_lint_server.jl` once, keeps the symbol store in memory, and lints
+new code buffers on request.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from judigpt.configuration import (
+    JULIA_LINT_RETRY_BACKOFF,
+    JULIA_LINT_RETRY_MAX_BACKOFF,
+    JULIA_LINT_TIMEOUT,
+    PROJECT_ROOT,
+)
+from judigpt.julia.julia_process import (
+    JuliaProcessError,
+    JuliaProcessTimeout,
+    PersistentJuliaProcess,
+)
+from judigpt.julia.result_cache import TEMP_FILE_PREFIX
+from judigpt.julia.sysimage import julia_command
+
+LINT_SERVER_SCRIPT = str(PROJECT_ROOT / "julia" / "julia_lint_server.jl")
+PROTOCOL_PREFIX = "JUDIGPT_LINT"
+READY_WAIT = 0.1  # Seconds a lint call waits for a starting server before skipping
+# Code of the diagnostic sent when Julia cannot parse the code
+PARSE_ERROR_CODE = "ParseError"
+
+
+class LintServerNotReady(JuliaProcessTimeout):
+    """Raised when the lint server is still building its symbol store."""
+
+
+@dataclass
+class LintDiagnostic:
+    """A single issue reported by the linter. Line and character numbers are 1-based."""
+
+    severity: str
+    start_line: int
+    start_char: int
+    end_line: int
+    end_char: int
+    message: str
+    source_line: str = ""
+    code: str = ""  # The diagnostic code, f.ex. PARSE_ERROR_CODE
+
+    @property
+    def is_error(self) -> bool:
+        return self.severity == "Error"
+
+    @property
+    def is_syntax_error(self) -> bool:
+        """True if the code could not be parsed, meaning running it will fail as well."""
+        return self.code == PARSE_ERROR_CODE
+
+    def format(self) -> str:
+        return (
+            f"{self.severity}: Line {self.start_line}:{self.start_char} to "
+            f"{self.end_line}:{self.end_char} - {self.message}\n"
+            f"- Full line content: {self.source_line}\n"
+        )
+
+
+def format_diagnostics(diagnostics: List[LintDiagnostic]) -> str:
+    """Format diagnostics the same way as `julia_lint_script.jl` prints them."""
+    return "\n".join(diagnostic.format() for diagnostic in diagnostics)
+
+
+def _parse_diagnostic(message: str, code_lines: List[str]) -> LintDiagnostic:
+    severity, start_line, start_char, end_line, end_char, code, text = message.split(
+        "\t", maxsplit=6
+    )
+    line_index = int(start_line) - 1
+    return LintDiagnostic(
+        severity=severity,
+        start_line=int(start_line),
+        start_char=int(start_char),
+        end_line=int(end_line),
+        end_char=int(end_char),
+        message=text,
+        source_line=code_lines[line_index] if 0 <= line_index < len(code_lines) else "",
+        code=code,
+    )
+
+
+class JuliaLintServer:
+    """
+    A long-running linter for one Julia project.
+
+    The server is started in the background. Until it has built its symbol store,
+    `lint` raises `LintServerNotReady` instead of blocking the caller. If the server
+    fails to start or dies before it is ready, it is started again once the retry
+    backoff has passed.
+
+    Args:
+        project_dir (str): The Julia project whose environment is used for linting.
+    """
+
+    def __init__(self, project_dir: str):
+        self.project_dir = project_dir
+        self.startup_error: Optional[str] = None
+        self._startup_failures = 0  # Failed starts in a row
+        self._retry_after = 0.0  # time.monotonic() before which no start is tried
+        self._process: Optional[PersistentJuliaProcess] = None
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """False if the server failed to start and the retry backoff has not passed."""
+        return time.monotonic() >= self._retry_after
+
+    def _record_startup_failure(self, error: str) -> None:
+        self.startup_error = error
+        self._startup_failures += 1
+        backoff = min(
+            JULIA_LINT_RETRY_BACKOFF * 2 ** (self._startup_failures - 1),
+            JULIA_LINT_RETRY_MAX_BACKOFF,
+        )
+        self._retry_after = time.monotonic() + backoff
+
+    def start(self) -> None:
+        """Start the server process if it is not already running."""
+        if self._process is not None and self._process.is_alive():
+            return
+        self._ready = False
+        try:
+            self._process = PersistentJuliaProcess(
+                cmd=[
+                    *julia_command(self.project_dir),
+                    LINT_SERVER_SCRIPT,
+                    self.project_dir,
+                ],
+                cwd=self.project_dir,
+                protocol_prefix=PROTOCOL_PREFIX,
+            )
+        except OSError as e:
+            self._record_startup_failure(str(e))
+            raise JuliaProcessError(f"Could not start Julia lint server: {e}") from e
+
+    def warm_up(self) -> None:
+        """Start the server in the background so that it is ready for the first lint."""
+        try:
+            self.start()
+        except JuliaProcessError:
+            pass
+
+    def _wait_until_ready(self) -> None:
+        assert self._process is not None
+        if self._ready:
+            return
+        try:
+            # The server sends READY once its symbol store is built, which can take
+            # minutes. Until then the caller skips linting instead of waiting.
+            message = self._process.wait_for_message(timeout=READY_WAIT)
+        except JuliaProcessTimeout:
+            raise LintServerNotReady(
+                "The Julia lint server is still loading the symbol store."
+            )
+        except JuliaProcessError as e:
+            self._record_startup_failure(str(e))
+            self.stop()
+            raise
+        if message != "READY":
+            self._record_startup_failure(f"Unexpected message: {message}")
+            self.stop()
+            raise JuliaProcessError(f"Unexpected message from lint server: {message}")
+        self._ready = True
+        self.startup_error = None
+        self._startup_failures = 0
+
+    def lint(
+        self, code: str, timeout: float = JULIA_LINT_TIMEOUT
+    ) -> List[LintDiagnostic]:
+        """
+        Lint a code buffer.
+
+        Returns:
+            List[LintDiagnostic]: The issues found in the code.
+
+        Raises:
+            LintServerNotReady: If the server is still building its symbol store.
+            JuliaProcessTimeout: If linting did not finish within the timeout. The server is restarted on the next call.
+            JuliaProcessError: If the server could not be started or failed to lint the code,
+                or if it failed to start before and the retry backoff has not passed.
+        """
+        if not self.available:
+            raise JuliaProcessError(
+                f"Julia lint server unavailable: {self.startup_error}"
+            )
+
+        with self._lock:
+            self.start()
+            assert self._process is not None
+            self._wait_until_ready()
+
+            with tempfile.NamedTemporaryFile(
+                mode="w",
+                prefix=TEMP_FILE_PREFIX,
+                suffix=".jl",
+                delete=False,
+                encoding="utf-8",
+                dir=self.project_dir,
+            ) as temp_file:
+                temp_file.write(code)
+                temp_file_path = temp_file.name
+
+            try:
+                self._process.send(f"LINT\n{temp_file_path}\n".encode("utf-8"))
+                code_lines = code.splitlines()
+                diagnostics = []
+                while True:
+                    try:
+                        message = self._process.wait_for_message(timeout=timeout)
+                    except JuliaProcessTimeout:
+                        self.stop()
+                        raise
+                    kind, _, payload = message.partition(" ")
+                    if kind == "DIAGNOSTIC":
+                        diagnostics.append(_parse_diagnostic(payload, code_lines))
+                    elif kind == "DONE":
+                        return diagnostics
+                    elif kind == "FAILED":
+                        raise JuliaProcessError(f"Linting failed: {payload}")
+            finally:
+                try:
+                    os.unlink(temp_file_path)
+                except OSError:
+                    pass
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate(exit_command=b"EXIT\n")
+        self._process = None
+        self._ready = False
+
+
+_servers: Dict[str, JuliaLintServer] = {}
+_servers_lock = threading.Lock()
+
+
+def get_lint_server(project_dir: Optional[str] = None) -> JuliaLintServer:
+    """Get the process-wide lint server for a Julia project, creating it if needed."""
+    if project_dir is None:
+        project_dir = os.getcwd()
+    project_dir = os.path.abspath(project_dir)
+
+    with _servers_lock:
+        if project_dir not in _servers:
+            _servers[project_dir] = JuliaLintServer(project_dir)
+        return _servers[project_dir]
+
+
+@atexit.register
+def shutdown_lint_servers() -> None:
+    with _servers_lock:
+        servers = list(_servers.values())
+        _servers.clear()
+    for server in servers:
+        server.stop()
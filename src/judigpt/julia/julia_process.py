@@ -0,0 +1,125 @@
+"""
+Long-lived Julia subprocesses that communicate over stdin/stdout.
+
+The Julia side writes protocol messages to stdout as lines starting with a fixed
+prefix (f.ex. `JUDIGPT_WORKER READY`). All other output (package loading, CondaPkg
+messages etc.) is kept in a small log buffer, which is used for error messages.
+"""
+
+from __future__ import annotations
+
+import queue
+import subprocess
+import threading
+from collections import deque
+from typing import List, Optional
+
+
+class JuliaProcessError(RuntimeError):
+    """Raised when a persistent Julia process fails to start or exits unexpectedly."""
+
+
+class JuliaProcessTimeout(TimeoutError):
+    """Raised when a persistent Julia process does not respond in time."""
+
+
+class JuliaProcessCancelled(RuntimeError):
+    """Raised when running Julia code is cancelled before it finishes."""
+
+
+# Seconds between checks of the cancel event while waiting for Julia code to finish
+CANCEL_POLL_INTERVAL = 0.2
+
+
+class PersistentJuliaProcess:
+    """
+    A Julia process started once and reused for many requests.
+
+    Args:
+        cmd (List[str]): The command used to start the Julia process.
+        cwd (str): The working directory of the process.
+        protocol_prefix (str): Prefix used by the Julia script for protocol messages.
+        log_lines (int): Number of non-protocol output lines to keep for error reporting.
+    """
+
+    def __init__(
+        self,
+        cmd: List[str],
+        cwd: str,
+        protocol_prefix: str,
+        log_lines: int = 200,
+    ):
+        self.protocol_prefix = protocol_prefix
+        self.log: deque[str] = deque(maxlen=log_lines)
+        self._messages: queue.Queue[Optional[str]] = queue.Queue()
+
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=cwd,
+        )
+        self._reader = threading.Thread(target=self._read_output, daemon=True)
+        self._reader.start()
+
+    def _read_output(self) -> None:
+        assert self.process.stdout is not None
+        for raw_line in self.process.stdout:
+            line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+            if line.startswith(self.protocol_prefix):
+                self._messages.put(line[len(self.protocol_prefix) :].strip())
+            else:
+                self.log.append(line)
+        self._messages.put(None)  # EOF: the process has exited
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def send(self, data: bytes) -> None:
+        """Write raw bytes to the stdin of the process."""
+        if self.process.stdin is None or not self.is_alive():
+            raise JuliaProcessError(self._exit_message())
+        try:
+            self.process.stdin.write(data)
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise JuliaProcessError(self._exit_message()) from e
+
+    def wait_for_message(self, timeout: Optional[float]) -> str:
+        """
+        Wait for the next protocol message from the process.
+
+        Raises:
+            JuliaProcessTimeout: If no message is received within the timeout.
+            JuliaProcessError: If the process exits before sending a message.
+        """
+        try:
+            message = self._messages.get(timeout=timeout)
+        except queue.Empty:
+            raise JuliaProcessTimeout(
+                f"Julia process did not respond within {timeout} seconds."
+            )
+        if message is None:
+            self.process.wait()
+            raise JuliaProcessError(self._exit_message())
+        return message
+
+    def _exit_message(self) -> str:
+        log = "\n".join(list(self.log)[-20:])
+        return (
+            f"Julia process exited unexpectedly (exit code {self.process.poll()})."
+            + (f"\n\nLast output:\n{log}" if log else "")
+        )
+
+    def terminate(self, exit_command: Optional[bytes] = None) -> None:
+        """Stop the process, politely if an exit command is given, otherwise by killing it."""
+        if self.is_alive() and exit_command is not None:
+            try:
+                self.send(exit_command)
+                self.process.wait(timeout=5)
+            except (JuliaProcessError, subprocess.TimeoutExpired):
+                pass
+        if self.is_alive():
+            self.process.kill()
+            self.process.wait()
@@ -0,0 +1,20 @@
+# Workload run by PackageCompiler when building the JUDIGPT sysimage.
+# See julia_build_sysimage.jl.
+
+using JUDI, CSTParser, StaticLint, SymbolServer, LanguageServer
+
+for example in filter(!isempty, split(get(ENV, "JUDIGPT_SYSIMAGE_EXAMPLES", ""), "\n"))
+    println("Running example: $example")
+    code = read(example, String)
+
+    # Exercise the parser used by the linter and the function documentation lookup
+    CSTParser.parse(code, true)
+
+    try
+        cd(dirname(example)) do
+            include_string(Module(:JudigptSysimageExample), code, example)
+        end
+    catch e
+        @warn "Example failed while building the sysimage" example exception = e
+    end
+end
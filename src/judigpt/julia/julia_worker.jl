@@ -0,0 +1,75 @@
+# Persistent Julia worker used by `judigpt.julia.julia_worker_pool`.
+#
+# JUDI is loaded once at startup. Afterwards the worker reads requests from stdin
+# and runs each code snippet in a fresh module, so consecutive runs do not share
+# variables. Protocol lines written to stdout are prefixed with PROTOCOL_PREFIX,
+# everything else is treated as log output by the Python side.
+#
+# Request:
+#   RUN
+#   <path to file receiving stdout>
+#   <path to file receiving stderr>
+#   <working directory of the code>
+#   <number of bytes of code>
+#   <code>
+# Response:
+#   JUDIGPT_WORKER DONE <ok|error>
+
+const PROTOCOL_PREFIX = "JUDIGPT_WORKER"
+
+using JUDI;
+
+function send_message(message::AbstractString)
+    println(stdout, PROTOCOL_PREFIX, " ", message)
+    flush(stdout)
+end
+
+function run_request(
+    code::String,
+    stdout_path::String,
+    stderr_path::String,
+    code_directory::String,
+)
+    status = "ok"
+    working_directory = pwd()
+    open(stdout_path, "w") do out
+        open(stderr_path, "w") do err
+            redirect_stdout(out) do
+                redirect_stderr(err) do
+                    try
+                        cd(code_directory)
+                        include_string(Module(:JudigptSandbox), code, "none")
+                    catch e
+                        status = "error"
+                        # Report the error the same way `julia -e` does
+                        exception = e isa LoadError ? e.error : e
+                        Base.display_error(stderr, exception, catch_backtrace())
+                    finally
+                        flush(stdout)
+                        flush(stderr)
+                        cd(working_directory)
+                    end
+                end
+            end
+        end
+    end
+    return status
+end
+
+send_message("READY")
+
+while !eof(stdin)
+    command = strip(readline(stdin))
+    if command == "RUN"
+        stdout_path = readline(stdin)
+        stderr_path = readline(stdin)
+        code_directory = readline(stdin)
+        nbytes = parse(Int, readline(stdin))
+        code = String(read(stdin, nbytes))
+        send_message(
+            "DONE " * run_request(code, stdout_path, stderr_path, code_directory),
+        )
+    elseif command == "EXIT"
+        break
+    end
+end
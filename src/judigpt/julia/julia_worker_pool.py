@@ -0,0 +1,296 @@
+"""
+Pool of warm Julia workers for running code.
+
+Starting Julia and loading JUDI takes much longer than running most of the code the
+agent generates. The workers in this pool run `julia_worker.jl`, which loads JUDI once
+and then executes code snippets sent over stdin. A worker is recycled after it crashes,
+times out or has run `JULIA_WORKER_MAX_EXECUTIONS` snippets. If a worker fails to start,
+code is run in new Julia processes until the next start is tried, after a backoff that
+doubles with each failure in a row.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+from judigpt.configuration import (
+    JULIA_WORKER_MAX_EXECUTIONS,
+    JULIA_WORKER_POOL_SIZE,
+    JULIA_WORKER_RETRY_BACKOFF,
+    JULIA_WORKER_RETRY_MAX_BACKOFF,
+    JULIA_WORKER_STARTUP_TIMEOUT,
+    PROJECT_ROOT,
+)
+from judigpt.julia.julia_process import (
+    JuliaProcessCancelled,
+    JuliaProcessError,
+    JuliaProcessTimeout,
+    PersistentJuliaProcess,
+)
+from judigpt.julia.sysimage import julia_command
+
+WORKER_SCRIPT = str(PROJECT_ROOT / "julia" / "julia_worker.jl")
+PROTOCOL_PREFIX = "JUDIGPT_WORKER"
+
+
+class JuliaWorker:
+    """A single warm Julia process with JUDI loaded."""
+
+    def __init__(self, project_dir: str, startup_timeout: float):
+        self.project_dir = project_dir
+        self.n_executions = 0
+        self._process = PersistentJuliaProcess(
+            cmd=[*julia_command(project_dir), WORKER_SCRIPT],
+            cwd=project_dir,
+            protocol_prefix=PROTOCOL_PREFIX,
+        )
+        try:
+            message = self._process.wait_for_message(timeout=startup_timeout)
+        except (JuliaProcessError, JuliaProcessTimeout):
+            self.terminate()
+            raise
+        if message != "READY":
+            self.terminate()
+            raise JuliaProcessError(f"Unexpected message from Julia worker: {message}")
+
+    def is_alive(self) -> bool:
+        return self._process.is_alive()
+
+    def run(
+        self,
+        code: str,
+        timeout: float,
+        working_dir: Optional[str] = None,
+    ) -> tuple[str, str]:
+        """
+        Run code in the worker.
+
+        Args:
+            working_dir (Optional[str]): Directory the code runs in. The project directory if None.
+
+        Returns:
+            tuple[str, str]: The stdout and stderr produced by the code.
+
+        Raises:
+            JuliaProcessTimeout: If the code did not finish within the timeout. The worker is killed.
+            JuliaProcessError: If the worker could not be reached.
+        """
+        self.n_executions += 1
+
+        stdout_fd, stdout_path = tempfile.mkstemp(suffix=".out")
+        stderr_fd, stderr_path = tempfile.mkstemp(suffix=".err")
+        os.close(stdout_fd)
+        os.close(stderr_fd)
+
+        try:
+            code_bytes = code.encode("utf-8")
+            self._process.send(
+                b"RUN\n"
+                + f"{stdout_path}\n{stderr_path}\n{working_dir or self.project_dir}\n".encode(
+                    "utf-8"
+                )
+                + f"{len(code_bytes)}\n".encode("utf-8")
+                + code_bytes
+            )
+
+            exit_message = ""
+            try:
+                self._process.wait_for_message(timeout=timeout)
+            except JuliaProcessTimeout:
+                self.terminate()
+                raise
+            except JuliaProcessError:
+                # The code itself may have stopped the process, f.ex. by calling `exit()`
+                if self._process.process.returncode != 0:
+                    exit_message = (
+                        "\nJulia worker exited unexpectedly "
+                        f"(exit code {self._process.process.returncode})."
+                    )
+
+            return _read_text(stdout_path), _read_text(stderr_path) + exit_message
+        finally:
+            for path in (stdout_path, stderr_path):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def terminate(self) -> None:
+        self._process.terminate(exit_command=b"EXIT\n")
+
+
+def _read_text(path: str) -> str:
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+class JuliaWorkerPool:
+    """
+    A bounded pool of warm Julia workers for one Julia project.
+
+    Args:
+        project_dir (str): The Julia project the workers activate.
+        size (int): The maximum number of workers.
+        max_executions (int): Number of runs before a worker is replaced.
+        startup_timeout (float): Seconds allowed for a worker to start and load JUDI.
+    """
+
+    def __init__(
+        self,
+        project_dir: str,
+        size: int = JULIA_WORKER_POOL_SIZE,
+        max_executions: int = JULIA_WORKER_MAX_EXECUTIONS,
+        startup_timeout: float = JULIA_WORKER_STARTUP_TIMEOUT,
+    ):
+        self.project_dir = project_dir
+        self.size = size
+        self.max_executions = max_executions
+        self.startup_timeout = startup_timeout
+
+        self.startup_error: Optional[str] = None
+        self._startup_failures = 0  # Failed starts in a row
+        self._retry_after = 0.0  # time.monotonic() before which no start is tried
+        self._idle: List[JuliaWorker] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @property
+    def available(self) -> bool:
+        """False if the pool is disabled, or a worker failed to start and the retry backoff has not passed."""
+        return self.size > 0 and time.monotonic() >= self._retry_after
+
+    def _start_worker(self, record_failure: bool = True) -> JuliaWorker:
+        """
+        Args:
+            record_failure (bool): Whether a failed start makes the pool unavailable
+                until the retry backoff has passed.
+        """
+        try:
+            worker = JuliaWorker(self.project_dir, startup_timeout=self.startup_timeout)
+        except (JuliaProcessError, JuliaProcessTimeout, OSError) as e:
+            if record_failure:
+                with self._lock:
+                    self.startup_error = str(e)
+                    self._startup_failures += 1
+                    backoff = min(
+                        JULIA_WORKER_RETRY_BACKOFF * 2 ** (self._startup_failures - 1),
+                        JULIA_WORKER_RETRY_MAX_BACKOFF,
+                    )
+                    self._retry_after = time.monotonic() + backoff
+            raise JuliaProcessError(f"Could not start Julia worker: {e}") from e
+
+        with self._lock:
+            self.startup_error = None
+            self._startup_failures = 0
+        return worker
+
+    def _checkout(self) -> JuliaWorker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.is_alive():
+                    return worker
+        return self._start_worker()
+
+    def _checkin(self, worker: JuliaWorker) -> None:
+        if not worker.is_alive():
+            return
+        if worker.n_executions >= self.max_executions:
+            worker.terminate()
+            return
+        with self._lock:
+            self._idle.append(worker)
+
+    def run(
+        self,
+        code: str,
+        timeout: float,
+        cancel_event: Optional[threading.Event] = None,
+        working_dir: Optional[str] = None,
+    ) -> tuple[str, str]:
+        """
+        Run code on an idle worker, starting a new worker if none is idle. The workers
+        are shared by all sessions, which each run their code in their own directory.
+
+        Args:
+            cancel_event (Optional[threading.Event]): Cancels the run if set before the code
+                is sent to a worker. A run that has started is not cancelled, since killing
+                the worker would throw away its loaded packages, and the code fails quickly
+                anyway when it cannot be parsed.
+            working_dir (Optional[str]): Directory the code runs in. The project directory if None.
+
+        Returns:
+            tuple[str, str]: The stdout and stderr produced by the code.
+
+        Raises:
+            JuliaProcessCancelled: If the cancel event was set before the code was sent.
+        """
+        if not self.available:
+            raise JuliaProcessError(
+                f"Julia worker pool unavailable: {self.startup_error}"
+            )
+
+        with self._slots:
+            if cancel_event is not None and cancel_event.is_set():
+                raise JuliaProcessCancelled("Julia code execution was cancelled.")
+            worker = self._checkout()
+            try:
+                return worker.run(code, timeout=timeout, working_dir=working_dir)
+            finally:
+                self._checkin(worker)
+
+    def warm_up(self) -> None:
+        """Start all workers in the background so that the first run does not pay the startup cost."""
+
+        def start():
+            if not self._slots.acquire(blocking=False):
+                return
+            try:
+                # A failed warm-up is retried by the first run, which records the failure
+                self._checkin(self._start_worker(record_failure=False))
+            except JuliaProcessError:
+                pass
+            finally:
+                self._slots.release()
+
+        for _ in range(self.size - len(self._idle)):
+            threading.Thread(target=start, daemon=True).start()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.terminate()
+
+
+_pools: Dict[str, JuliaWorkerPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_worker_pool(project_dir: Optional[str] = None) -> JuliaWorkerPool:
+    """Get the process-wide worker pool for a Julia project, creating it if needed."""
+    if project_dir is None:
+        project_dir = os.getcwd()
+    project_dir = os.path.abspath(project_dir)
+
+    with _pools_lock:
+        if project_dir not in _pools:
+            _pools[project_dir] = JuliaWorkerPool(project_dir)
+        return _pools[project_dir]
+
+
+@atexit.register
+def shutdown_worker_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
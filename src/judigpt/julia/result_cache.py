@@ -0,0 +1,264 @@
+"""
+Caches for the results of running and linting Julia code.
+
+The agents often resubmit the same code. Results are keyed on the code together with
+a hash of the Julia environment (Project.toml and Manifest.toml), so that updating
+the packages invalidates the cached results. The results of code runs are also keyed
+on the state of the files in the working directory, since the code may read them.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from judigpt.configuration import (
+    JULIA_LINT_CACHE_SIZE,
+    JULIA_RESULT_CACHE_MAX_FILES,
+    JULIA_RESULT_CACHE_SIZE,
+    JULIA_RESULT_CACHE_TTL,
+    PROJECT_ROOT,
+)
+
+ENVIRONMENT_FILES = ["Project.toml", "Manifest.toml"]
+# Prefix of the temporary files written to the project, hidden from get_directory_state
+TEMP_FILE_PREFIX = ".judigpt_"
+
+# The latest file signature and hash of each project, so old signatures are dropped
+_environment_hashes: Dict[str, tuple[tuple, str]] = {}
+_environment_hashes_lock = threading.Lock()
+
+
+def get_environment_hash(project_dir: str) -> str:
+    """
+    Hash of the Project.toml and Manifest.toml of a Julia project.
+    The files are only re-read when their modification times change.
+    """
+    paths = [os.path.join(project_dir, name) for name in ENVIRONMENT_FILES]
+    signature = tuple(
+        (path, os.path.getmtime(path) if os.path.exists(path) else None)
+        for path in paths
+    )
+    with _environment_hashes_lock:
+        cached = _environment_hashes.get(project_dir)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+    sha = hashlib.sha256()
+    for path, mtime in signature:
+        sha.update(path.encode("utf-8"))
+        if mtime is not None:
+            with open(path, "rb") as f:
+                sha.update(f.read())
+    with _environment_hashes_lock:
+        _environment_hashes[project_dir] = (signature, sha.hexdigest())
+    return sha.hexdigest()
+
+
+def get_directory_state(
+    directory: str, max_files: int = JULIA_RESULT_CACHE_MAX_FILES
+) -> Optional[str]:
+    """
+    Hash of the paths, sizes and modification times of the files in a directory tree.
+    Hidden files and directories, like the temporary files of the linter, `__pycache__`
+    and the judigpt package with its caches are skipped.
+
+    Returns:
+        Optional[str]: The hash, or None if the tree has more than `max_files` files.
+    """
+    directory = os.path.abspath(directory)
+    sha = hashlib.sha256()
+    sha.update(directory.encode("utf-8"))
+    n_files = 0
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(
+            name
+            for name in dirs
+            if not name.startswith(".")
+            and name != "__pycache__"
+            and os.path.join(root, name) != str(PROJECT_ROOT)
+        )
+        files = sorted(name for name in files if not name.startswith("."))
+        n_files += len(files)
+        if n_files > max_files:
+            return None
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            sha.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode("utf-8"))
+    return sha.hexdigest()
+
+
+def normalize_code(code: str) -> str:
+    """
+    Remove differences in the code that do not change its behaviour, like trailing
+    whitespace. Leading lines are kept, since they change the line numbers of errors.
+    """
+    lines = code.replace("\r\n", "\n").rstrip().split("\n")
+    return "\n".join(line.rstrip() for line in lines)
+
+
+def make_cache_key(
+    code: str,
+    project_dir: str,
+    normalize: bool = True,
+    directory_state: Optional[str] = None,
+) -> str:
+    """
+    Key for caching results of the code in the Julia project.
+
+    Args:
+        normalize (bool): Whether to normalize the code first. Disable this when the
+            result refers to line numbers in the code, like linting diagnostics.
+        directory_state (Optional[str]): The `get_directory_state` of the directory the
+            code runs in, since the code may read files in it.
+    """
+    sha = hashlib.sha256()
+    sha.update(get_environment_hash(project_dir).encode("utf-8"))
+    if directory_state is not None:
+        sha.update(directory_state.encode("utf-8"))
+    sha.update((normalize_code(code) if normalize else code).encode("utf-8"))
+    return sha.hexdigest()
+
+
+class ResultCache:
+    """
+    In-memory LRU cache with a time-to-live for each entry.
+
+    Args:
+        max_entries (int): Maximum number of entries. The least recently used entry is evicted first.
+        ttl (float): Seconds an entry is valid for.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = JULIA_RESULT_CACHE_SIZE,
+        ttl: float = JULIA_RESULT_CACHE_TTL,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, key: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses"
+
+
+class DiskCache:
+    """
+    On-disk cache storing each JSON-serializable entry as a file in a directory.
+
+    Reading an entry updates its modification time, and the entries with the oldest
+    modification times are evicted when there are more than `max_entries`.
+
+    Args:
+        cache_dir (str): Directory for the cache files.
+        max_entries (int): Maximum number of entries kept on disk.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+            # Write to a temporary file first, so that readers never see partial entries
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(temp_path, self._path(key))
+
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = [
+            entry
+            for entry in os.scandir(self.cache_dir)
+            if entry.is_file() and entry.name.endswith(".json")
+        ]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[: len(entries) - self.max_entries]:
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            if not os.path.isdir(self.cache_dir):
+                return
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".json"):
+                    os.unlink(entry.path)
+
+    def stats(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses"
+
+
+code_result_cache = ResultCache()
+lint_result_cache = DiskCache(
+    cache_dir=str(PROJECT_ROOT / "julia" / "cache" / "lint"),
+    max_entries=JULIA_LINT_CACHE_SIZE,
+)
@@ -0,0 +1,178 @@
+"""
+Custom Julia sysimage with JUDI and the linting packages precompiled.
+
+Most of the startup time of the Julia subprocesses is spent loading and compiling
+packages. When the sysimage built by `build_sysimage` exists, every Julia process
+started by JUDIGPT uses it automatically (see `julia_command`).
+
+Build the sysimage and compare startup times by running
+
+```bash
+python -m judigpt.julia.sysimage build
+python -m judigpt.julia.sysimage benchmark
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+from judigpt.configuration import PROJECT_ROOT, USE_JULIA_SYSIMAGE
+
+_SYSIMAGE_EXTENSION = {"darwin": "dylib", "win32": "dll"}.get(sys.platform, "so")
+
+SYSIMAGE_PATH = str(
+    PROJECT_ROOT / "julia" / "sysimage" / f"judigpt_sysimage.{_SYSIMAGE_EXTENSION}"
+)
+
+# Example scripts run while building the sysimage. These run without external data.
+DEFAULT_WARMUP_EXAMPLES = [
+    str(PROJECT_ROOT / "rag" / "judi" / "examples" / "scripts" / name)
+    for name in ["modeling_basic_2D.jl", "modeling_wavefields_2D.jl"]
+]
+
+
+def get_sysimage_path(project_dir: Optional[str] = None) -> Optional[str]:
+    """
+    Get the path to the sysimage if it should be used.
+
+    The sysimage is skipped if it is older than the Manifest.toml of the project, since
+    it then may contain other package versions than the ones installed.
+    """
+    if not USE_JULIA_SYSIMAGE or not os.path.exists(SYSIMAGE_PATH):
+        return None
+
+    if project_dir is not None:
+        manifest_path = os.path.join(project_dir, "Manifest.toml")
+        if os.path.exists(manifest_path) and os.path.getmtime(
+            manifest_path
+        ) > os.path.getmtime(SYSIMAGE_PATH):
+            return None
+
+    return SYSIMAGE_PATH
+
+
+def julia_command(project_dir: Optional[str] = None) -> List[str]:
+    """
+    The command for starting Julia, with the project activated and the sysimage selected when available.
+
+    Args:
+        project_dir (Optional[str]): The Julia project to activate. If None, no project is activated.
+    """
+    cmd = ["julia"]
+    if project_dir is not None:
+        cmd.append(f"--project={project_dir}")
+
+    sysimage_path = get_sysimage_path(project_dir)
+    if sysimage_path is not None:
+        cmd.append(f"--sysimage={sysimage_path}")
+    return cmd
+
+
+def build_sysimage(
+    project_dir: Optional[str] = None, examples: Optional[List[str]] = None
+) -> None:
+    """
+    Build the sysimage using PackageCompiler.
+
+    Args:
+        project_dir (Optional[str]): The Julia project containing JUDI. Defaults to the current working directory.
+        examples (Optional[List[str]]): Julia scripts run to warm up the sysimage. Defaults to `DEFAULT_WARMUP_EXAMPLES`.
+    """
+    if project_dir is None:
+        project_dir = os.getcwd()
+    if examples is None:
+        examples = DEFAULT_WARMUP_EXAMPLES
+
+    subprocess.run(
+        [
+            "julia",
+            f"--project={project_dir}",
+            str(PROJECT_ROOT / "julia" / "julia_build_sysimage.jl"),
+            SYSIMAGE_PATH,
+            *examples,
+        ],
+        cwd=project_dir,
+        check=True,
+    )
+
+
+def _time_startup(cmd: List[str], project_dir: str, n_runs: int) -> float:
+    timings = []
+    for _ in range(n_runs):
+        start_time = time.time()
+        subprocess.run(
+            cmd + ["-e", "using JUDI"],
+            cwd=project_dir,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        timings.append(time.time() - start_time)
+    return min(timings)
+
+
+def benchmark_startup(project_dir: Optional[str] = None, n_runs: int = 3) -> dict:
+    """
+    Measure the cold-start time of `julia -e "using JUDI"` with and without the sysimage.
+
+    Returns:
+        dict: The best startup time in seconds for each variant.
+    """
+    from judigpt.cli import colorscheme, print_to_console
+
+    if project_dir is None:
+        project_dir = os.getcwd()
+
+    results = {
+        "default": _time_startup(
+            ["julia", f"--project={project_dir}"], project_dir, n_runs
+        )
+    }
+    sysimage_path = get_sysimage_path(project_dir)
+    if sysimage_path is not None:
+        results["sysimage"] = _time_startup(
+            julia_command(project_dir), project_dir, n_runs
+        )
+
+    text = f"Startup time of `using JUDI` (best of {n_runs}):\n\n"
+    text += f"- Without sysimage: {results['default']:.2f} s\n"
+    if "sysimage" in results:
+        text += f"- With sysimage: {results['sysimage']:.2f} s "
+        text += f"({results['default'] / results['sysimage']:.1f}x faster)\n"
+    else:
+        text += "- With sysimage: not available. Build it with `python -m judigpt.julia.sysimage build`.\n"
+    print_to_console(
+        text=text, title="Julia Startup Benchmark", border_style=colorscheme.message
+    )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("command", choices=["build", "benchmark"])
+    parser.add_argument(
+        "--project",
+        default=None,
+        help="The Julia project directory. Defaults to the current working directory.",
+    )
+    parser.add_argument(
+        "--examples",
+        nargs="*",
+        default=None,
+        help="Julia scripts run to warm up the sysimage.",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=3, help="Number of runs for the benchmark."
+    )
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_sysimage(project_dir=args.project, examples=args.examples)
+    else:
+        benchmark_startup(project_dir=args.project, n_runs=args.runs)
@@ -1,3 +1,3 @@
-from judigpt.nodes.check_code import check_code
+from judigpt.nodes.check_code import acheck_code, check_code
 
-__all__ = ["check_code"]
+__all__ = ["acheck_code", "check_code"]
@@ -1,11 +1,28 @@
 from __future__ import annotations
 
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
 from langchain_core.messages import HumanMessage
 from langchain_core.runnables import RunnableConfig
 
 from judigpt.cli import colorscheme, print_to_console
-from judigpt.configuration import BaseConfiguration, cli_mode
+from judigpt.configuration import (
+    CANCEL_RUN_ON_SYNTAX_ERROR,
+    BaseConfiguration,
+    cli_mode,
+)
 from judigpt.julia import get_error_message, get_linting_result, run_code
+from judigpt.julia.julia_lint_server import LintDiagnostic
+from judigpt.julia.julia_process import JuliaProcessCancelled
+from judigpt.julia.result_cache import code_result_cache
+from judigpt.session import (
+    restore_session_working_directory,
+    session_working_directory,
+)
 from judigpt.state import State
 from judigpt.utils import (
     add_julia_context,
@@ -15,8 +32,15 @@ from judigpt.utils import (
 )
 
 
-def _run_linter(code: str, print_code: bool = True) -> tuple[str, bool]:
+def _run_linter(
+    code: str,
+    print_code: bool = True,
+    syntax_error_event: Optional[threading.Event] = None,
+) -> tuple[str, bool]:
     """
+    Args:
+        syntax_error_event (Optional[threading.Event]): Set if the linter finds a syntax error.
+
     Returns:
         str: String containing the linting issues found in the code. Empty if no issues found.
         bool: True if issues were found, False otherwise.
@@ -37,7 +61,13 @@ def _run_linter(code: str, print_code: bool = True) -> tuple[str, bool]:
             border_style=colorscheme.warning,
         )
 
-    linting_result = get_linting_result(code)
+    def on_diagnostics(diagnostics: List[LintDiagnostic]) -> None:
+        if syntax_error_event is not None and any(
+            diagnostic.is_syntax_error for diagnostic in diagnostics
+        ):
+            syntax_error_event.set()
+
+    linting_result = get_linting_result(code, on_diagnostics=on_diagnostics)
     if linting_result:
         linting_message = (
             "## Linter issues found:\n"
@@ -48,8 +78,17 @@ def _run_linter(code: str, print_code: bool = True) -> tuple[str, bool]:
     return "", False
 
 
-def _run_julia_code(code: str, print_code: bool = True) -> tuple[str, bool]:
+def _run_julia_code(
+    code: str,
+    print_code: bool = True,
+    cancel_event: Optional[threading.Event] = None,
+    working_dir: Optional[str] = None,
+) -> tuple[str, bool]:
     """
+    Args:
+        cancel_event (Optional[threading.Event]): Stops running the code when set.
+        working_dir (Optional[str]): Directory the code runs in, f.ex. the working directory of the session.
+
     Returns:
         str: String containing the code running failed. Empty if the code executed successfully.
         bool: True if issues were found, False otherwise.
@@ -68,13 +107,25 @@ def _run_julia_code(code: str, print_code: bool = True) -> tuple[str, bool]:
     # to avoid duplicate titles - the result will be shown with "Code Runner Result" title
 
     # result = run_string(code)
-    result = run_code(code)
+    try:
+        result = run_code(code, cancel_event=cancel_event, working_dir=working_dir)
+    except JuliaProcessCancelled:
+        print_to_console(
+            text="Code run cancelled, since the linter found a syntax error.",
+            title="Code Runner Result",
+            border_style=colorscheme.warning,
+        )
+        return "", False
+
+    cache_message = f"\n\nResult cache: {code_result_cache.stats()}" + (
+        " (returned cached result)" if result.get("cached", False) else ""
+    )
 
     if result.get("error", False):
         julia_error_message = get_error_message(result)
 
         print_to_console(
-            text=f"Code failed!\n\n{julia_error_message}",
+            text=f"Code failed!\n\n{julia_error_message}{cache_message}",
             title="Code Runner Result",
             border_style=colorscheme.error,
         )
@@ -88,7 +139,7 @@ def _run_julia_code(code: str, print_code: bool = True) -> tuple[str, bool]:
 
     # Prepare success message with output
     runtime_msg = f"Code succeeded in {round(result['runtime'], 2)} seconds!"
-    
+
     # Show output if available (filter out empty/whitespace-only output)
     output = result.get("output", "").strip()
     if output:
@@ -100,9 +151,9 @@ def _run_julia_code(code: str, print_code: bool = True) -> tuple[str, bool]:
         success_msg = f"{runtime_msg}\n\nOutput:\n{output_preview}"
     else:
         success_msg = runtime_msg
-    
+
     print_to_console(
-        text=success_msg,
+        text=success_msg + cache_message,
         title="Code Runner Result",
         border_style=colorscheme.success,
     )
@@ -115,6 +166,8 @@ def check_code(
     config: RunnableConfig,
 ):
     configuration = BaseConfiguration.from_runnable_config(config)
+    # The check may be the first node after the thread is resumed from a checkpoint
+    restore_session_working_directory(state.working_directory, config)
 
     code_block = state.code_block
     code = code_block.get_full_code()
@@ -164,23 +217,40 @@ def check_code(
     # Then shorten the code for faster simulations
     code = shorter_simulations(code)
 
-    # Running the linter (with timeout handling)
-    # Note: Linter often times out with JUDI due to package loading time, which is normal
-    try:
-        linting_message, linting_issues_found = _run_linter(code, print_code=False)
-    except Exception as e:
-        # If linter fails completely, just skip it and continue with code execution
-        # This is expected for JUDI code due to slow package loading
-        print_to_console(
-            text=f"Linter check skipped (this is normal for JUDI code due to slow package loading). Continuing with code execution check only.",
-            title="Linter Skipped",
-            border_style=colorscheme.warning,
+    # Run the linter and the code at the same time, as they use separate Julia processes.
+    # A syntax error found by the linter stops the code run, since it would fail anyway.
+    start_time = time.time()
+    syntax_error_event = threading.Event() if CANCEL_RUN_ON_SYNTAX_ERROR else None
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        linter_future = executor.submit(_run_linter, code, False, syntax_error_event)
+        code_future = executor.submit(
+            _run_julia_code,
+            code,
+            False,
+            syntax_error_event,
+            session_working_directory(config),
         )
-        linting_message, linting_issues_found = "", False
 
-    # Running the code
-    code_running_message, code_running_issues_found = _run_julia_code(
-        code, print_code=False
+        # Running the linter (with timeout handling)
+        # Note: Linter often times out with JUDI due to package loading time, which is normal
+        try:
+            linting_message, linting_issues_found = linter_future.result()
+        except Exception as e:
+            # If linter fails completely, just skip it and continue with code execution
+            # This is expected for JUDI code due to slow package loading
+            print_to_console(
+                text=f"Linter check skipped (this is normal for JUDI code due to slow package loading). Continuing with code execution check only.",
+                title="Linter Skipped",
+                border_style=colorscheme.warning,
+            )
+            linting_message, linting_issues_found = "", False
+
+        code_running_message, code_running_issues_found = code_future.result()
+
+    print_to_console(
+        text=f"Code check finished in {round(time.time() - start_time, 2)} seconds.",
+        title="Code Check",
+        border_style=colorscheme.message,
     )
 
     # If we did not find any issues, we return the final code
@@ -224,3 +294,11 @@ def check_code(
         new_code_block = get_code_from_response(code, within_julia_context=False)
         return {"messages": messages_list, "error": True, "code_block": new_code_block}
     return {"messages": messages_list, "error": True}
+
+
+async def acheck_code(state: State, config: RunnableConfig):
+    """
+    Async variant of `check_code`. The check waits on the Julia processes and the
+    user, so it runs in a thread to keep the event loop free for other sessions.
+    """
+    return await asyncio.to_thread(check_code, state, config)
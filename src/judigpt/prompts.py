@@ -19,6 +19,7 @@ When given a programming task, you should follow this strategic approach:
 
 Use your available retrieval tools strategically:
 - `retrieve_judi_examples`: **MUST USE FIRST** - Semantic search for retrieving relevant JUDI.jl examples. ALWAYS call this tool before writing any JUDI.jl code to ensure you use the correct API patterns (Model, Geometry, judiVector, judiModeling, etc.).
+- `retrieve_judi_docs_and_examples`: Search the JUDI.jl documentation and examples in one call, and get one ranked list. Use this when you need both the API documentation and example code, instead of several separate retrievals.
 - `retrieve_function_documentation`: Look up specific function signatures and usage. Use this when implementing code that uses JUDI.jl.
 - `grep_search`: Search for specific terms or patterns in the JUDI.jl documentation.
 - Actively go back and forth between these and other tools to gather all necessary information before writing code.
@@ -194,6 +195,7 @@ When given a programming task, you should follow this strategic approach:
 
 Use your available retrieval tools strategically:
 - `retrieve_judi_examples`: **MUST USE FIRST** - Semantic search for retrieving relevant JUDI.jl examples. ALWAYS call this tool before writing any JUDI.jl code to ensure you use the correct API patterns (Model, Geometry, judiVector, judiModeling, etc.).
+- `retrieve_judi_docs_and_examples`: Search the JUDI.jl documentation and examples in one call, and get one ranked list. Use this when you need both the API documentation and example code, instead of several separate retrievals.
 - `retrieve_function_documentation`: Look up specific function signatures and usage. Use this when implementing code that uses JUDI.jl.
 - `grep_search`: Search for specific terms or patterns in the JUDI.jl documentation.
 - Actively go back and forth between these and other tools to gather all necessary information before writing code.
@@ -0,0 +1,154 @@
+"""
+On-disk store of the split documents of a retriever spec.
+
+The chunks are stored as one JSON object per line, grouped by source file, with a
+small index of the byte range, modification time and size of each source file. The
+file is memory-mapped and read lazily, so chunks are never all held in memory. When
+the store is refreshed, the chunks of unmodified files are copied from the previous
+store and only modified files are loaded and split again, in a process pool of
+`SPLIT_WORKERS` processes.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import tempfile
+from typing import Dict, Iterator, List, Optional
+
+from langchain_core.documents import Document
+
+from judigpt.rag.index_manifest import list_source_files, split_files
+from judigpt.rag.retriever_specs import RetrieverSpec
+
+
+def _parse_lines(data: bytes) -> Iterator[Document]:
+    for line in data.splitlines():
+        if line:
+            record = json.loads(line)
+            yield Document(
+                page_content=record["page_content"], metadata=record["metadata"]
+            )
+
+
+class ChunkStore:
+    """
+    JSONL file with the chunks of a retriever spec, and a JSON index next to it.
+
+    Args:
+        path (str): Path to the JSONL file, f.ex. `spec.cache_path`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + ".index.json"
+
+    def _load_index(self) -> Dict[str, dict]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            # The index is only valid for the file it was written with
+            if index["store_size"] != os.path.getsize(self.path):
+                return {}
+            return index["sources"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _open_mmap(self) -> Optional[mmap.mmap]:
+        try:
+            with open(self.path, "rb") as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):  # Missing or empty file
+            return None
+
+    def iter_chunks(self) -> Iterator[Document]:
+        """Read the stored chunks lazily, in the order of their source files."""
+        mapped = self._open_mmap()
+        if mapped is None:
+            return
+        try:
+            position = 0
+            while position < len(mapped):
+                end = mapped.find(b"\n", position)
+                if end == -1:
+                    end = len(mapped)
+                yield from _parse_lines(mapped[position:end])
+                position = end + 1
+        finally:
+            mapped.close()
+
+    def refresh(self, spec: RetrieverSpec) -> Iterator[Document]:
+        """
+        Rewrite the store from the current source files of the spec, one file at a time,
+        and yield the chunks as they are written. The new store replaces the old one
+        when the generator is exhausted.
+        """
+        old_index = self._load_index()
+        old_mapped = self._open_mmap() if old_index else None
+
+        # Decide up front which files are reused, so that the others can be split ahead in parallel
+        plan = []
+        for relpath, path in list_source_files(spec).items():
+            stat = os.stat(path)
+            entry = old_index.get(relpath)
+            if (
+                old_mapped is None
+                or entry is None
+                or entry["mtime"] != stat.st_mtime
+                or entry["size"] != stat.st_size
+            ):
+                entry = None
+            plan.append((relpath, path, stat, entry))
+        split_results = split_files(
+            [path for _, path, _, entry in plan if entry is None], spec.split_func
+        )
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(self.path) or ".", suffix=".tmp"
+        )
+        new_index: Dict[str, dict] = {}
+        completed = False
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for relpath, path, stat, entry in plan:
+                    start = out.tell()
+
+                    if entry is not None and old_mapped is not None:
+                        data = old_mapped[entry["start"] : entry["end"]]
+                        out.write(data)
+                        chunks: List[Document] = list(_parse_lines(data))
+                    else:
+                        chunks = next(split_results)
+                        for chunk in chunks:
+                            record = {
+                                "page_content": chunk.page_content,
+                                "metadata": chunk.metadata,
+                            }
+                            out.write(json.dumps(record).encode("utf-8") + b"\n")
+
+                    new_index[relpath] = {
+                        "mtime": stat.st_mtime,
+                        "size": stat.st_size,
+                        "start": start,
+                        "end": out.tell(),
+                    }
+                    yield from chunks
+            completed = True
+        finally:
+            split_results.close()
+            if old_mapped is not None:
+                old_mapped.close()
+            if completed:
+                os.replace(temp_path, self.path)
+                with open(self.index_path, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {
+                            "store_size": os.path.getsize(self.path),
+                            "sources": new_index,
+                        },
+                        f,
+                    )
+            else:
+                os.unlink(temp_path)
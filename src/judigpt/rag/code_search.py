@@ -0,0 +1,313 @@
+"""
+In-process code search over the JUDI documentation and examples.
+
+A trigram index maps every sequence of three characters to the files containing it.
+A query is only matched against the files that contain all trigrams of its literal
+parts, and the lines of those files are kept in memory after the first read. The
+index is persisted on disk and updated for files whose modification time or size
+changed, so it is only built once.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+from judigpt.configuration import PROJECT_ROOT
+
+SEARCH_INDEX_DIR = str(PROJECT_ROOT / "rag" / "search_index")
+SEARCHED_FILETYPES = (".jl", ".md")
+
+
+def trigrams(text: str) -> Set[str]:
+    """Lowercase trigrams of the text. Matching is case-sensitive, so they only narrow down the files."""
+    text = text.lower()
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def required_literals(pattern: str) -> List[str]:
+    """
+    Find literal strings that every match of a regex contains.
+
+    Only literals outside of groups and character classes are used, and none if the
+    pattern has a top-level alternation. The result may therefore miss literals, but
+    never contains one that a match can lack.
+    """
+    literals: List[str] = []
+    current: List[str] = []
+
+    def flush() -> None:
+        if current:
+            literals.append("".join(current))
+            current.clear()
+
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            escaped = pattern[i + 1 : i + 2]
+            if depth == 0 and escaped and not escaped.isalnum():
+                current.append(escaped)  # Escaped metacharacter, f.ex. `\.`
+            else:
+                flush()  # Character class or special sequence, f.ex. `\w`
+            i += 2
+            continue
+        if char == "[":
+            flush()
+            i += 1
+            if pattern[i : i + 1] == "^":
+                i += 1
+            if pattern[i : i + 1] == "]":
+                i += 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+        elif char == "(":
+            depth += 1
+            flush()
+        elif char == ")":
+            depth -= 1
+            flush()
+        elif char == "|" and depth == 0:
+            return []
+        elif char in "?*{":
+            # The preceding character is optional
+            if current:
+                current.pop()
+            flush()
+            if char == "{":
+                i = pattern.find("}", i)
+                if i == -1:
+                    break
+        elif char in ".^$+":
+            flush()
+        elif depth == 0:
+            current.append(char)
+        i += 1
+    flush()
+    return literals
+
+
+@dataclass
+class SearchMatch:
+    path: str
+    line_number: int  # 1-based
+    # Line numbers and lines around the match, including it
+    context: List[tuple[int, str]]
+
+
+class CodeSearchIndex:
+    """
+    Trigram index over the `.jl` and `.md` files below a directory.
+
+    Args:
+        root (str): The directory to search in.
+        index_path (str): Where the index is persisted.
+    """
+
+    def __init__(self, root: str, index_path: str):
+        self.root = root
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._loaded = False
+
+        # Modification time, size and trigrams of each file, keyed on the relative path
+        self._files: Dict[str, dict] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._lines: Dict[str, List[str]] = {}
+
+    def _list_files(self) -> Dict[str, os.stat_result]:
+        files = {}
+        for dir_path, _, file_names in os.walk(self.root):
+            for file_name in file_names:
+                if file_name.endswith(SEARCHED_FILETYPES):
+                    path = os.path.join(dir_path, file_name)
+                    files[os.path.relpath(path, self.root)] = os.stat(path)
+        return dict(sorted(files.items()))
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                files = json.load(f)["files"]
+        except (OSError, ValueError, KeyError):
+            return
+        for relpath, entry in files.items():
+            self._add(relpath, entry)
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(self.index_path), suffix=".tmp"
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"files": self._files}, f)
+        os.replace(temp_path, self.index_path)
+
+    def _add(self, relpath: str, entry: dict) -> None:
+        self._files[relpath] = entry
+        trigram_string = entry["trigrams"]
+        for i in range(0, len(trigram_string), 3):
+            self._postings[trigram_string[i : i + 3]].add(relpath)
+
+    def _remove(self, relpath: str) -> None:
+        entry = self._files.pop(relpath)
+        trigram_string = entry["trigrams"]
+        for i in range(0, len(trigram_string), 3):
+            self._postings[trigram_string[i : i + 3]].discard(relpath)
+        self._lines.pop(relpath, None)
+
+    def refresh(self) -> None:
+        """Update the index for added, modified and deleted files."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+            current = self._list_files()
+            modified = False
+            for relpath in [
+                relpath for relpath in self._files if relpath not in current
+            ]:
+                self._remove(relpath)
+                modified = True
+            for relpath, stat in current.items():
+                entry = self._files.get(relpath)
+                if (
+                    entry is not None
+                    and entry["mtime"] == stat.st_mtime
+                    and entry["size"] == stat.st_size
+                ):
+                    continue
+                if entry is not None:
+                    self._remove(relpath)
+                text = self._read(relpath)
+                self._add(
+                    relpath,
+                    {
+                        "mtime": stat.st_mtime,
+                        "size": stat.st_size,
+                        "trigrams": "".join(sorted(trigrams(text))),
+                    },
+                )
+                modified = True
+            if modified:
+                self._save()
+
+    def _read(self, relpath: str) -> str:
+        with open(
+            os.path.join(self.root, relpath), "r", encoding="utf-8", errors="replace"
+        ) as f:
+            text = f.read()
+        self._lines[relpath] = text.splitlines()
+        return text
+
+    def _get_lines(self, relpath: str) -> List[str]:
+        if relpath not in self._lines:
+            self._read(relpath)
+        return self._lines[relpath]
+
+    def search(
+        self,
+        query: str,
+        is_regex: bool = False,
+        include_pattern: Optional[str] = None,
+        context_lines: int = 2,
+        max_results: int = 20,
+        max_per_file: int = 5,
+    ) -> List[SearchMatch]:
+        """
+        Search for lines matching a fixed string or a regex.
+
+        Files are ranked by their number of matching lines, and at most `max_per_file`
+        matches are taken from each file, so that the results cover several files.
+
+        Args:
+            query (str): The string or regex to search for. Matching is case-sensitive.
+            is_regex (bool): Whether the query is a regex.
+            include_pattern (Optional[str]): Only search files whose name matches this glob pattern.
+            context_lines (int): Number of lines shown before and after each match.
+            max_results (int): Maximum number of matches returned.
+            max_per_file (int): Maximum number of matches returned per file.
+
+        Raises:
+            ValueError: If the regex is invalid.
+        """
+        if is_regex:
+            try:
+                regex = re.compile(query)
+            except re.error as e:
+                raise ValueError(f"Invalid regex {query!r}: {e}") from e
+            literals = required_literals(query)
+        else:
+            regex = re.compile(re.escape(query))
+            literals = [query]
+
+        self.refresh()
+        with self._lock:
+            required = set().union(*(trigrams(literal) for literal in literals))
+            if required:
+                postings = sorted(
+                    (self._postings.get(trigram, set()) for trigram in required),
+                    key=len,
+                )
+                candidates = set(postings[0]).intersection(*postings[1:])
+            else:
+                candidates = set(self._files)
+
+            matches_by_file = {}
+            for relpath in sorted(candidates):
+                if include_pattern and not fnmatch.fnmatch(
+                    os.path.basename(relpath), include_pattern
+                ):
+                    continue
+                lines = self._get_lines(relpath)
+                line_numbers = [i for i, line in enumerate(lines) if regex.search(line)]
+                if line_numbers:
+                    matches_by_file[relpath] = (lines, line_numbers)
+
+        results = []
+        ranked = sorted(
+            matches_by_file.items(), key=lambda item: len(item[1][1]), reverse=True
+        )
+        for relpath, (lines, line_numbers) in ranked:
+            for i in line_numbers[:max_per_file]:
+                start, end = max(0, i - context_lines), i + context_lines + 1
+                results.append(
+                    SearchMatch(
+                        path=os.path.join(self.root, relpath),
+                        line_number=i + 1,
+                        context=[
+                            (j + 1, line)
+                            for j, line in enumerate(lines[start:end], start)
+                        ],
+                    )
+                )
+                if len(results) >= max_results:
+                    return results
+        return results
+
+
+_indices: Dict[str, CodeSearchIndex] = {}
+_indices_lock = threading.Lock()
+
+
+def get_code_search_index(
+    root: str = str(PROJECT_ROOT / "rag" / "judi"),
+) -> CodeSearchIndex:
+    """Get the process-wide code search index for a directory, f.ex. the JUDI documentation and examples."""
+    with _indices_lock:
+        if root not in _indices:
+            _indices[root] = CodeSearchIndex(
+                root,
+                index_path=os.path.join(
+                    SEARCH_INDEX_DIR, f"{os.path.basename(root)}.json"
+                ),
+            )
+        return _indices[root]
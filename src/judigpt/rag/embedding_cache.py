@@ -0,0 +1,264 @@
+"""
+Persistent cache of query embeddings.
+
+The agents often repeat the same retrieval queries, within and across sessions. Each
+query otherwise costs a round-trip to the embedding provider. The vectors are stored
+in a memory-mapped file per embedding model, with a JSON index mapping the hash of
+each query to its row. The least recently used query is replaced when the cache is full.
+
+New queries are appended to a log next to the index, so that a cache miss does not
+rewrite the whole index. The log is merged into the index once it has as many lines
+as the cache has entries, and when the process exits.
+"""
+
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from judigpt.configuration import PROJECT_ROOT, QUERY_EMBEDDING_CACHE_SIZE
+
+EMBEDDING_CACHE_DIR = str(PROJECT_ROOT / "rag" / "embedding_cache")
+
+
+class QueryEmbeddingCache:
+    """
+    Memory-mapped LRU cache of query embeddings for one embedding model.
+
+    Args:
+        cache_dir (str): Directory for the vectors and the index.
+        max_entries (int): Maximum number of cached queries.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._log_path = os.path.join(cache_dir, "index.log")
+        self._vectors_path = os.path.join(cache_dir, "vectors.f32")
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._log_lines = 0
+
+        # Maps the hash of a query to its row in the vectors file and when it was last
+        # used, least recently used first
+        self._entries: OrderedDict[str, List[int]] = OrderedDict()
+        self._free_rows: List[int] = []  # Unused rows, the lowest last
+        self._dim: Optional[int] = None
+        self._clock = 0
+        self._vectors: Optional[np.memmap] = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            dim, entries = index["dim"], index["entries"]
+            vectors = np.memmap(
+                self._vectors_path,
+                dtype=np.float32,
+                mode="r+",
+                shape=(self.max_entries, dim),
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            # Missing, corrupt or created with another size: start from an empty cache
+            return
+        self._dim = dim
+        self._entries = OrderedDict(
+            sorted(
+                (
+                    (key, entry)
+                    for key, entry in entries.items()
+                    if entry[0] < self.max_entries
+                ),
+                key=lambda item: item[1][1],
+            )
+        )
+        self._replay_log()
+        self._clock = max((entry[1] for entry in self._entries.values()), default=0)
+        self._vectors = vectors
+        self._reset_free_rows()
+
+    def _replay_log(self) -> None:
+        """Apply the queries added since the index was written."""
+        try:
+            with open(self._log_path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return
+        row_keys = {entry[0]: key for key, entry in self._entries.items()}
+        for line in lines:
+            try:
+                key, row, clock = line.split(" ")
+                entry = [int(row), int(clock)]
+            except ValueError:
+                continue  # Partially written line
+            if entry[0] >= self.max_entries:
+                continue
+            # The row may have been taken from the least recently used query
+            replaced_key = row_keys.get(entry[0])
+            if replaced_key is not None:
+                self._entries.pop(replaced_key, None)
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            row_keys[entry[0]] = key
+        self._log_lines = len(lines)
+
+    def _reset_free_rows(self) -> None:
+        used_rows = {entry[0] for entry in self._entries.values()}
+        self._free_rows = [
+            row for row in reversed(range(self.max_entries)) if row not in used_rows
+        ]
+
+    def _create_vectors(self, dim: int) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._dim = dim
+        self._entries = OrderedDict()
+        self._vectors = np.memmap(
+            self._vectors_path,
+            dtype=np.float32,
+            mode="w+",
+            shape=(self.max_entries, dim),
+        )
+        self._reset_free_rows()
+        self._save_index()
+
+    @staticmethod
+    def _key(query: str) -> str:
+        return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+    def get(self, query: str) -> Optional[List[float]]:
+        with self._lock:
+            key = self._key(query)
+            entry = self._entries.get(key)
+            if entry is None or self._vectors is None:
+                self.misses += 1
+                return None
+            self._clock += 1
+            entry[1] = self._clock
+            self._entries.move_to_end(key)
+            self._dirty = True
+            self.hits += 1
+            return self._vectors[entry[0]].tolist()
+
+    def put(self, query: str, vector: List[float]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if self._vectors is None or self._dim != len(vector):
+                self._create_vectors(len(vector))
+            assert self._vectors is not None
+
+            key = self._key(query)
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                row = entry[0]
+            elif self._free_rows:
+                row = self._free_rows.pop()
+            else:
+                row = self._entries.popitem(last=False)[1][0]
+
+            self._vectors[row] = np.asarray(vector, dtype=np.float32)
+            self._vectors.flush()
+            self._clock += 1
+            self._entries[key] = [row, self._clock]
+            self._append_log(key, row)
+
+    def _append_log(self, key: str, row: int) -> None:
+        # Written after the vector, so that the log never refers to a missing vector
+        with open(self._log_path, "a", encoding="utf-8") as f:
+            f.write(f"{key} {row} {self._clock}\n")
+        self._log_lines += 1
+        self._dirty = True
+        if self._log_lines >= self.max_entries:
+            self._save_index()
+
+    def _save_index(self) -> None:
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"dim": self._dim, "entries": self._entries}, f)
+        os.replace(temp_path, self._index_path)
+        # The log is replayed idempotently, so it is only truncated after the index is written
+        with open(self._log_path, "w", encoding="utf-8"):
+            pass
+        self._log_lines = 0
+        self._dirty = False
+
+    def flush(self) -> None:
+        """Merge the log and the last-used times of the cached queries into the index."""
+        with self._lock:
+            if self._dirty and self._vectors is not None:
+                self._save_index()
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        hit_rate = 100 * self.hits / total if total else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({hit_rate:.0f}% hit rate)"
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Wraps an `Embeddings` so that query embeddings are read from the cache when possible.
+    Document embeddings are passed through, since they are stored in the vector stores.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: QueryEmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.cache.get(text)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put(text, vector)
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vector = self.cache.get(text)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            self.cache.put(text, vector)
+        return vector
+
+
+_caches: Dict[str, QueryEmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_query_embedding_cache(model: str) -> QueryEmbeddingCache:
+    """Get the process-wide query embedding cache for an embedding model, f.ex. `openai:text-embedding-3-small`."""
+    with _caches_lock:
+        if model not in _caches:
+            dir_name = re.sub(r"[^A-Za-z0-9_.-]", "_", model)
+            _caches[model] = QueryEmbeddingCache(
+                cache_dir=os.path.join(EMBEDDING_CACHE_DIR, dir_name),
+                max_entries=QUERY_EMBEDDING_CACHE_SIZE,
+            )
+        return _caches[model]
+
+
+@atexit.register
+def flush_query_embedding_caches() -> None:
+    with _caches_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.flush()
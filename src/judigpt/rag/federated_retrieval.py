@@ -0,0 +1,129 @@
+"""
+Retrieval from several retriever specs in one query.
+
+Each spec has its own store, so searching the documentation and the examples would
+otherwise take one tool call each. The federated retriever queries the retrievers of
+all specs concurrently and merges their results into one ranked list.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from typing import Generator, List, Optional, Sequence
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableConfig
+
+from judigpt.rag.keyword_search import reciprocal_rank_fusion
+from judigpt.rag.retrieval import RetrievalParams, make_retriever
+from judigpt.rag.retriever_specs import RetrieverSpec
+
+
+def merge_rankings(
+    rankings: Sequence[List[Document]], k: Optional[int] = None
+) -> List[Document]:
+    """
+    Merge and deduplicate the results of several retrievers.
+
+    Reranked documents are ordered by their `relevance_score`, which is comparable across
+    stores. Otherwise the rankings are fused by rank, since the raw scores of different
+    stores and search types are not.
+    """
+    n_docs = sum(len(ranking) for ranking in rankings)
+    k = n_docs if k is None else k
+    documents = [doc for ranking in rankings for doc in ranking]
+    if not all("relevance_score" in doc.metadata for doc in documents):
+        return reciprocal_rank_fusion(rankings, k=k)
+
+    merged, seen = [], set()
+    for doc in sorted(
+        documents, key=lambda doc: doc.metadata["relevance_score"], reverse=True
+    ):
+        key = (doc.metadata.get("source", ""), doc.page_content)
+        if key not in seen:
+            seen.add(key)
+            merged.append(doc)
+    return merged[:k]
+
+
+def _tag(docs: List[Document], collection_name: str) -> List[Document]:
+    # Copies, since some stores return the stored documents themselves
+    return [
+        Document(
+            page_content=doc.page_content,
+            metadata={**doc.metadata, "collection": collection_name},
+        )
+        for doc in docs
+    ]
+
+
+class FederatedRetriever(BaseRetriever):
+    """
+    Retriever querying several retrievers concurrently and merging their results.
+    The name of the collection each document came from is added to its metadata.
+    """
+
+    retrievers: dict[str, BaseRetriever]  # Keyed on the collection name of the spec
+    k: Optional[int] = None  # Number of merged documents. All if None.
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        if not self.retrievers:
+            return []
+        config = {"callbacks": run_manager.get_child()}
+        with ThreadPoolExecutor(max_workers=len(self.retrievers)) as executor:
+            futures = {
+                name: executor.submit(retriever.invoke, query, config)
+                for name, retriever in self.retrievers.items()
+            }
+            rankings = [_tag(future.result(), name) for name, future in futures.items()]
+        return merge_rankings(rankings, k=self.k)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        config = {"callbacks": run_manager.get_child()}
+        results = await asyncio.gather(
+            *(
+                retriever.ainvoke(query, config)
+                for retriever in self.retrievers.values()
+            )
+        )
+        rankings = [_tag(docs, name) for name, docs in zip(self.retrievers, results)]
+        return merge_rankings(rankings, k=self.k)
+
+
+@contextmanager
+def make_federated_retriever(
+    config: RunnableConfig,
+    specs: Sequence[RetrieverSpec],
+    retrieval_params: RetrievalParams,
+    k: Optional[int] = None,
+) -> Generator[FederatedRetriever, None, None]:
+    """
+    Create a retriever over several specs, based on the current configuration.
+
+    Args:
+        config: The runnable configuration
+        specs: The retriever specifications to search
+        retrieval_params: The search type and kwargs used for every spec
+        k: Number of merged documents. All if None.
+    """
+    with ExitStack() as stack:
+        retrievers = {
+            spec.collection_name: stack.enter_context(
+                make_retriever(
+                    config=config, spec=spec, retrieval_params=retrieval_params
+                )
+            )
+            for spec in specs
+        }
+        yield FederatedRetriever(retrievers=retrievers, k=k)
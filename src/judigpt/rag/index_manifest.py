@@ -0,0 +1,296 @@
+"""
+Manifest of the source files embedded in a vector store, used for incremental updates.
+
+For every source file the manifest stores its modification time, content hash and the
+ids of its chunks in the vector store. When the documentation changes, only added or
+modified files are split and embedded again, and the chunks of deleted files are
+removed from the store.
+"""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from judigpt.configuration import SPLIT_WORKERS
+from judigpt.rag.indexing import embed_chunks, make_batch_writer
+from judigpt.rag.retriever_specs import RetrieverSpec
+
+MANIFEST_FILE_NAME = "index_manifest.json"
+
+
+@dataclass
+class FileEntry:
+    mtime: float
+    sha256: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+def list_source_files(spec: RetrieverSpec) -> Dict[str, str]:
+    """
+    Returns:
+        Dict[str, str]: The absolute path of each source file, keyed on its path relative to `spec.dir_path`.
+    """
+    filetypes = [spec.filetype] if isinstance(spec.filetype, str) else spec.filetype
+    files = {}
+    for filetype in filetypes:
+        pattern = os.path.join(spec.dir_path, "**", f"*.{filetype}")
+        for path in glob.glob(pattern, recursive=True):
+            files[os.path.relpath(path, spec.dir_path)] = os.path.abspath(path)
+    return dict(sorted(files.items()))
+
+
+def file_sha256(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def get_relative_source(doc: Document, spec: RetrieverSpec) -> str:
+    return os.path.relpath(doc.metadata.get("source", ""), spec.dir_path)
+
+
+def iter_chunk_ids(
+    chunks: Iterable[Document], spec: RetrieverSpec
+) -> Iterator[tuple[str, Document]]:
+    """Give each chunk a stable id of the form `<relative source path>#<chunk number>`."""
+    counts: Dict[str, int] = defaultdict(int)
+    for chunk in chunks:
+        source = get_relative_source(chunk, spec)
+        yield f"{source}#{counts[source]}", chunk
+        counts[source] += 1
+
+
+class IndexManifest:
+    """
+    The source files embedded in a vector store.
+
+    Args:
+        files (Dict[str, FileEntry]): The entry of each source file, keyed on its relative path.
+    """
+
+    def __init__(self, files: Optional[Dict[str, FileEntry]] = None):
+        self.files = files if files is not None else {}
+
+    @staticmethod
+    def path(persist_path: str) -> str:
+        return os.path.join(persist_path, MANIFEST_FILE_NAME)
+
+    @classmethod
+    def load(cls, persist_path: str) -> Optional[IndexManifest]:
+        try:
+            with open(cls.path(persist_path), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls({relpath: FileEntry(**entry) for relpath, entry in data.items()})
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def save(self, persist_path: str) -> None:
+        os.makedirs(persist_path, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=persist_path, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(
+                {relpath: asdict(entry) for relpath, entry in self.files.items()},
+                f,
+                indent=1,
+            )
+        os.replace(temp_path, self.path(persist_path))
+
+    @classmethod
+    def from_chunk_ids(cls, spec: RetrieverSpec, ids: List[str]) -> IndexManifest:
+        """Create the manifest for chunks that were just embedded from the current source files."""
+        manifest = cls()
+        for relpath, path in list_source_files(spec).items():
+            manifest.files[relpath] = FileEntry(
+                mtime=os.path.getmtime(path), sha256=file_sha256(path)
+            )
+        for chunk_id in ids:
+            entry = manifest.files.get(chunk_id.rsplit("#", maxsplit=1)[0])
+            if entry is not None:
+                entry.chunk_ids.append(chunk_id)
+        return manifest
+
+    def find_changes(self, spec: RetrieverSpec) -> tuple[List[str], List[str]]:
+        """
+        Compare the manifest with the current source files. Files are only hashed when
+        their modification time changed.
+
+        Returns:
+            List[str]: Relative paths of the added or modified files.
+            List[str]: Relative paths of the deleted files.
+        """
+        source_files = list_source_files(spec)
+        changed = []
+        for relpath, path in source_files.items():
+            entry = self.files.get(relpath)
+            mtime = os.path.getmtime(path)
+            if entry is not None and entry.mtime == mtime:
+                continue
+            sha256 = file_sha256(path)
+            if entry is not None and entry.sha256 == sha256:
+                entry.mtime = mtime  # Touched, but the content is the same
+                continue
+            changed.append(relpath)
+        deleted = [relpath for relpath in self.files if relpath not in source_files]
+        return changed, deleted
+
+
+def _stored_ids_by_source(
+    vectorstore: VectorStore, spec: RetrieverSpec
+) -> Dict[str, List[str]]:
+    """Group the ids of the chunks already in the store by their source file."""
+    ids_by_source: Dict[str, List[str]] = defaultdict(list)
+    if hasattr(vectorstore, "docstore"):  # FAISS
+        for chunk_id in vectorstore.index_to_docstore_id.values():
+            doc = vectorstore.docstore.search(chunk_id)
+            if isinstance(doc, Document):
+                ids_by_source[get_relative_source(doc, spec)].append(chunk_id)
+    else:  # Chroma
+        stored = vectorstore.get(include=["metadatas"])
+        for chunk_id, metadata in zip(stored["ids"], stored["metadatas"]):
+            source = os.path.relpath((metadata or {}).get("source", ""), spec.dir_path)
+            ids_by_source[source].append(chunk_id)
+    return ids_by_source
+
+
+def adopt_vectorstore(vectorstore: VectorStore, spec: RetrieverSpec) -> IndexManifest:
+    """
+    Create a manifest for a store built before manifests were written.
+
+    The stored chunks are assumed to match the current content of their source files.
+    Chunks whose source file no longer exists are recorded, so that they are removed.
+    """
+    manifest = IndexManifest()
+    source_files = list_source_files(spec)
+    for relpath, chunk_ids in _stored_ids_by_source(vectorstore, spec).items():
+        path = source_files.get(relpath)
+        if path is None:
+            manifest.files[relpath] = FileEntry(
+                mtime=0.0, sha256="", chunk_ids=chunk_ids
+            )
+        else:
+            manifest.files[relpath] = FileEntry(
+                mtime=os.path.getmtime(path),
+                sha256=file_sha256(path),
+                chunk_ids=chunk_ids,
+            )
+    return manifest
+
+
+def load_and_split_file(path: str, split_func: Callable) -> List[Document]:
+    """Load a single source file and split it. Runs in a worker process when splitting in parallel."""
+    from langchain_community.document_loaders import TextLoader
+
+    chunks = []
+    for doc in TextLoader(path).load():
+        chunks.extend(split_func(doc))
+    return chunks
+
+
+def split_files(
+    paths: List[str], split_func: Callable, workers: int = SPLIT_WORKERS
+) -> Iterator[List[Document]]:
+    """
+    Load and split files in a process pool, and yield the chunks of each file in the order of `paths`.
+
+    At most `2 * workers` files are split ahead of the consumer, to bound the memory use.
+
+    Args:
+        paths (List[str]): The files to split.
+        split_func (Callable): The splitting function of the spec. Must be picklable, f.ex. a module-level function or a `functools.partial` of one.
+        workers (int): Number of worker processes. With 1 worker the files are split in the calling process.
+    """
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield load_and_split_file(path, split_func)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        remaining = iter(paths)
+        pending: deque[Future] = deque(
+            executor.submit(load_and_split_file, path, split_func)
+            for path in islice(remaining, 2 * workers)
+        )
+        while pending:
+            chunks = pending.popleft().result()
+            for path in islice(remaining, 1):
+                pending.append(executor.submit(load_and_split_file, path, split_func))
+            yield chunks
+
+
+def update_vectorstore(
+    vectorstore: VectorStore,
+    spec: RetrieverSpec,
+    persist_path: str,
+    embedding_model: Embeddings,
+) -> bool:
+    """
+    Bring the vector store up to date with the source files in `spec.dir_path`.
+
+    Returns:
+        bool: True if the store was modified. FAISS stores must then be saved again.
+    """
+    manifest = IndexManifest.load(persist_path)
+    adopted = manifest is None
+    if manifest is None:
+        manifest = adopt_vectorstore(vectorstore, spec)
+
+    mtimes = {relpath: entry.mtime for relpath, entry in manifest.files.items()}
+    changed, deleted = manifest.find_changes(spec)
+    # Files whose mtime changed but not their content, so they are not hashed again
+    touched = any(
+        manifest.files[relpath].mtime != mtime for relpath, mtime in mtimes.items()
+    )
+
+    stale_ids = []
+    for relpath in changed + deleted:
+        entry = manifest.files.pop(relpath, None)
+        if entry is not None:
+            stale_ids.extend(entry.chunk_ids)
+    if stale_ids:
+        vectorstore.delete(ids=stale_ids)
+
+    source_files = list_source_files(spec)
+
+    def iter_new_chunks() -> Iterator[tuple[str, Document]]:
+        paths = [source_files[relpath] for relpath in changed]
+        for relpath, path, chunks in zip(
+            changed, paths, split_files(paths, spec.split_func)
+        ):
+            entry = FileEntry(mtime=os.path.getmtime(path), sha256=file_sha256(path))
+            manifest.files[relpath] = entry
+            for chunk_id, chunk in iter_chunk_ids(chunks, spec):
+                entry.chunk_ids.append(chunk_id)
+                yield chunk_id, chunk
+
+    n_chunks = embed_chunks(
+        iter_new_chunks(),
+        embedding_model,
+        make_batch_writer(vectorstore),
+        label=f"Updating {spec.collection_name}",
+    )
+
+    # Loading an unchanged index does not write to it
+    if changed or deleted or adopted or touched:
+        manifest.save(persist_path)
+
+    if changed or deleted:
+        print(
+            f"Updated index at {persist_path}: {len(changed)} files re-embedded "
+            f"({n_chunks} chunks), {len(deleted)} files removed."
+        )
+    return bool(changed or deleted)
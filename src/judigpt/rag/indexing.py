@@ -0,0 +1,231 @@
+"""
+Batched, parallel embedding of document chunks when building or updating an index.
+
+Chunks are read lazily from the splitters, embedded in batches of
+`EMBEDDING_BATCH_SIZE` with at most `EMBEDDING_CONCURRENCY` batches in flight, and
+written to the vector store batch by batch in their original order. Batches failing
+with a rate limit, timeout or connection error are retried with exponential backoff.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from judigpt.configuration import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CONCURRENCY,
+    EMBEDDING_MAX_RETRIES,
+    EMBEDDING_RETRY_BACKOFF,
+)
+
+# Called with the texts, vectors, metadatas and ids of one embedded batch
+BatchWriter = Callable[[List[str], List[List[float]], List[dict], List[str]], None]
+
+
+# Substrings of the names of the exceptions of the provider clients that are worth
+# retrying, f.ex. openai.RateLimitError, openai.APITimeoutError and httpx.ConnectError
+_TRANSIENT_ERROR_NAMES = ("RateLimit", "Timeout", "Connect")
+_TRANSIENT_STATUS_CODES = (408, 429)
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether the error is a rate limit, timeout or connection error, which may pass when retried."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if getattr(error, "status_code", None) in _TRANSIENT_STATUS_CODES:
+        return True
+    return any(
+        name in cls.__name__
+        for cls in type(error).__mro__
+        for name in _TRANSIENT_ERROR_NAMES
+    )
+
+
+def _embed_with_retry(
+    embedding_model: Embeddings, texts: List[str]
+) -> List[List[float]]:
+    for attempt in range(EMBEDDING_MAX_RETRIES):
+        try:
+            return embedding_model.embed_documents(texts)
+        except Exception as e:
+            # Errors like a wrong API key or model name will not pass when retried
+            if not _is_transient(e):
+                raise
+        # Exponential backoff with jitter, f.ex. for rate limits of the provider
+        time.sleep(EMBEDDING_RETRY_BACKOFF * 2**attempt * (1 + random.random()))
+    return embedding_model.embed_documents(texts)
+
+
+def _batches(
+    chunks: Iterable[tuple[str, Document]], batch_size: int
+) -> Iterator[List[tuple[str, Document]]]:
+    iterator = iter(chunks)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def embed_chunks(
+    chunks: Iterable[tuple[str, Document]],
+    embedding_model: Embeddings,
+    write_batch: BatchWriter,
+    label: str = "Embedding",
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    concurrency: int = EMBEDDING_CONCURRENCY,
+) -> int:
+    """
+    Embed chunks and write them to a vector store.
+
+    Args:
+        chunks (Iterable[tuple[str, Document]]): The id and document of each chunk. Consumed lazily.
+        embedding_model (Embeddings): The model used to embed the chunks.
+        write_batch (BatchWriter): Writes an embedded batch to the vector store. Called in order, from the calling thread.
+        label (str): Label used in the progress output.
+
+    Returns:
+        int: The number of chunks embedded.
+    """
+    start_time = time.time()
+    n_done = 0
+    in_flight: deque[tuple[List[tuple[str, Document]], Future]] = deque()
+
+    def write_oldest() -> None:
+        nonlocal n_done
+        batch, future = in_flight.popleft()
+        vectors = future.result()
+        write_batch(
+            [doc.page_content for _, doc in batch],
+            vectors,
+            [doc.metadata for _, doc in batch],
+            [chunk_id for chunk_id, _ in batch],
+        )
+        n_done += len(batch)
+        elapsed = time.time() - start_time
+        print(
+            f"\r{label}: {n_done} chunks ({n_done / elapsed:.1f} chunks/s)",
+            end="",
+            flush=True,
+        )
+
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+        for batch in _batches(chunks, batch_size):
+            if len(in_flight) >= max(concurrency, 1):
+                write_oldest()
+            texts = [doc.page_content for _, doc in batch]
+            in_flight.append(
+                (batch, executor.submit(_embed_with_retry, embedding_model, texts))
+            )
+        while in_flight:
+            write_oldest()
+
+    if n_done:
+        elapsed = time.time() - start_time
+        print(
+            f"\r{label}: {n_done} chunks in {elapsed:.1f} s "
+            f"({n_done / elapsed:.1f} chunks/s)"
+        )
+    return n_done
+
+
+def make_batch_writer(vectorstore: VectorStore) -> BatchWriter:
+    """Write precomputed embeddings to an existing FAISS or Chroma store."""
+    if hasattr(vectorstore, "add_embeddings"):  # FAISS
+
+        def write_faiss(texts, vectors, metadatas, ids):
+            vectorstore.add_embeddings(
+                list(zip(texts, vectors)), metadatas=metadatas, ids=ids
+            )
+
+        return write_faiss
+
+    # The public API of langchain_chroma embeds the texts itself, so the precomputed
+    # embeddings are written to the underlying chromadb collection, which its
+    # `add_texts` uses as well. Should the private attribute be renamed in a later
+    # release, the texts are embedded again by `add_texts` instead.
+    collection = getattr(vectorstore, "_collection", None)
+    if collection is None or not hasattr(collection, "upsert"):
+
+        def add_chroma_texts(texts, vectors, metadatas, ids):
+            vectorstore.add_texts(texts, metadatas=metadatas, ids=ids)
+
+        return add_chroma_texts
+
+    def write_chroma(texts, vectors, metadatas, ids):
+        collection.upsert(
+            ids=ids, embeddings=vectors, metadatas=metadatas, documents=texts
+        )
+
+    return write_chroma
+
+
+def build_faiss_index(
+    chunks: Iterable[tuple[str, Document]],
+    embedding_model: Embeddings,
+    label: str = "Embedding",
+):
+    """Create a FAISS store from the first embedded batch and add the remaining batches to it."""
+    from langchain_community.vectorstores import FAISS
+
+    vectorstore: Optional[FAISS] = None
+
+    def write_batch(texts, vectors, metadatas, ids):
+        nonlocal vectorstore
+        if vectorstore is None:
+            vectorstore = FAISS.from_embeddings(
+                list(zip(texts, vectors)),
+                embedding_model,
+                metadatas=metadatas,
+                ids=ids,
+            )
+        else:
+            vectorstore.add_embeddings(
+                list(zip(texts, vectors)), metadatas=metadatas, ids=ids
+            )
+
+    embed_chunks(chunks, embedding_model, write_batch, label=label)
+    if vectorstore is None:
+        raise ValueError("No documents found to build the FAISS index from.")
+    return vectorstore
+
+
+def compress_faiss_index(vectorstore, index_type: str) -> None:
+    """
+    Replace the flat index of a FAISS store with a compressed index, trained on the
+    vectors of the flat index. The documents and their ids are unchanged.
+
+    Args:
+        vectorstore (FAISS): Store with a flat index.
+        index_type (str): FAISS index factory string, f.ex. `SQfp16`, `SQ8` or `PQ64x4`.
+
+    Raises:
+        ValueError: If the index type is not supported, or there are too few vectors to train it.
+    """
+    import faiss
+
+    flat_index = vectorstore.index
+    index = faiss.index_factory(flat_index.d, index_type, flat_index.metric_type)
+    # Deleting vectors when updating the store assumes that the ids of the remaining
+    # vectors are shifted, which only holds for indices storing the codes in one array
+    if not isinstance(index, faiss.IndexFlatCodes):
+        raise ValueError(
+            f"Unsupported FAISS index type: {index_type}. "
+            "Use a flat index of compressed vectors, f.ex. 'SQfp16', 'SQ8' or 'PQ64x4'."
+        )
+
+    vectors = flat_index.reconstruct_n(0, flat_index.ntotal)
+    try:
+        index.train(vectors)
+    except RuntimeError as e:
+        raise ValueError(
+            f"Could not train the {index_type} index on {len(vectors)} vectors: {e}"
+        ) from e
+    index.add(vectors)
+    vectorstore.index = index
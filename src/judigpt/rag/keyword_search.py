@@ -0,0 +1,139 @@
+"""
+In-process BM25 keyword index, and fusion of keyword and vector search results.
+
+Embedding search often misses exact identifiers such as `judiVector` or
+`PhysicalParameter`. The keyword index is built from the same chunks as the vector
+store, and the `hybrid` search type combines both rankings with reciprocal rank fusion.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Sequence
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+_WORD_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_SUBWORD_PATTERN = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase tokens. Identifiers are kept whole, and their camelCase
+    and snake_case parts are added, so that `judiVector` also matches `vector`.
+    """
+    tokens = []
+    for word in _WORD_PATTERN.findall(text):
+        tokens.append(word.lower())
+        parts = _SUBWORD_PATTERN.findall(word)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts)
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 index over a list of documents.
+
+    Args:
+        documents (List[Document]): The documents to index.
+        k1 (float): Term frequency saturation.
+        b (float): Document length normalization.
+    """
+
+    def __init__(self, documents: List[Document], k1: float = 1.5, b: float = 0.75):
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+
+        # Maps each token to the documents it occurs in and its count in each of them
+        self._postings: Dict[str, List[tuple[int, int]]] = defaultdict(list)
+        self._lengths: List[int] = []
+        for i, doc in enumerate(documents):
+            counts = Counter(tokenize(doc.page_content))
+            self._lengths.append(sum(counts.values()))
+            for token, count in counts.items():
+                self._postings[token].append((i, count))
+        self._average_length = (
+            sum(self._lengths) / len(self._lengths) if documents else 0.0
+        )
+
+        n_docs = len(documents)
+        self._idf = {
+            token: math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for token, postings in self._postings.items()
+        }
+
+    def search(self, query: str, k: int) -> List[tuple[Document, float]]:
+        """
+        Returns:
+            List[tuple[Document, float]]: The `k` best matching documents and their scores, best first.
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for token in set(tokenize(query)):
+            idf = self._idf.get(token)
+            if idf is None:
+                continue
+            for i, count in self._postings[token]:
+                norm = 1 - self.b + self.b * self._lengths[i] / self._average_length
+                scores[i] += idf * count * (self.k1 + 1) / (count + self.k1 * norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.documents[i], score) for i, score in best]
+
+
+def _document_key(doc: Document) -> tuple[str, str]:
+    return doc.metadata.get("source", ""), doc.page_content
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[List[Document]], k: int, rrf_k: int = 60
+) -> List[Document]:
+    """
+    Merge several rankings of documents. Each document scores `1 / (rrf_k + rank)` in
+    every ranking it appears in, so documents ranked well by several searches come first.
+    """
+    scores: Dict[tuple[str, str], float] = defaultdict(float)
+    documents: Dict[tuple[str, str], Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = _document_key(doc)
+            scores[key] += 1 / (rrf_k + rank)
+            documents.setdefault(key, doc)
+    best = sorted(scores, key=lambda key: scores[key], reverse=True)[:k]
+    return [documents[key] for key in best]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever fusing the results of a vector store retriever and a BM25 index.
+
+    The vector retriever should return `fetch_k` candidates, and the same number of
+    candidates is taken from the keyword index before fusing them into the top `k`.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vector_retriever: BaseRetriever
+    keyword_index: BM25Index
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        vector_docs = self.vector_retriever.invoke(
+            query, config={"callbacks": run_manager.get_child()}
+        )
+        keyword_docs = [
+            doc for doc, _ in self.keyword_index.search(query, self.fetch_k)
+        ]
+        return reciprocal_rank_fusion(
+            [vector_docs, keyword_docs], k=self.k, rrf_k=self.rrf_k
+        )
@@ -0,0 +1,90 @@
+"""
+Offline, deterministic text embeddings computed on the CPU.
+
+`HashingEmbeddings` hashes the tokens of a text into a fixed number of dimensions,
+weighs them with a sublinear term frequency and normalizes the vector. Identifiers are
+split into their camelCase and snake_case parts, as for the BM25 keyword search.
+It needs no model or network service, so index builds are reproducible and fast, f.ex.
+in CI or on air-gapped cluster nodes. Select it with an embedding model of the form
+`local:hashing` or `local:hashing-<dimension>`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from judigpt.rag.keyword_search import tokenize
+
+DEFAULT_HASHING_DIMENSION = 2048
+_MODEL_PATTERN = re.compile(r"hashing(?:-(\d+))?")
+
+
+@lru_cache(maxsize=1 << 16)
+def _hash_token(token: str, dimension: int) -> tuple[int, float]:
+    """Column and sign of a token. Uses blake2b, since `hash` differs between processes."""
+    digest = int.from_bytes(
+        hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+    return digest % dimension, 1.0 if digest >> 63 else -1.0
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Feature hashing embeddings of the tokens of a text.
+
+    Args:
+        dimension (int): Number of dimensions of the embeddings.
+    """
+
+    def __init__(self, dimension: int = DEFAULT_HASHING_DIMENSION):
+        self.dimension = dimension
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        rows, columns, signs = [], [], []
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                column, sign = _hash_token(token, self.dimension)
+                rows.append(row)
+                columns.append(column)
+                signs.append(sign)
+
+        counts = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        np.add.at(
+            counts,
+            (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)),
+            np.array(signs, dtype=np.float32),
+        )
+
+        # Sublinear term frequency, so that repeated tokens do not dominate
+        vectors = np.sign(counts) * np.log1p(np.abs(counts))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0].tolist()
+
+
+def make_local_embeddings(model: str) -> Embeddings:
+    """
+    Create a local embedding model from the name after `local:`.
+
+    Raises:
+        ValueError: If the model name is not supported.
+    """
+    match = _MODEL_PATTERN.fullmatch(model)
+    if match is None:
+        raise ValueError(
+            f"Unsupported local embedding model: {model}. "
+            "Expected 'hashing' or 'hashing-<dimension>'."
+        )
+    dimension = int(match.group(1)) if match.group(1) else DEFAULT_HASHING_DIMENSION
+    return HashingEmbeddings(dimension)
@@ -1,78 +1,188 @@
-import os
+import re
+import threading
 from contextlib import contextmanager
-from typing import Generator, TypedDict
-
-# from langchain.retrievers import ContextualCompressionRetriever
-# from langchain.retrievers.document_compressors import FlashrankRerank
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterator,
+    Optional,
+    TypedDict,
+    TypeVar,
+)
+
+from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
 from langchain_core.runnables import RunnableConfig
-from langchain_core.vectorstores import VectorStoreRetriever
-
-# from langchain_core.documents import BaseDocumentCompressor
-from judigpt.configuration import BaseConfiguration
+from langchain_core.vectorstores import VectorStore, VectorStoreRetriever
+
+from judigpt.configuration import QUERY_EMBEDDING_CACHE_SIZE, BaseConfiguration
+from judigpt.rag.chunk_store import ChunkStore
+from judigpt.rag.index_manifest import (
+    IndexManifest,
+    iter_chunk_ids,
+    update_vectorstore,
+)
+from judigpt.rag.indexing import (
+    build_faiss_index,
+    compress_faiss_index,
+    embed_chunks,
+    make_batch_writer,
+)
+from judigpt.rag.keyword_search import BM25Index, HybridRetriever
 from judigpt.rag.retriever_specs import RetrieverSpec
 from judigpt.utils import get_provider_and_model
 
 
 class RetrievalParams(TypedDict):
-    search_type: str
+    search_type: str  # "hybrid", or a search type of the vector store
     search_kwargs: dict
 
 
+def uses_query_embedding_cache(model: str) -> bool:
+    """Whether the query embeddings of a text encoder are cached, see `make_text_encoder`."""
+    provider = model.split(":", maxsplit=1)[0]
+    return QUERY_EMBEDDING_CACHE_SIZE > 0 and provider != "local"
+
+
 def make_text_encoder(model: str) -> Embeddings:
-    """Connect to the configured text encoder."""
+    """
+    Connect to the configured text encoder. Query embeddings of remote models are cached
+    on disk, unless `QUERY_EMBEDDING_CACHE_SIZE` is 0.
+    """
+    full_name = model
     provider, model = model.split(":", maxsplit=1)
     match provider:
         case "openai":
             from langchain_openai import OpenAIEmbeddings
 
-            return OpenAIEmbeddings(model=model)
+            encoder = OpenAIEmbeddings(model=model)
         case "ollama":
             from langchain_ollama import OllamaEmbeddings
 
-            return OllamaEmbeddings(model=model)
+            encoder = OllamaEmbeddings(model=model)
+        case "local":
+            from judigpt.rag.local_embeddings import make_local_embeddings
+
+            # Computed on the CPU faster than they are read from the cache
+            return make_local_embeddings(model)
 
         case _:
             raise ValueError(f"Unsupported embedding provider: {provider}")
 
+    if not uses_query_embedding_cache(full_name):
+        return encoder
 
-def _load_and_split_docs(spec: RetrieverSpec) -> list:
-    import pickle
+    from judigpt.rag.embedding_cache import (
+        CachedQueryEmbeddings,
+        get_query_embedding_cache,
+    )
 
-    from langchain_community.document_loaders import DirectoryLoader, TextLoader
+    return CachedQueryEmbeddings(encoder, get_query_embedding_cache(full_name))
 
-    # Load or cache documents
-    if isinstance(spec.filetype, str):
-        filetypes = [spec.filetype]
-    else:
-        filetypes = spec.filetype
 
-    loaders = []
-    for filetype in filetypes:
-        loader = DirectoryLoader(
-            path=spec.dir_path,
-            glob=f"**/*.{filetype}",
-            show_progress=True,
-            loader_cls=TextLoader,
-        )
-        loaders.append(loader)
+# Process-wide registry of the text encoders and vector stores. Loading a vector store
+# from disk and creating an encoder client are much slower than a query, so they are
+# kept resident and reused by every retriever until they are invalidated.
+_text_encoders: Dict[str, Embeddings] = {}
+_vectorstores: Dict[tuple, VectorStore] = {}
+_keyword_indices: Dict[str, BM25Index] = {}
+_registry_lock = threading.Lock()
+# Held while an entry is created, which can take minutes for a vector store, so that
+# only the callers waiting for the same entry are blocked
+_entry_locks: Dict[tuple, threading.Lock] = {}
+_registry_generation = 0  # Incremented by invalidate_retrievers
+
+T = TypeVar("T")
+
+
+def _get_or_create(registry: Dict[Any, T], key: Any, create: Callable[[], T]) -> T:
+    with _registry_lock:
+        if key in registry:
+            return registry[key]
+        entry_lock = _entry_locks.setdefault((id(registry), key), threading.Lock())
+
+    with entry_lock:
+        with _registry_lock:
+            if key in registry:
+                return registry[key]
+            generation = _registry_generation
+        value = create()
+        with _registry_lock:
+            # Not kept if the registry was invalidated while it was created
+            if generation == _registry_generation:
+                registry[key] = value
+        return value
+
+
+def get_text_encoder(model: str) -> Embeddings:
+    """Get the shared text encoder for the model, creating it if needed."""
+    return _get_or_create(_text_encoders, model, lambda: make_text_encoder(model))
 
-    if os.path.exists(spec.cache_path):
-        with open(spec.cache_path, "rb") as f:
-            docs = pickle.load(f)
-    else:
-        docs = []
-        for loader in loaders:
-            docs.extend(loader.load())
 
-        with open(spec.cache_path, "wb") as f:
-            pickle.dump(docs, f)
+def _get_vectorstore(
+    key: tuple, load_vectorstore: Callable[[], VectorStore]
+) -> VectorStore:
+    return _get_or_create(_vectorstores, key, load_vectorstore)
 
-    # Split documents
-    chunks = []
-    for doc in docs:
-        chunks.extend(spec.split_func(doc))
-    return chunks
+
+def get_keyword_index(spec: RetrieverSpec) -> BM25Index:
+    """Get the shared BM25 index over the chunks of the spec, building it if needed."""
+    return _get_or_create(
+        _keyword_indices,
+        spec.collection_name,
+        lambda: BM25Index(list(_iter_split_docs(spec))),
+    )
+
+
+def invalidate_retrievers(spec: Optional[RetrieverSpec] = None) -> None:
+    """
+    Drop the loaded vector stores and text encoders, so that they are reloaded from disk
+    on the next retrieval. Use this after the persisted indices have been modified.
+
+    Args:
+        spec (Optional[RetrieverSpec]): Only drop the vector stores for this spec. If None, everything is dropped.
+    """
+    global _registry_generation
+    with _registry_lock:
+        _registry_generation += 1
+        if spec is None:
+            _vectorstores.clear()
+            _keyword_indices.clear()
+            _text_encoders.clear()
+            return
+        _keyword_indices.pop(spec.collection_name, None)
+        for key in [key for key in _vectorstores if key[2] == spec.collection_name]:
+            del _vectorstores[key]
+
+
+def _iter_split_docs(spec: RetrieverSpec) -> Iterator[Document]:
+    """
+    Load and split the documents of the spec one file at a time. The chunks are stored
+    in the chunk store at `spec.cache_path`, and reused for files that are unmodified.
+    """
+    yield from ChunkStore(spec.cache_path).refresh(spec)
+
+
+def _record_ids(
+    chunks: Iterator[tuple[str, Document]], ids: list
+) -> Iterator[tuple[str, Document]]:
+    for chunk_id, chunk in chunks:
+        ids.append(chunk_id)
+        yield chunk_id, chunk
+
+
+def get_faiss_persist_path(
+    spec: RetrieverSpec, embedding_model: str, index_type: str = "Flat"
+) -> str:
+    """Directory of the FAISS index of the spec, for an embedding model and index type."""
+    # Get the persist path by checking what is the specified embedding model
+    persist_path = spec.persist_path(get_provider_and_model(embedding_model)[0])
+    if index_type != "Flat":
+        persist_path += "_" + re.sub(r"[^A-Za-z0-9]+", "_", index_type).lower()
+    return persist_path
 
 
 @contextmanager
@@ -86,31 +196,60 @@ def make_faiss_retriever(
     """
     Create or load a FAISS retriever, saving the index locally to avoid re-indexing.
     Uses configuration to determine file paths and splitting functions.
+    The loaded index is kept in memory and shared by later retrievers.
+    Compressed indices, see `faiss_index_type`, are stored next to the flat index.
     """
     import os
 
     from langchain_community.vectorstores import FAISS
 
-    # Get the persist path by checking what is the specified embedding model
-    persist_path = spec.persist_path(
-        get_provider_and_model(configuration.embedding_model)[0]
+    index_type = configuration.faiss_index_type
+    persist_path = get_faiss_persist_path(
+        spec, configuration.embedding_model, index_type
     )
+    flat_persist_path = get_faiss_persist_path(spec, configuration.embedding_model)
 
-    # Load or create FAISS index
-    if os.path.exists(persist_path):
+    def load_and_update(path: str) -> VectorStore:
         vectorstore = FAISS.load_local(
-            persist_path,
+            path,
             embedding_model,
             allow_dangerous_deserialization=True,
         )
-    else:
-        print(f"Creating new FAISS index at {spec.persist_path}")
-        docs = _load_and_split_docs(spec)
-        vectorstore = FAISS.from_documents(
-            documents=docs,
-            embedding=embedding_model,
-        )
-        vectorstore.save_local(persist_path)
+        if update_vectorstore(vectorstore, spec, path, embedding_model):
+            vectorstore.save_local(path)
+        return vectorstore
+
+    # Load or create FAISS index. Existing indices are updated with changed source files.
+    def load_vectorstore() -> VectorStore:
+        if os.path.exists(persist_path):
+            vectorstore = load_and_update(persist_path)
+        elif index_type != "Flat" and os.path.exists(flat_persist_path):
+            # Compress the flat index instead of embedding the documents again
+            print(f"Creating {index_type} FAISS index at {persist_path}")
+            vectorstore = load_and_update(flat_persist_path)
+            compress_faiss_index(vectorstore, index_type)
+            vectorstore.save_local(persist_path)
+            manifest = IndexManifest.load(flat_persist_path)
+            assert manifest is not None  # Written by update_vectorstore
+            manifest.save(persist_path)
+        else:
+            print(f"Creating new FAISS index at {persist_path}")
+            ids = []
+            vectorstore = build_faiss_index(
+                _record_ids(iter_chunk_ids(_iter_split_docs(spec), spec), ids),
+                embedding_model,
+                label=f"Indexing {spec.collection_name}",
+            )
+            if index_type != "Flat":
+                compress_faiss_index(vectorstore, index_type)
+            vectorstore.save_local(persist_path)
+            IndexManifest.from_chunk_ids(spec, ids).save(persist_path)
+        return vectorstore
+
+    vectorstore = _get_vectorstore(
+        ("faiss", persist_path, spec.collection_name, configuration.embedding_model),
+        load_vectorstore,
+    )
 
     yield vectorstore.as_retriever(
         search_type=search_type,
@@ -127,8 +266,9 @@ def make_chroma_retriever(
     search_kwargs: dict,
 ) -> Generator[VectorStoreRetriever, None, None]:
     """
-    Create or load a FAISS retriever, saving the index locally to avoid re-indexing.
+    Create or load a Chroma retriever, saving the index locally to avoid re-indexing.
     Uses configuration to determine file paths and splitting functions.
+    The loaded collection is kept in memory and shared by later retrievers.
     """
     import os
 
@@ -139,24 +279,37 @@ def make_chroma_retriever(
         get_provider_and_model(configuration.embedding_model)[0]
     )
 
-    # Load or create FAISS index
-    if os.path.exists(persist_path):
-        vectorstore = Chroma(
-            embedding_function=embedding_model,
-            persist_directory=persist_path,
-            collection_name=spec.collection_name,
-        )
-
-    else:
-        print(f"Creating new Chroma index at {persist_path}")
-        docs = _load_and_split_docs(spec)
+    # Load or create Chroma index. Existing indices are updated with changed source files.
+    def load_vectorstore() -> VectorStore:
+        if os.path.exists(persist_path):
+            vectorstore = Chroma(
+                embedding_function=embedding_model,
+                persist_directory=persist_path,
+                collection_name=spec.collection_name,
+            )
+            update_vectorstore(vectorstore, spec, persist_path, embedding_model)
+
+        else:
+            print(f"Creating new Chroma index at {persist_path}")
+            vectorstore = Chroma(
+                embedding_function=embedding_model,
+                persist_directory=persist_path,
+                collection_name=spec.collection_name,
+            )
+            ids = []
+            embed_chunks(
+                _record_ids(iter_chunk_ids(_iter_split_docs(spec), spec), ids),
+                embedding_model,
+                make_batch_writer(vectorstore),
+                label=f"Indexing {spec.collection_name}",
+            )
+            IndexManifest.from_chunk_ids(spec, ids).save(persist_path)
+        return vectorstore
 
-        vectorstore = Chroma.from_documents(
-            documents=docs,
-            embedding=embedding_model,
-            persist_directory=persist_path,
-            collection_name=spec.collection_name,
-        )
+    vectorstore = _get_vectorstore(
+        ("chroma", persist_path, spec.collection_name, configuration.embedding_model),
+        load_vectorstore,
+    )
 
     yield vectorstore.as_retriever(
         search_type=search_type,
@@ -164,14 +317,22 @@ def make_chroma_retriever(
     )
 
 
-# def apply_flash_reranker(
-#     configuration: BaseConfiguration, retriever: VectorStoreRetriever
-# ):
-#     compressor = FlashrankRerank(**configuration.rerank_kwargs)
-#
-#     return ContextualCompressionRetriever(
-#         base_compressor=compressor, base_retriever=retriever
-#     )
+def apply_flash_reranker(
+    configuration: BaseConfiguration, retriever: BaseRetriever
+) -> BaseRetriever:
+    """
+    Rerank the documents of the retriever with a local FlashRank model, keeping the
+    `top_n` best. The retriever should therefore fetch more than `top_n` documents.
+    """
+    from langchain.retrievers import ContextualCompressionRetriever
+
+    from judigpt.rag.reranking import FlashrankReranker
+
+    compressor = FlashrankReranker(**configuration.rerank_kwargs)
+
+    return ContextualCompressionRetriever(
+        base_compressor=compressor, base_retriever=retriever
+    )
 
 
 @contextmanager
@@ -182,10 +343,13 @@ def make_retriever(
         search_type="mmr",
         search_kwargs={"k": 3, "fetch_k": 15, "lambda_mult": 0.5},
     ),
-) -> Generator[VectorStoreRetriever, None, None]:
+) -> Generator[BaseRetriever, None, None]:
     """
     Create a retriever for the agent, based on the current configuration.
 
+    With the `hybrid` search type, the `fetch_k` best results of a similarity search and
+    of a BM25 keyword search are merged with reciprocal rank fusion into the top `k`.
+
     Args:
         config: The runnable configuration
         spec: The retriever specification
@@ -193,7 +357,15 @@ def make_retriever(
     """
     configuration = BaseConfiguration.from_runnable_config(config)
 
-    embedding_model = make_text_encoder(configuration.embedding_model)
+    embedding_model = get_text_encoder(configuration.embedding_model)
+
+    search_type = retrieval_params["search_type"]
+    search_kwargs = retrieval_params["search_kwargs"]
+    if search_type == "hybrid":
+        # The vector store only provides the candidates for the fusion
+        k = search_kwargs.get("k", 4)
+        fetch_k = search_kwargs.get("fetch_k", 5 * k)
+        search_type, search_kwargs = "similarity", {"k": fetch_k}
 
     # Get the retriever
     selected_retriever = None
@@ -203,8 +375,8 @@ def make_retriever(
                 configuration,
                 spec,
                 embedding_model,
-                retrieval_params["search_type"],
-                retrieval_params["search_kwargs"],
+                search_type,
+                search_kwargs,
             ) as retriever:
                 selected_retriever = retriever
         case "chroma":
@@ -212,8 +384,8 @@ def make_retriever(
                 configuration,
                 spec,
                 embedding_model,
-                retrieval_params["search_type"],
-                retrieval_params["search_kwargs"],
+                search_type,
+                search_kwargs,
             ) as retriever:
                 selected_retriever = retriever
 
@@ -224,10 +396,21 @@ def make_retriever(
                 f"Got: {configuration.retriever_provider}"
             )
 
+    if retrieval_params["search_type"] == "hybrid":
+        selected_retriever = HybridRetriever(
+            vector_retriever=selected_retriever,
+            keyword_index=get_keyword_index(spec),
+            k=k,
+            fetch_k=fetch_k,
+            rrf_k=retrieval_params["search_kwargs"].get("rrf_k", 60),
+        )
+
     # Apply the reranker
     match configuration.rerank_provider:
         case "None":
             yield selected_retriever
+        case "flash":
+            yield apply_flash_reranker(configuration, selected_retriever)
         case _:
             raise ValueError(
                 "Unrecognized rerank_provider in configuration. "
@@ -14,6 +14,7 @@ from judigpt.rag import split_docs, split_examples
 class RetrieverSpec:
     dir_path: str
     persist_path: Callable  # Callable as we want to change where we store when we modify the embedding model in the configuration.
+    # Chunk store with the split documents. See `judigpt.rag.chunk_store`.
     cache_path: str
     collection_name: str
     filetype: Union[str, list[str]]  # Can be a single filetype or a list of filetypes.
@@ -31,7 +32,7 @@ RETRIEVER_SPECS = {
                 / f"retriever_judi_docs_{retriever_dir_name}"
             ),
             cache_path=str(
-                PROJECT_ROOT / "rag" / "loaded_store" / "loaded_judi_docs.pkl"
+                PROJECT_ROOT / "rag" / "loaded_store" / "loaded_judi_docs.jsonl"
             ),
             collection_name="judi_docs",
             filetype="md",
@@ -46,7 +47,7 @@ RETRIEVER_SPECS = {
                 / f"retriever_judi_examples_{retriever_dir_name}"
             ),
             cache_path=str(
-                PROJECT_ROOT / "rag" / "loaded_store" / "loaded_judi_examples.pkl"
+                PROJECT_ROOT / "rag" / "loaded_store" / "loaded_judi_examples.jsonl"
             ),
             collection_name="judi_examples",
             filetype="jl",
@@ -66,7 +67,7 @@ RETRIEVER_SPECS = {
                 / f"retriever_fimbul_docs_{retriever_dir_name}"
             ),
             cache_path=str(
-                PROJECT_ROOT / "rag" / "loaded_store" / "loaded_fimbul_docs.pkl"
+                PROJECT_ROOT / "rag" / "loaded_store" / "loaded_fimbul_docs.jsonl"
             ),
             collection_name="fimbul_docs",
             filetype="md",
@@ -81,7 +82,7 @@ RETRIEVER_SPECS = {
                 / f"retriever_fimbul_examples_{retriever_dir_name}"
             ),
             cache_path=str(
-                PROJECT_ROOT / "rag" / "loaded_store" / "loaded_fimbul_examples.pkl"
+                PROJECT_ROOT / "rag" / "loaded_store" / "loaded_fimbul_examples.jsonl"
             ),
             collection_name="fimbul_examples",
             filetype="jl",
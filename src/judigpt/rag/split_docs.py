@@ -9,6 +9,12 @@ from langchain_text_splitters import (
 
 from judigpt.utils import deduplicate_document_chunks, get_file_source
 
+_HEADER_ID_PATTERN = re.compile(r"\s*\{#[^}]*\}")
+_BLOCKQUOTE_PATTERN = re.compile(r"^\s*>+", flags=re.MULTILINE)
+_IMAGE_PATTERN = re.compile(r"!\[.*?\]\(.*?\)")
+_ANSI_BLOCK_PATTERN = re.compile(r"```ansi[\s\S]*?```", flags=re.MULTILINE)
+_MARKDOWN_LINK_PATTERN = re.compile(r"\[([^\]]+)\]\([^)]+\)")
+
 
 def split_docs(
     document: Document,
@@ -41,8 +47,8 @@ def split_docs(
         for key in ["Header 1", "Header 2", "Header 3"]:
             if key in split.metadata and split.metadata[key]:
                 # Remove '{#...}' from the header value
-                split.metadata[key] = re.sub(
-                    r"\s*\{#[^}]*\}", "", split.metadata[key]
+                split.metadata[key] = _HEADER_ID_PATTERN.sub(
+                    "", split.metadata[key]
                 ).strip()
 
         processed_docs.append(split)
@@ -61,17 +67,17 @@ def split_docs(
 
 def preprocess_content(content: str) -> str:
     # Remove blockquotes
-    content = re.sub(r"^\s*>+", "", content, flags=re.MULTILINE).strip()
+    content = _BLOCKQUOTE_PATTERN.sub("", content).strip()
     # Remove images
-    content = re.sub(r"!\[.*?\]\(.*?\)", "", content).strip()
+    content = _IMAGE_PATTERN.sub("", content).strip()
     # Remove ```ansi blocks
-    content = re.sub(r"```ansi[\s\S]*?```", "", content, flags=re.MULTILINE).strip()
+    content = _ANSI_BLOCK_PATTERN.sub("", content).strip()
     return content
 
 
 def remove_markdown_links(text: str) -> str:
     # Replace [text](url) with just text
-    return re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", text)
+    return _MARKDOWN_LINK_PATTERN.sub(r"\1", text)
 
 
 def format_doc(doc: Document) -> str:
@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 from typing import List
 
 from langchain_core.documents import Document
@@ -6,6 +7,11 @@ from langchain_core.documents import Document
 from judigpt.utils import deduplicate_document_chunks, get_file_source
 
 
+@lru_cache
+def _heading_pattern(header_to_split_on: int) -> re.Pattern:
+    return re.compile(rf"^#\s+(#{{1,{header_to_split_on}}})\s+(.*)")
+
+
 def split_examples(document: Document, header_to_split_on: int = 2) -> List[Document]:
     """
     Splits a Document at lines like `# #`, which represent markdown headings
@@ -20,6 +26,7 @@ def split_examples(document: Document, header_to_split_on: int = 2) -> List[Docu
     current_chunk_lines = []
     current_heading = None
     current_metadata = document.metadata.copy()
+    heading_pattern = _heading_pattern(header_to_split_on)
 
     def finalize_chunk():
         if current_chunk_lines:
@@ -33,9 +40,7 @@ def split_examples(document: Document, header_to_split_on: int = 2) -> List[Docu
                 )
 
     for line in lines:
-        heading_match = re.match(
-            rf"^#\s+(#{{1,{header_to_split_on}}})\s+(.*)", line.strip()
-        )
+        heading_match = heading_pattern.match(line.strip())
         if heading_match:
             # Finalize the previous chunk
             finalize_chunk()
@@ -0,0 +1,105 @@
+"""
+Server mode, where one process serves the autonomous agent to many sessions.
+
+The expensive resources are shared by all sessions: the pool of warm Julia workers, the
+lint server, the vector stores, the embedding models and the chat models are all kept
+in process-wide registries. `warm_up_shared_resources` loads them when the server
+starts, so the first sessions do not pay for the Julia startup or the index loading.
+Each session is a LangGraph thread with its own state.
+
+Serve the graph with the LangGraph CLI by setting `JUDIGPT_SERVER=1`, f.ex. in `.env`,
+and running `langgraph dev`. This disables the CLI mode, and starts the warm-up when
+the graph is imported. The graph is registered as `judigpt_server` in
+`langgraph.json`. Measure the throughput with
+`examples/benchmarks/server_load_test.py`.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from judigpt.agents.agent_base import get_chat_model
+from judigpt.agents.autonomous_agent import AutonomousAgent
+from judigpt.cli import colorscheme, print_to_console
+from judigpt.configuration import BaseConfiguration, server_mode
+from judigpt.julia.doc_index import warm_up_doc_index
+from judigpt.julia.julia_lint_server import get_lint_server
+from judigpt.julia.julia_worker_pool import get_worker_pool
+from judigpt.rag.retrieval import RetrievalParams, get_text_encoder, make_retriever
+from judigpt.rag.retriever_specs import RETRIEVER_SPECS
+from judigpt.tools import (
+    get_working_directory,
+    grep_search,
+    list_files_in_directory,
+    read_from_file,
+    retrieve_function_documentation,
+    retrieve_judi_docs_and_examples,
+    retrieve_judi_examples,
+    run_julia_code,
+    run_julia_linter,
+    write_to_file,
+)
+
+
+def _load_models_and_stores(config: Optional[RunnableConfig]) -> None:
+    configuration = BaseConfiguration.from_runnable_config(config)
+    try:
+        get_chat_model(configuration.autonomous_agent_model)
+        get_text_encoder(configuration.embedding_model)
+        for spec in RETRIEVER_SPECS["judi"].values():
+            with make_retriever(
+                config=config or {},
+                spec=spec,
+                retrieval_params=RetrievalParams(
+                    search_type=configuration.examples_search_type,
+                    search_kwargs=configuration.examples_search_kwargs,
+                ),
+            ):
+                pass
+    except Exception as e:
+        print_to_console(
+            text=f"Could not load all shared resources: {e}\n\nThey will be loaded on first use.",
+            title="Server warm-up",
+            border_style=colorscheme.warning,
+        )
+
+
+def warm_up_shared_resources(config: Optional[RunnableConfig] = None) -> None:
+    """
+    Start the Julia workers and the linter, build the docstring index if needed, and load
+    the chat model, the embedding model and the JUDI vector stores, all in the background.
+
+    Args:
+        config: The configuration selecting the models and the retriever provider.
+    """
+    get_worker_pool().warm_up()
+    get_lint_server().warm_up()
+    warm_up_doc_index()
+    threading.Thread(
+        target=_load_models_and_stores, args=(config,), daemon=True
+    ).start()
+
+
+# `execute_terminal_command` is left out, since it asks for approval in the console
+server_agent = AutonomousAgent(
+    tools=[
+        run_julia_code,
+        run_julia_linter,
+        get_working_directory,
+        list_files_in_directory,
+        read_from_file,
+        write_to_file,
+        grep_search,
+        retrieve_function_documentation,
+        retrieve_judi_examples,
+        retrieve_judi_docs_and_examples,
+    ],
+    print_chat_output=False,
+)
+server_graph = server_agent.graph
+
+if server_mode:
+    warm_up_shared_resources()
@@ -0,0 +1,136 @@
+"""
+Working directory of each session.
+
+The tools and the Julia code runs used the working directory of the process, which
+`change_working_directory` changed with `os.chdir`. One process could then only serve
+one session at a time. Instead, each session, identified by the `thread_id` in its
+config, has its own working directory:
+
+1. The directory set with `set_session_working_directory`, f.ex. by the
+   `change_working_directory` tool.
+2. Otherwise the `working_directory` of the configuration.
+3. Otherwise, in server mode, a directory of its own in `SERVER_WORKSPACE_ROOT`.
+4. Otherwise the working directory of the process.
+
+The directories set in 1. are also stored in the `working_directory` of the graph state,
+so that they survive a restart of the process from the checkpointer. The agents restore
+them with `restore_session_working_directory` at the start of each turn, and only the
+`SESSION_DIRECTORY_CACHE_SIZE` most recently used sessions are kept in memory.
+
+The working directory of the process is left alone, and is still the Julia project
+that the shared Julia workers activate.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from langchain_core.runnables import RunnableConfig, ensure_config
+
+from judigpt.configuration import (
+    SERVER_WORKSPACE_ROOT,
+    SESSION_DIRECTORY_CACHE_SIZE,
+    BaseConfiguration,
+    server_mode,
+)
+
+# Least recently used first
+_directories: OrderedDict[str, str] = OrderedDict()
+_directories_lock = threading.Lock()
+
+
+def _remember_directory(session_id: str, directory: str) -> None:
+    with _directories_lock:
+        _directories[session_id] = directory
+        _directories.move_to_end(session_id)
+        while len(_directories) > SESSION_DIRECTORY_CACHE_SIZE:
+            _directories.popitem(last=False)
+
+
+def get_session_id(config: Optional[RunnableConfig] = None) -> str:
+    """The `thread_id` of the session. Empty outside of a LangGraph thread, f.ex. in the CLI."""
+    configurable = ensure_config(config).get("configurable") or {}
+    return str(configurable.get("thread_id") or "")
+
+
+def session_working_directory(config: Optional[RunnableConfig] = None) -> str:
+    """
+    Get the absolute working directory of the session.
+
+    Args:
+        config: The runnable configuration of the session.
+    """
+    session_id = get_session_id(config)
+    with _directories_lock:
+        if session_id in _directories:
+            _directories.move_to_end(session_id)
+            return _directories[session_id]
+
+    configuration = BaseConfiguration.from_runnable_config(config)
+    if configuration.working_directory:
+        return os.path.abspath(os.path.expanduser(configuration.working_directory))
+
+    if server_mode and session_id:
+        directory = os.path.join(
+            SERVER_WORKSPACE_ROOT, re.sub(r"[^A-Za-z0-9_\-]", "_", session_id)
+        )
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    return os.getcwd()
+
+
+def set_session_working_directory(
+    directory: str, config: Optional[RunnableConfig] = None
+) -> str:
+    """
+    Change the working directory of the session. Store the returned directory in the
+    `working_directory` of the graph state as well, so that it survives a restart.
+
+    Args:
+        directory: The new directory, absolute or relative to the current one.
+        config: The runnable configuration of the session.
+
+    Returns:
+        str: The absolute path of the new working directory.
+
+    Raises:
+        NotADirectoryError: If the directory does not exist.
+    """
+    directory = resolve_session_path(directory, config)
+    if not os.path.isdir(directory):
+        raise NotADirectoryError(f"{directory} is not a directory.")
+
+    _remember_directory(get_session_id(config), directory)
+    return directory
+
+
+def restore_session_working_directory(
+    directory: str, config: Optional[RunnableConfig] = None
+) -> None:
+    """
+    Restore the working directory of a session from the `working_directory` of its graph
+    state, f.ex. after the process was restarted or the session was evicted from memory.
+    Nothing is done if the directory is empty or no longer exists.
+
+    Args:
+        directory: The working directory stored in the graph state.
+        config: The runnable configuration of the session.
+    """
+    session_id = get_session_id(config)
+    with _directories_lock:
+        if session_id in _directories or not directory:
+            return
+    if os.path.isdir(directory):
+        _remember_directory(session_id, directory)
+
+
+def resolve_session_path(path: str, config: Optional[RunnableConfig] = None) -> str:
+    """Make a path relative to the working directory of the session absolute."""
+    return os.path.normpath(
+        os.path.join(session_working_directory(config), os.path.expanduser(path))
+    )
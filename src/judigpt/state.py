@@ -115,3 +115,5 @@ class State:
     code_block: CodeBlock = field(default_factory=CodeBlock)
     is_last_step: bool = field(default=False)
     remaining_steps: int = field(default=50)
+    # Set by `change_working_directory`, see judigpt.session. Empty for the default.
+    working_directory: str = field(default="")
@@ -0,0 +1,164 @@
+"""
+Token counting for trimming the message history.
+
+The history was trimmed with the chat model as the token counter, which tokenized all
+messages again on every turn, and for some providers called their tokenizer service.
+Instead, the messages are counted with a local tiktoken encoding, and the count of each
+message is cached by the hash of its content. A turn then only tokenizes the messages
+added since the last turn.
+
+The counts are exact for OpenAI models and a close estimate for other models, which is
+all the token budget needs. tiktoken is a dependency of judigpt. Its encoding files are
+downloaded on first use, and without them, f.ex. offline, the count is estimated from
+the number of characters.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, trim_messages
+
+from judigpt.configuration import (
+    DEFAULT_CONTEXT_WINDOW,
+    MAX_HISTORY_TOKENS,
+    MODEL_CONTEXT_WINDOWS,
+    RESERVED_CONTEXT_TOKENS,
+    TOKEN_COUNT_CACHE_SIZE,
+    TOKENIZER_ENCODING,
+)
+from judigpt.utils import get_message_text
+
+MESSAGE_TOKEN_OVERHEAD = 3  # Tokens of the role and separators of each message
+CHARS_PER_TOKEN = 4  # Used when tiktoken is not available
+
+_encode: Optional[Callable[[str], Sequence[Any]]] = None
+_encode_lock = threading.Lock()
+
+_token_counts: OrderedDict[bytes, int] = OrderedDict()
+_token_counts_lock = threading.Lock()
+
+
+def _approximate_encode(text: str) -> range:
+    return range(-(-len(text) // CHARS_PER_TOKEN))
+
+
+def _get_encode() -> Callable[[str], Sequence[Any]]:
+    global _encode
+    with _encode_lock:
+        if _encode is None:
+            try:
+                import tiktoken
+
+                encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+                _encode = encoding.encode_ordinary
+            except Exception:
+                # The encoding could not be downloaded, or tiktoken is not installed
+                _encode = _approximate_encode
+        return _encode
+
+
+def count_text_tokens(text: str) -> int:
+    """Count the tokens of a text with the local tokenizer."""
+    return len(_get_encode()(text)) if text else 0
+
+
+def _message_parts(message: BaseMessage) -> tuple[str, str]:
+    """The text and the serialized tool calls of a message."""
+    tool_calls = ""
+    if isinstance(message, AIMessage) and message.tool_calls:
+        tool_calls = json.dumps(
+            [(call["name"], call["args"]) for call in message.tool_calls],
+            sort_keys=True,
+            default=str,
+        )
+    return get_message_text(message), tool_calls
+
+
+def count_message_tokens(message: BaseMessage) -> int:
+    """
+    Count the tokens of a message, including its tool calls.
+
+    The count is cached by the hash of the type, name and content of the message. The
+    id is not used, since a message keeps its id when its content is replaced, f.ex.
+    when the end of it is trimmed.
+    """
+    text, tool_calls = _message_parts(message)
+    key = hashlib.blake2b(
+        "\0".join((message.type, message.name or "", text, tool_calls)).encode(
+            "utf-8", "surrogatepass"
+        ),
+        digest_size=16,
+    ).digest()
+
+    with _token_counts_lock:
+        if key in _token_counts:
+            _token_counts.move_to_end(key)
+            return _token_counts[key]
+
+    n_tokens = (
+        MESSAGE_TOKEN_OVERHEAD
+        + count_text_tokens(message.name or "")
+        + count_text_tokens(text)
+        + count_text_tokens(tool_calls)
+    )
+    if TOKEN_COUNT_CACHE_SIZE > 0:
+        with _token_counts_lock:
+            _token_counts[key] = n_tokens
+            while len(_token_counts) > TOKEN_COUNT_CACHE_SIZE:
+                _token_counts.popitem(last=False)
+    return n_tokens
+
+
+def count_messages_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Count the tokens of messages. Used as the `token_counter` of `trim_messages`."""
+    return sum(count_message_tokens(message) for message in messages)
+
+
+def history_token_budget(model: str, max_history_tokens: int = 0) -> int:
+    """
+    Get the number of tokens of the message history sent to a model.
+
+    Args:
+        model: The model name, with or without the provider, f.ex. 'openai:gpt-4.1'.
+        max_history_tokens: The budget set in the configuration. Derived from the context
+            window of the model if 0.
+    """
+    if max_history_tokens > 0:
+        return max_history_tokens
+
+    model_name = model.split(":", maxsplit=1)[1] if ":" in model else model
+    # The longest known name the model name starts with, f.ex. gpt-4.1 for gpt-4.1-mini
+    known = [name for name in MODEL_CONTEXT_WINDOWS if model_name.startswith(name)]
+    context_window = (
+        MODEL_CONTEXT_WINDOWS[max(known, key=len)] if known else DEFAULT_CONTEXT_WINDOW
+    )
+    # Small context windows keep at least a quarter of the window for the history
+    return min(
+        MAX_HISTORY_TOKENS,
+        max(context_window - RESERVED_CONTEXT_TOKENS, context_window // 4),
+    )
+
+
+def trim_state_messages(
+    messages: Sequence[BaseMessage], max_tokens: int = MAX_HISTORY_TOKENS
+) -> List[BaseMessage]:
+    """
+    Keep the last messages of the history that fit in the token budget.
+
+    Args:
+        messages: The messages of the state, without the system prompts.
+        max_tokens: The token budget, see `history_token_budget`.
+    """
+    return trim_messages(
+        messages,
+        max_tokens=max_tokens,
+        strategy="last",
+        token_counter=count_messages_tokens,
+        include_system=False,  # Not needed since systemMessage is added separately
+        allow_partial=True,
+    )
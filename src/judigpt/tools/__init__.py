@@ -12,6 +12,7 @@ from judigpt.tools.other import (
 from judigpt.tools.retrieve import (
     grep_search,
     retrieve_function_documentation,
+    retrieve_judi_docs_and_examples,
     retrieve_judi_examples,
 )
 
@@ -25,5 +26,6 @@ __all__ = [
     "write_to_file",
     "grep_search",
     "retrieve_function_documentation",
+    "retrieve_judi_docs_and_examples",
     "retrieve_judi_examples",
 ]
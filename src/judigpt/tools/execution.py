@@ -2,18 +2,33 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
 import re
 import subprocess
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
-
-from langchain_core.tools import tool
+from typing import Annotated, Optional, Union
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import (
+    InjectedToolArg,
+    InjectedToolCallId,
+    StructuredTool,
+    tool,
+)
+from langgraph.types import Command
 from pydantic import BaseModel, Field
 
 from judigpt.cli import colorscheme, print_to_console
+from judigpt.julia.sysimage import julia_command
 from judigpt.nodes.check_code import _run_julia_code, _run_linter
+from judigpt.session import (
+    resolve_session_path,
+    session_working_directory,
+    set_session_working_directory,
+)
 from judigpt.utils import fix_imports, shorter_simulations
 
 
@@ -23,40 +38,94 @@ class RunJuliaCodeInput(BaseModel):
     )
 
 
-@tool(
-    "run_julia_code",
-    args_schema=RunJuliaCodeInput,
-    description="Execute Julia code. Returns output or error message.",
-)
-def run_julia_code(code: str):
+def _run_julia_code_tool(code: str, config: Annotated[RunnableConfig, InjectedToolArg]):
     code = fix_imports(code)
     code = shorter_simulations(code)
-    out, code_failed = _run_julia_code(code, print_code=True)
+    out, code_failed = _run_julia_code(
+        code, print_code=True, working_dir=session_working_directory(config)
+    )
     if code_failed:
         return out
     return "Code executed successfully!"
 
 
+async def _arun_julia_code_tool(
+    code: str, config: Annotated[RunnableConfig, InjectedToolArg]
+):
+    # The code runs in a Julia worker, so the thread only waits on it
+    return await asyncio.to_thread(_run_julia_code_tool, code, config)
+
+
+run_julia_code = StructuredTool.from_function(
+    func=_run_julia_code_tool,
+    coroutine=_arun_julia_code_tool,
+    name="run_julia_code",
+    args_schema=RunJuliaCodeInput,
+    description="Execute Julia code. Returns output or error message.",
+)
+
+
 class RunJuliaLinterInput(BaseModel):
     code: str = Field(
         description="The Julia code that should be analyzed using the linter",
     )
 
 
-@tool(
-    "run_julia_linter",
-    args_schema=RunJuliaLinterInput,
-    description="Run a static analysis of Julia code using a linter. Returns output or error message.",
-)
-def run_julia_linter(code: str):
+def _run_julia_linter_tool(code: str):
     out, code_failed = _run_linter(code)
     if not code_failed:
         return out
     return "Linter found no issues!"
 
 
-@tool("execute_terminal_command", parse_docstring=True)
-def execute_terminal_command(command: str) -> str:
+async def _arun_julia_linter_tool(code: str):
+    return await asyncio.to_thread(_run_julia_linter_tool, code)
+
+
+run_julia_linter = StructuredTool.from_function(
+    func=_run_julia_linter_tool,
+    coroutine=_arun_julia_linter_tool,
+    name="run_julia_linter",
+    args_schema=RunJuliaLinterInput,
+    description="Run a static analysis of Julia code using a linter. Returns output or error message.",
+)
+
+
+def _command_output(stdout: str, stderr: str, returncode: int) -> str:
+    """Format and print the output of a terminal command."""
+    output = ""
+    if stdout:
+        output += f"# STDOUT:\n\n```text\n{stdout}\n```\n\n"
+    if stderr:
+        output += f"# STDERR:\n\n```text\n{stderr}\n```\n\n"
+    if returncode != 0:
+        output += f"EXIT CODE: {returncode}\n"
+
+    print_to_console(
+        text=output,
+        title="Run finished",
+        border_style=colorscheme.success if not stderr else colorscheme.message,
+    )
+
+    return (
+        output.strip()
+        if output.strip()
+        else "Command executed successfully with no output."
+    )
+
+
+def _command_error(message: str) -> str:
+    print_to_console(
+        text=message,
+        title="Run error",
+        border_style=colorscheme.success,
+    )
+    return message
+
+
+def _execute_terminal_command(
+    command: str, config: Annotated[RunnableConfig, InjectedToolArg]
+) -> str:
     """
     Execute a terminal command and return the output. Remember to include the project directory in the command when running the julia command. I.e. write f.ex. `julia --project=. my_script.jl`
 
@@ -74,7 +143,7 @@ def execute_terminal_command(command: str) -> str:
     if not run_command:
         return "User did not allow you to run this command."
 
-    working_directory = os.getcwd()
+    working_directory = session_working_directory(config)
 
     try:
         # Execute the command
@@ -86,48 +155,64 @@ def execute_terminal_command(command: str) -> str:
             text=True,
             timeout=60,  # 60 second timeout
         )
+        return _command_output(result.stdout, result.stderr, result.returncode)
 
-        output = ""
-        if result.stdout:
-            output += f"# STDOUT:\n\n```text\n{result.stdout}\n```\n\n"
-        if result.stderr:
-            output += f"# STDERR:\n\n```text\n{result.stderr}\n```\n\n"
-        if result.returncode != 0:
-            output += f"EXIT CODE: {result.returncode}\n"
-
-        print_to_console(
-            text=output,
-            title="Run finished",
-            border_style=colorscheme.success
-            if not result.stderr
-            else colorscheme.message,
-        )
+    except subprocess.TimeoutExpired:
+        return _command_error("ERROR: Command execution timed out after 60 seconds.")
+    except Exception as e:
+        return _command_error(f"ERROR: Failed to execute command: {str(e)}")
 
-        return (
-            output.strip()
-            if output.strip()
-            else "Command executed successfully with no output."
-        )
 
-    except subprocess.TimeoutExpired:
-        print_to_console(
-            text="ERROR: Command execution timed out after 60 seconds.",
-            title="Run error",
-            border_style=colorscheme.success,
+async def _aexecute_terminal_command(
+    command: str, config: Annotated[RunnableConfig, InjectedToolArg]
+) -> str:
+    from judigpt.human_in_the_loop import cli
+
+    run_command, command = await asyncio.to_thread(cli.modify_terminal_run, command)
+
+    if not run_command:
+        return "User did not allow you to run this command."
+
+    working_directory = session_working_directory(config)
+
+    try:
+        # Execute the command without blocking the event loop
+        process = await asyncio.create_subprocess_shell(
+            command,
+            cwd=working_directory,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=60)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return _command_error(
+                "ERROR: Command execution timed out after 60 seconds."
+            )
+        return _command_output(
+            stdout.decode(errors="replace"),
+            stderr.decode(errors="replace"),
+            process.returncode,
         )
 
-        return "ERROR: Command execution timed out after 60 seconds."
     except Exception as e:
-        print_to_console(
-            text=f"ERROR: Failed to execute command: {str(e)}",
-            title="Run error",
-            border_style=colorscheme.success,
-        )
-        return f"ERROR: Failed to execute command: {str(e)}"
+        return _command_error(f"ERROR: Failed to execute command: {str(e)}")
+
+
+execute_terminal_command = StructuredTool.from_function(
+    func=_execute_terminal_command,
+    coroutine=_aexecute_terminal_command,
+    name="execute_terminal_command",
+    parse_docstring=True,
+)
 
 
 @tool
-def list_directory_contents(directory_path: str) -> str:
+def list_directory_contents(
+    directory_path: str, config: Annotated[RunnableConfig, InjectedToolArg]
+) -> str:
     """
     List the contents of a directory.
 
@@ -137,6 +222,7 @@ def list_directory_contents(directory_path: str) -> str:
     Returns:
         str: Directory contents listing
     """
+    directory_path = resolve_session_path(directory_path, config)
     try:
         if not os.path.exists(directory_path):
             return f"ERROR: Directory {directory_path} does not exist."
@@ -165,18 +251,22 @@ def list_directory_contents(directory_path: str) -> str:
 
 
 @tool
-def get_working_directory() -> str:
+def get_working_directory(config: Annotated[RunnableConfig, InjectedToolArg]) -> str:
     """
     Get the current working directory.
 
     Returns:
         str: The current working directory path
     """
-    return os.getcwd()
+    return session_working_directory(config)
 
 
 @tool
-def change_working_directory(directory_path: str) -> str:
+def change_working_directory(
+    directory_path: str,
+    config: Annotated[RunnableConfig, InjectedToolArg],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> Union[str, Command]:
     """
     Change the working directory.
 
@@ -187,21 +277,36 @@ def change_working_directory(directory_path: str) -> str:
         str: Confirmation message or error
     """
     try:
-        if not os.path.exists(directory_path):
+        if not os.path.exists(resolve_session_path(directory_path, config)):
             return f"ERROR: Directory {directory_path} does not exist."
 
-        if not os.path.isdir(directory_path):
-            return f"ERROR: {directory_path} is not a directory."
-
-        os.chdir(directory_path)
-        return f"Successfully changed working directory to: {os.getcwd()}"
+        # Only the working directory of this session changes, not that of the process.
+        # It is stored in the state as well, so that it survives a restart.
+        working_directory = set_session_working_directory(directory_path, config)
+        return Command(
+            update={
+                "working_directory": working_directory,
+                "messages": [
+                    ToolMessage(
+                        f"Successfully changed working directory to: {working_directory}",
+                        tool_call_id=tool_call_id,
+                    )
+                ],
+            }
+        )
 
+    except NotADirectoryError:
+        return f"ERROR: {directory_path} is not a directory."
     except Exception as e:
         return f"ERROR: Failed to change directory: {str(e)}"
 
 
 @tool
-def create_julia_workspace(task_name: str, base_directory: Optional[str] = None) -> str:
+def create_julia_workspace(
+    task_name: str,
+    config: Annotated[RunnableConfig, InjectedToolArg],
+    base_directory: Optional[str] = None,
+) -> str:
     """
     Create a simple workspace with a single Julia file.
 
@@ -212,8 +317,7 @@ def create_julia_workspace(task_name: str, base_directory: Optional[str] = None)
     Returns:
         str: Path to the created Julia file
     """
-    if base_directory is None:
-        base_directory = os.getcwd()
+    base_directory = resolve_session_path(base_directory or "", config)
 
     # Simple sanitization
     safe_task_name = re.sub(r"[^a-zA-Z0-9_\-]", "_", task_name.lower())
@@ -242,7 +346,12 @@ def create_julia_workspace(task_name: str, base_directory: Optional[str] = None)
 
 
 @tool
-def write_julia_code_to_file(code: str, file_path: str, append: bool = False) -> str:
+def write_julia_code_to_file(
+    code: str,
+    file_path: str,
+    config: Annotated[RunnableConfig, InjectedToolArg],
+    append: bool = False,
+) -> str:
     """
     Write Julia code to a file.
 
@@ -254,6 +363,7 @@ def write_julia_code_to_file(code: str, file_path: str, append: bool = False) ->
     Returns:
         str: Confirmation message or error
     """
+    file_path = resolve_session_path(file_path, config)
     print_to_console(
         text=f"Writing Julia code to {file_path} (append={append})",
         title="Tool: Write Julia Code to File",
@@ -276,8 +386,30 @@ def write_julia_code_to_file(code: str, file_path: str, append: bool = False) ->
         return f"ERROR: Failed to write to file: {str(e)}"
 
 
-@tool
-def execute_julia_file(file_path: str) -> str:
+def _julia_file_output(file_path: str, stdout: str, stderr: str, returncode: int):
+    """Format and print the output of a Julia file run."""
+    output = f"=== Execution of {file_path} ===\n"
+
+    if stdout:
+        output += f"STDOUT:\n{stdout}\n"
+
+    if stderr:
+        output += f"STDERR:\n{stderr}\n"
+
+    output += f"EXIT CODE: {returncode}\n"
+
+    print_to_console(
+        text=output.strip(),
+        title="Execution Result",
+        border_style=colorscheme.success if returncode == 0 else colorscheme.error,
+    )
+
+    return output
+
+
+def _execute_julia_file(
+    file_path: str, config: Annotated[RunnableConfig, InjectedToolArg]
+) -> str:
     """
     Execute a Julia file and return the output.
 
@@ -287,6 +419,7 @@ def execute_julia_file(file_path: str) -> str:
     Returns:
         str: Execution output and exit code
     """
+    file_path = resolve_session_path(file_path, config)
     print_to_console(
         text=f"Executing Julia file: {file_path}",
         title="Tool: Execute Julia File",
@@ -297,30 +430,61 @@ def execute_julia_file(file_path: str) -> str:
             return f"ERROR: File {file_path} does not exist"
 
         result = subprocess.run(
-            ["julia", file_path], capture_output=True, text=True, timeout=30
+            [*julia_command(), file_path],
+            cwd=session_working_directory(config),
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+        return _julia_file_output(
+            file_path, result.stdout, result.stderr, result.returncode
         )
 
-        output = f"=== Execution of {file_path} ===\n"
-
-        if result.stdout:
-            output += f"STDOUT:\n{result.stdout}\n"
+    except subprocess.TimeoutExpired:
+        return f"ERROR: Execution of {file_path} timed out after 30 seconds"
+    except Exception as e:
+        return f"ERROR: Failed to execute {file_path}: {str(e)}"
 
-        if result.stderr:
-            output += f"STDERR:\n{result.stderr}\n"
 
-        output += f"EXIT CODE: {result.returncode}\n"
+async def _aexecute_julia_file(
+    file_path: str, config: Annotated[RunnableConfig, InjectedToolArg]
+) -> str:
+    file_path = resolve_session_path(file_path, config)
+    print_to_console(
+        text=f"Executing Julia file: {file_path}",
+        title="Tool: Execute Julia File",
+        border_style=colorscheme.warning,
+    )
+    try:
+        if not os.path.exists(file_path):
+            return f"ERROR: File {file_path} does not exist"
 
-        print_to_console(
-            text=output.strip(),
-            title="Execution Result",
-            border_style=colorscheme.success
-            if result.returncode == 0
-            else colorscheme.error,
+        process = await asyncio.create_subprocess_exec(
+            *julia_command(),
+            file_path,
+            cwd=session_working_directory(config),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=30)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return f"ERROR: Execution of {file_path} timed out after 30 seconds"
+        return _julia_file_output(
+            file_path,
+            stdout.decode(errors="replace"),
+            stderr.decode(errors="replace"),
+            process.returncode,
         )
 
-        return output
-
-    except subprocess.TimeoutExpired:
-        return f"ERROR: Execution of {file_path} timed out after 30 seconds"
     except Exception as e:
         return f"ERROR: Failed to execute {file_path}: {str(e)}"
+
+
+execute_julia_file = StructuredTool.from_function(
+    func=_execute_julia_file,
+    coroutine=_aexecute_julia_file,
+    name="execute_julia_file",
+)
@@ -1,18 +1,23 @@
 from __future__ import annotations
 
 import os
+from typing import Annotated
 
-from langchain_core.tools import tool
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import InjectedToolArg, tool
 from pydantic import BaseModel, Field
 from rich.panel import Panel
 
 from judigpt.cli import colorscheme, print_to_console
 from judigpt.configuration import cli_mode
 from judigpt.globals import console
+from judigpt.session import resolve_session_path, session_working_directory
 
 
 class ReadFromFileInput(BaseModel):
-    file_path: str = Field(description="The absolute path of the file to read.")
+    file_path: str = Field(
+        description="The path of the file to read, absolute or relative to the working directory."
+    )
     read_full_file: bool = Field(
         description="Whether to read the full file (ignoring line range)."
     )
@@ -34,7 +39,9 @@ def read_from_file(
     read_full_file: bool,
     start_line_number_base_zero: int,
     end_line_number_base_zero: int,
+    config: Annotated[RunnableConfig, InjectedToolArg],
 ) -> str:
+    file_path = resolve_session_path(file_path, config)
     try:
         if not os.path.exists(file_path):
             return f"File not found: {file_path}"
@@ -94,7 +101,10 @@ class WriteToFileInput(BaseModel):
 def write_to_file(
     file_path: str,
     content: str,
+    config: Annotated[RunnableConfig, InjectedToolArg],
 ) -> str:
+    file_path = resolve_session_path(file_path, config)
+
     # Check if file already exists
     if os.path.exists(file_path):
         try:
@@ -177,13 +187,13 @@ def write_to_file(
 
 
 @tool("get_working_directory", description=" Get the current working directory path.")
-def get_working_directory() -> str:
-    return os.getcwd()
+def get_working_directory(config: Annotated[RunnableConfig, InjectedToolArg]) -> str:
+    return session_working_directory(config)
 
 
 class ListFilesInDocumentationInput(BaseModel):
     directory_path: str = Field(
-        description="The absolute path of the directory to list files from."
+        description="The path of the directory to list files from, absolute or relative to the working directory."
     )
     recursive: bool = Field(
         description="True to list files recursively, False to list only top-level files."
@@ -195,7 +205,12 @@ class ListFilesInDocumentationInput(BaseModel):
     description="Recursievly list all files in a directory. Returns a string with the absolute paths of all files and directories.",
     args_schema=ListFilesInDocumentationInput,
 )
-def list_files_in_directory(directory_path: str, recursive: bool) -> str:
+def list_files_in_directory(
+    directory_path: str,
+    recursive: bool,
+    config: Annotated[RunnableConfig, InjectedToolArg],
+) -> str:
+    directory_path = resolve_session_path(directory_path, config)
     try:
         if not os.path.exists(directory_path):
             return f"ERROR: Directory {directory_path} does not exist."
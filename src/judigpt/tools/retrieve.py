@@ -1,21 +1,114 @@
 from __future__ import annotations
 
-import subprocess
+import asyncio
+import time
 from functools import partial
 from typing import Annotated, List, Optional
 
+from langchain_core.documents import Document
 from langchain_core.runnables import RunnableConfig
-from langchain_core.tools import BaseTool, InjectedToolArg, tool
+from langchain_core.tools import BaseTool, InjectedToolArg, StructuredTool, tool
 from pydantic import BaseModel, Field
 
 # from judigpt import configuration
 import judigpt.rag.retrieval as retrieval
+import judigpt.rag.split_docs as split_docs
 import judigpt.rag.split_examples as split_examples
 from judigpt.cli import colorscheme, print_to_console
-from judigpt.configuration import PROJECT_ROOT, BaseConfiguration, cli_mode
+from judigpt.configuration import (
+    PROJECT_ROOT,
+    BaseConfiguration,
+    cli_mode,
+)
 from judigpt.julia import get_function_documentation_from_list_of_funcs
+from judigpt.rag.code_search import get_code_search_index
+from judigpt.rag.federated_retrieval import make_federated_retriever
 from judigpt.rag.retriever_specs import RETRIEVER_SPECS
-from judigpt.utils import get_file_source
+from judigpt.utils import entered_in_thread, get_file_source
+
+
+def _get_query(
+    query: str, configuration: BaseConfiguration, doc_label: str, title: str
+) -> str:
+    """Let the user modify the query if configured, otherwise print it."""
+    if configuration.human_interaction.rag_query:
+        if cli_mode:
+            from judigpt.human_in_the_loop.cli import modify_rag_query
+        else:
+            from judigpt.human_in_the_loop.ui import modify_rag_query
+
+        return modify_rag_query(query, doc_label)
+
+    print_to_console(
+        text=f"**Query:** `{query}`",
+        title=title,
+        border_style=colorscheme.message,
+    )
+    return query
+
+
+def _examples_retrieval_params(
+    configuration: BaseConfiguration,
+) -> retrieval.RetrievalParams:
+    return retrieval.RetrievalParams(
+        search_type=configuration.examples_search_type,
+        search_kwargs=configuration.examples_search_kwargs,
+    )
+
+
+def _format_retrieved_examples(
+    retrieved_examples: List[Document],
+    configuration: BaseConfiguration,
+    doc_label: str,
+) -> str:
+    if retrieval.uses_query_embedding_cache(configuration.embedding_model):
+        from judigpt.rag.embedding_cache import get_query_embedding_cache
+
+        embedding_cache = get_query_embedding_cache(configuration.embedding_model)
+        print_to_console(
+            text=f"Retrieved {len(retrieved_examples)} examples.\n\nQuery embedding cache: {embedding_cache.stats()}",
+            title=f"Retrieved from {doc_label} examples",
+            border_style=colorscheme.message,
+        )
+
+    # Human interaction: filter docs/examples
+    if configuration.human_interaction.retrieved_examples:
+        # For examples, use heading from metadata if available, otherwise use file source
+        def get_example_section_path(doc):
+            """Get section path for example documents."""
+            if "heading" in doc.metadata and doc.metadata["heading"]:
+                return doc.metadata["heading"]
+            return get_file_source(doc)
+
+        if cli_mode:
+            from judigpt.human_in_the_loop.cli import response_on_rag
+
+            retrieved_examples = response_on_rag(
+                docs=retrieved_examples,
+                get_file_source=get_file_source,
+                get_section_path=get_example_section_path,
+                format_doc=partial(
+                    split_examples.format_doc, within_julia_context=False
+                ),
+                action_name=f"Modify retrieved {doc_label} examples",
+                edit_julia_file=True,
+            )
+        else:
+            from judigpt.human_in_the_loop.ui import response_on_rag
+
+            retrieved_examples = response_on_rag(
+                retrieved_examples,
+                get_file_source=get_file_source,
+                get_section_path=get_example_section_path,
+                format_doc=split_examples.format_doc,
+                action_name=f"Modify retrieved {doc_label} examples",
+            )
+
+    examples = split_examples.format_examples(retrieved_examples)
+
+    format_str = lambda s: s if s != "" else "(empty)"
+    out = format_str(examples)
+    return out
 
 
 def make_retrieve_tool(
@@ -24,96 +117,67 @@ def make_retrieve_tool(
     doc_label: str,
     input_cls: type,
 ) -> BaseTool:
-    @tool(
-        name,
-        args_schema=input_cls,
-        description=f"""Use this tool to look up full examples from the {doc_label} documentation. Use this tool when answering any Julia code question about {doc_label}.""",
-    )
+    """
+    Create a tool retrieving examples of the given documentation. The tool can be run
+    both synchronously and asynchronously. The async variant searches with the async
+    API of the retriever, and runs the steps that may wait on the user in a thread.
+    """
+    spec = RETRIEVER_SPECS[doc_key]["examples"]
+    title = f"Retrieving from {doc_label} examples"
+
     def retrieve_tool(
         query: str, config: Annotated[RunnableConfig, InjectedToolArg]
     ) -> str:
         configuration = BaseConfiguration.from_runnable_config(config)
 
         # Human interaction: modify query
-        if configuration.human_interaction.rag_query:
-            if cli_mode:
-                from judigpt.human_in_the_loop.cli import modify_rag_query
-
-                query = modify_rag_query(query, doc_label)
-            else:
-                from judigpt.human_in_the_loop.ui import modify_rag_query
-
-                query = modify_rag_query(query, doc_label)
-        else:
-            print_to_console(
-                text=f"**Query:** `{query}`",
-                title=f"Retrieving from {doc_label} examples",
-                border_style=colorscheme.message,
-            )
-
+        query = _get_query(query, configuration, doc_label, title)
         if not query.strip():
             return "The query is empty."
 
         # Retrieve examples
         with retrieval.make_retriever(
             config=config,
-            spec=RETRIEVER_SPECS[doc_key]["examples"],
-            retrieval_params=retrieval.RetrievalParams(
-                search_type=configuration.examples_search_type,
-                search_kwargs=configuration.examples_search_kwargs,
-            ),
+            spec=spec,
+            retrieval_params=_examples_retrieval_params(configuration),
         ) as retriever:
             retrieved_examples = retriever.invoke(query)
 
-        # Human interaction: filter docs/examples
-        if configuration.human_interaction.retrieved_examples:
-            if cli_mode:
-                from judigpt.human_in_the_loop.cli import response_on_rag
-
-                if configuration.human_interaction.retrieved_examples:
-                    # For examples, use heading from metadata if available, otherwise use file source
-                    def get_example_section_path(doc):
-                        """Get section path for example documents."""
-                        if "heading" in doc.metadata and doc.metadata["heading"]:
-                            return doc.metadata["heading"]
-                        return get_file_source(doc)
-                    
-                    retrieved_examples = response_on_rag(
-                        docs=retrieved_examples,
-                        get_file_source=get_file_source,
-                        get_section_path=get_example_section_path,
-                        format_doc=partial(
-                            split_examples.format_doc, within_julia_context=False
-                        ),
-                        action_name=f"Modify retrieved {doc_label} examples",
-                        edit_julia_file=True,
-                    )
-            else:
-                from judigpt.human_in_the_loop.ui import response_on_rag
-
-                if configuration.human_interaction.retrieved_examples:
-                    # For examples, use heading from metadata if available, otherwise use file source
-                    def get_example_section_path(doc):
-                        """Get section path for example documents."""
-                        if "heading" in doc.metadata and doc.metadata["heading"]:
-                            return doc.metadata["heading"]
-                        return get_file_source(doc)
-                    
-                    retrieved_examples = response_on_rag(
-                        retrieved_examples,
-                        get_file_source=get_file_source,
-                        get_section_path=get_example_section_path,
-                        format_doc=split_examples.format_doc,
-                        action_name=f"Modify retrieved {doc_label} examples",
-                    )
-
-        examples = split_examples.format_examples(retrieved_examples)
-
-        format_str = lambda s: s if s != "" else "(empty)"
-        out = format_str(examples)
-        return out
-
-    return retrieve_tool
+        return _format_retrieved_examples(retrieved_examples, configuration, doc_label)
+
+    async def aretrieve_tool(
+        query: str, config: Annotated[RunnableConfig, InjectedToolArg]
+    ) -> str:
+        configuration = BaseConfiguration.from_runnable_config(config)
+
+        # Human interaction: modify query
+        query = await asyncio.to_thread(
+            _get_query, query, configuration, doc_label, title
+        )
+        if not query.strip():
+            return "The query is empty."
+
+        # Retrieve examples
+        async with entered_in_thread(
+            retrieval.make_retriever(
+                config=config,
+                spec=spec,
+                retrieval_params=_examples_retrieval_params(configuration),
+            )
+        ) as retriever:
+            retrieved_examples = await retriever.ainvoke(query)
+
+        return await asyncio.to_thread(
+            _format_retrieved_examples, retrieved_examples, configuration, doc_label
+        )
+
+    return StructuredTool.from_function(
+        func=retrieve_tool,
+        coroutine=aretrieve_tool,
+        name=name,
+        args_schema=input_cls,
+        description=f"""Use this tool to look up full examples from the {doc_label} documentation. Use this tool when answering any Julia code question about {doc_label}.""",
+    )
 
 
 # Input schemas
@@ -145,6 +209,81 @@ retrieve_fimbul = make_retrieve_tool(
 )
 
 
+class RetrieveJudiDocsAndExamplesInput(BaseModel):
+    query: str = Field(
+        description="The query that will be used for document and example retrieval",
+    )
+
+
+def _format_federated_docs(retrieved: List[Document]) -> str:
+    docs_collection = RETRIEVER_SPECS["judi"]["docs"].collection_name
+    formatted = []
+    for doc in retrieved:
+        if doc.metadata["collection"] == docs_collection:
+            formatted.append(split_docs.format_docs([doc]))
+        else:
+            formatted.append(split_examples.format_examples([doc]))
+
+    out = "\n\n".join(formatted)
+    return out if out != "" else "(empty)"
+
+
+def _make_judi_federated_retriever(config: RunnableConfig):
+    configuration = BaseConfiguration.from_runnable_config(config)
+    specs = RETRIEVER_SPECS["judi"]
+    return make_federated_retriever(
+        config=config,
+        specs=[specs["docs"], specs["examples"]],
+        retrieval_params=_examples_retrieval_params(configuration),
+    )
+
+
+_FEDERATED_TITLE = "Retrieving from JUDI.jl documentation and examples"
+
+
+def _retrieve_judi_docs_and_examples(
+    query: str, config: Annotated[RunnableConfig, InjectedToolArg]
+) -> str:
+    configuration = BaseConfiguration.from_runnable_config(config)
+
+    # Human interaction: modify query
+    query = _get_query(query, configuration, "JUDI.jl", _FEDERATED_TITLE)
+    if not query.strip():
+        return "The query is empty."
+
+    with _make_judi_federated_retriever(config) as retriever:
+        retrieved = retriever.invoke(query)
+
+    return _format_federated_docs(retrieved)
+
+
+async def _aretrieve_judi_docs_and_examples(
+    query: str, config: Annotated[RunnableConfig, InjectedToolArg]
+) -> str:
+    configuration = BaseConfiguration.from_runnable_config(config)
+
+    # Human interaction: modify query
+    query = await asyncio.to_thread(
+        _get_query, query, configuration, "JUDI.jl", _FEDERATED_TITLE
+    )
+    if not query.strip():
+        return "The query is empty."
+
+    async with entered_in_thread(_make_judi_federated_retriever(config)) as retriever:
+        retrieved = await retriever.ainvoke(query)
+
+    return _format_federated_docs(retrieved)
+
+
+retrieve_judi_docs_and_examples = StructuredTool.from_function(
+    func=_retrieve_judi_docs_and_examples,
+    coroutine=_aretrieve_judi_docs_and_examples,
+    name="retrieve_judi_docs_and_examples",
+    args_schema=RetrieveJudiDocsAndExamplesInput,
+    description="Search the JUDI.jl documentation and examples at once, and get one ranked list of documentation sections and example code. Use this tool instead of several separate retrievals when you need both the API documentation and examples.",
+)
+
+
 class RetrieveFunctionDocumentationInput(BaseModel):
     function_names: List[str] = Field(
         description="A list of function names to retrieve the documentation for.",
@@ -182,55 +321,46 @@ class GrepSearchInput(BaseModel):
     isRegexp: Optional[bool] = Field(
         default=False, description="Whether the pattern is a regex."
     )
+    contextLines: Optional[int] = Field(
+        default=2, description="Number of lines shown before and after each match."
+    )
 
 
 @tool(
     "grep_search",
-    description="Do a keyword based search in the JUDI.jl documentation. Limited to 20 results. Use this tool to get an overview of which files to consider reading using the file-reader tool.",
+    description="Do a keyword based search in the JUDI.jl documentation. Limited to 20 results, ranked by the number of matches in each file. Use this tool to get an overview of which files to consider reading using the file-reader tool.",
     args_schema=GrepSearchInput,
 )
 def grep_search(
     query: str,
     includePattern: Optional[str] = None,
     isRegexp: Optional[bool] = False,
+    contextLines: Optional[int] = 2,
 ) -> str:
     try:
-        workspace_path = str(PROJECT_ROOT / "rag" / "judi")
-        cmd_parts = ["grep", "-r", "-n"]
-
-        if isRegexp:
-            cmd_parts.append("-E")
-        else:
-            cmd_parts.append("-F")  # Fixed string search
-
-        if includePattern:
-            cmd_parts.extend(["--include", includePattern])
-        else:
-            cmd_parts.extend(
-                [
-                    "--include=*.jl",
-                    "--include=*.md",
-                ]
-            )
-
-        cmd_parts.extend([query, workspace_path])
-
-        result = subprocess.run(cmd_parts, capture_output=True, text=True, timeout=10)
-
-        if result.stdout:
-            lines = result.stdout.strip().split("\n")[:20]  # Limit to 20 results
+        start_time = time.perf_counter()
+        matches = get_code_search_index(str(PROJECT_ROOT / "rag" / "judi")).search(
+            query,
+            is_regex=bool(isRegexp),
+            include_pattern=includePattern,
+            context_lines=contextLines or 0,
+            max_results=20,
+        )
+        elapsed_ms = 1000 * (time.perf_counter() - start_time)
+
+        if matches:
             match_results = []
-            for match in lines:
-                # Parse: filename:line_number:content
-                parts = match.split(":", 2)
-                if len(parts) != 3:
-                    match_results.append(match)
-                    continue
-                filename, line_str, content = parts
-                match_results.append(f"File: {filename}, Line {line_str}: {content}")
+            for match in matches:
+                context = "\n".join(
+                    f"{'>' if line_number == match.line_number else ' '} {line_number}: {line}"
+                    for line_number, line in match.context
+                )
+                match_results.append(
+                    f"File: {match.path}, Line {match.line_number}:\n{context}"
+                )
 
             print_text = (
-                f"Found {len(match_results)} matches:\n\n"
+                f"Found {len(match_results)} matches in {elapsed_ms:.1f} ms:\n\n"
                 "```text\n" + "\n\n".join(match_results) + "\n```"
             )
             print_to_console(
@@ -1,33 +1,20 @@
 """Utility & helper functions."""
 
+import asyncio
 import os
 import re
+from contextlib import AbstractContextManager, asynccontextmanager
 from dataclasses import asdict
-from typing import List, Sequence, Union
+from typing import AsyncGenerator, List, TypeVar
 
 from langchain.chat_models import init_chat_model
 from langchain_core.documents import Document
 from langchain_core.language_models import BaseChatModel
-from langchain_core.language_models.base import LanguageModelInput
-from langchain_core.messages import BaseMessage, trim_messages
-from langchain_core.runnables import Runnable
+from langchain_core.messages import BaseMessage
 
 from judigpt.state import CodeBlock, State
 
-
-def trim_state_messages(
-    messages: Sequence[BaseMessage],
-    model: Union[BaseChatModel, Runnable[LanguageModelInput, BaseMessage]],
-) -> Sequence[BaseMessage]:
-    trimmed_state_messages = trim_messages(
-        messages,
-        max_tokens=40000,  # adjust for model's context window minus system & files message
-        strategy="last",
-        token_counter=model,
-        include_system=False,  # Not needed since systemMessage is added separately
-        allow_partial=True,
-    )
-    return trimmed_state_messages
+T = TypeVar("T")
 
 
 def load_lines_from_txt(file_path: str) -> List[str]:
@@ -176,6 +163,28 @@ def state_to_dict(state, remove_keys: List[str] = []) -> dict:
     return state_dict
 
 
+@asynccontextmanager
+async def entered_in_thread(
+    context: AbstractContextManager[T],
+) -> AsyncGenerator[T, None]:
+    """
+    Use a blocking context manager from async code, f.ex. `make_retriever`, which may
+    load or build a vector store. It is entered in a thread, so the event loop is free
+    in the meantime.
+
+    Args:
+        context: The context manager to enter.
+    """
+    value = await asyncio.to_thread(context.__enter__)
+    try:
+        yield value
+    except BaseException as e:
+        if not context.__exit__(type(e), e, e.__traceback__):
+            raise
+    else:
+        context.__exit__(None, None, None)
+
+
 def deduplicate_document_chunks(chunks: List[Document]) -> List[Document]:
     """
     Remove duplicate Document chunks based on their page content.
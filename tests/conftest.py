@@ -0,0 +1,6 @@
+import os
+
+# judigpt.configuration prompts for missing API keys on import. The unit tests make
+# no API calls, so placeholder keys are enough.
+for var in ["OPENAI_API_KEY", "LANGSMITH_API_KEY"]:
+    os.environ.setdefault(var, "unused")
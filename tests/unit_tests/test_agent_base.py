@@ -0,0 +1,65 @@
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.tools import tool
+
+from judigpt.agents import agent_base
+from judigpt.agents.agent_base import BaseAgent
+
+
+class FakeChatModel(FakeListChatModel):
+    bind_calls: int = 0
+
+    def bind_tools(self, tools, **kwargs):
+        self.bind_calls += 1
+        return self.bind(tools=[t.name for t in tools])
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look up the query."""
+    return query
+
+
+class ModelAgent(BaseAgent):
+    """Uses the model given in the configuration."""
+
+    def get_prompt_from_config(self, config):
+        return ""
+
+    def get_model_from_config(self, config):
+        return config["configurable"]["model"]
+
+    def build_graph(self):
+        return None
+
+
+def load(agent, model):
+    return agent._load_model({"configurable": {"model": model}})
+
+
+@pytest.fixture
+def agent():
+    return ModelAgent(tools=[lookup], name="agent")
+
+
+def test_bound_model_is_reused(agent):
+    model = FakeChatModel(responses=["ok"])
+    bound = load(agent, model)
+
+    assert bound.kwargs["tools"] == ["lookup"]
+    assert load(agent, model) is bound
+    assert model.bind_calls == 1
+
+
+def test_bound_models_are_bounded(monkeypatch, agent):
+    monkeypatch.setattr(agent_base, "BOUND_MODEL_CACHE_SIZE", 2)
+    models = [FakeChatModel(responses=["ok"]) for _ in range(3)]
+    for model in models:
+        load(agent, model)
+    assert len(agent._bound_models) == 2
+
+    # The least recently used model was dropped, and is bound again
+    load(agent, models[0])
+    assert models[0].bind_calls == 2
+    load(agent, models[2])
+    assert models[2].bind_calls == 1
@@ -0,0 +1,126 @@
+import os
+
+import pytest
+from langchain_core.documents import Document
+
+from judigpt.rag import chunk_store
+from judigpt.rag.chunk_store import ChunkStore
+from judigpt.rag.retriever_specs import RetrieverSpec
+
+
+def split_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [
+            Document(page_content=line, metadata={"source": path, "line": i})
+            for i, line in enumerate(f.read().splitlines())
+        ]
+
+
+@pytest.fixture
+def split_paths(monkeypatch):
+    """Split the source files into lines in this process, and record which files were split."""
+    paths = []
+
+    def split_files(files, split_func):
+        for path in files:
+            paths.append(os.path.basename(path))
+            yield split_lines(path)
+
+    monkeypatch.setattr(chunk_store, "split_files", split_files)
+    return paths
+
+
+@pytest.fixture
+def spec(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("first\nsecond\n")
+    (docs / "b.md").write_text("third\n")
+    (docs / "ignored.txt").write_text("not a source file\n")
+    return RetrieverSpec(
+        dir_path=str(docs),
+        persist_path=lambda name: str(tmp_path / name),
+        cache_path=str(tmp_path / "store" / "chunks.jsonl"),
+        collection_name="docs",
+        filetype="md",
+        split_func=None,
+    )
+
+
+def contents(chunks):
+    return [chunk.page_content for chunk in chunks]
+
+
+def test_empty_store(tmp_path):
+    assert list(ChunkStore(str(tmp_path / "missing.jsonl")).iter_chunks()) == []
+
+
+def test_refresh_writes_chunks(spec, split_paths):
+    store = ChunkStore(spec.cache_path)
+    chunks = list(store.refresh(spec))
+
+    assert contents(chunks) == ["first", "second", "third"]
+    assert split_paths == ["a.md", "b.md"]
+    assert os.path.exists(store.index_path)
+
+    stored = list(ChunkStore(spec.cache_path).iter_chunks())
+    assert contents(stored) == contents(chunks)
+    assert [chunk.metadata for chunk in stored] == [chunk.metadata for chunk in chunks]
+
+
+def test_refresh_only_splits_modified_files(spec, split_paths):
+    store = ChunkStore(spec.cache_path)
+    list(store.refresh(spec))
+    split_paths.clear()
+
+    b_file = os.path.join(spec.dir_path, "b.md")
+    with open(b_file, "w") as f:
+        f.write("third\nfourth\n")
+    with open(os.path.join(spec.dir_path, "c.md"), "w") as f:
+        f.write("fifth\n")
+
+    chunks = list(store.refresh(spec))
+    assert split_paths == ["b.md", "c.md"]
+    assert contents(chunks) == ["first", "second", "third", "fourth", "fifth"]
+    assert contents(store.iter_chunks()) == contents(chunks)
+
+
+def test_refresh_drops_deleted_files(spec, split_paths):
+    store = ChunkStore(spec.cache_path)
+    list(store.refresh(spec))
+    split_paths.clear()
+
+    os.unlink(os.path.join(spec.dir_path, "a.md"))
+    assert contents(store.refresh(spec)) == ["third"]
+    assert split_paths == []
+    assert contents(store.iter_chunks()) == ["third"]
+
+
+def test_refresh_ignores_stale_index(spec, split_paths):
+    store = ChunkStore(spec.cache_path)
+    list(store.refresh(spec))
+    split_paths.clear()
+
+    # A store written without its index, f.ex. by an interrupted refresh
+    with open(spec.cache_path, "ab") as f:
+        f.write(b"\n")
+    assert contents(store.refresh(spec)) == ["first", "second", "third"]
+    assert split_paths == ["a.md", "b.md"]
+
+
+def test_interrupted_refresh_keeps_old_store(spec, split_paths):
+    store = ChunkStore(spec.cache_path)
+    list(store.refresh(spec))
+
+    with open(os.path.join(spec.dir_path, "a.md"), "w") as f:
+        f.write("changed\n")
+    refresh = store.refresh(spec)
+    next(refresh)
+    refresh.close()
+
+    assert contents(store.iter_chunks()) == ["first", "second", "third"]
+    # The temporary file is removed
+    assert set(os.listdir(os.path.dirname(spec.cache_path))) == {
+        "chunks.jsonl",
+        "chunks.index.json",
+    }
@@ -0,0 +1,142 @@
+import os
+import re
+
+import pytest
+
+from judigpt.rag.code_search import CodeSearchIndex, required_literals, trigrams
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "judi"
+    (root / "examples").mkdir(parents=True)
+    (root / "docs").mkdir()
+    (root / "examples" / "modeling.jl").write_text(
+        "using JUDI\n"
+        "model = Model(n, d, o, m)\n"
+        "q = judiVector(srcGeometry, wavelet)\n"
+        "d_obs = F * q\n"
+        "d_pred = F0 * q\n"
+    )
+    (root / "examples" / "fwi.jl").write_text(
+        "using JUDI\nq = judiVector(srcGeometry, wavelet)\nfval, grad = fwi_objective(model0, q, d_obs)\n"
+    )
+    (root / "docs" / "index.md").write_text(
+        "# JUDI\n\nUse `judiVector` for shot records.\n"
+    )
+    (root / "docs" / "notes.txt").write_text("judiVector in an unsearched file\n")
+    return root
+
+
+@pytest.fixture
+def index(root, tmp_path):
+    return CodeSearchIndex(str(root), str(tmp_path / "index" / "judi.json"))
+
+
+def paths(matches):
+    return [os.path.basename(match.path) for match in matches]
+
+
+def test_trigrams():
+    assert trigrams("JUDI") == {"jud", "udi"}
+    assert trigrams("ab") == set()
+
+
+@pytest.mark.parametrize(
+    "pattern, literals",
+    [
+        ("judiVector", ["judiVector"]),
+        (r"judiVector\(", ["judiVector("]),
+        (r"fwi_\w+\(model", ["fwi_", "(model"]),
+        ("Geometry.*wavelet", ["Geometry", "wavelet"]),
+        ("src(Geometry|Vector)", ["src"]),
+        ("colou?r", ["colo", "r"]),
+        ("[Jj]UDI", ["UDI"]),
+        ("x{2,3}y", ["y"]),
+        ("judiVector|Model", []),
+    ],
+)
+def test_required_literals(pattern, literals):
+    assert required_literals(pattern) == literals
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    ["judiVector|Model", "src(Geometry|Vector)", "colou?r", r"a\.b+", "[abc]+def"],
+)
+def test_required_literals_occur_in_matches(pattern):
+    regex = re.compile(pattern)
+    for text in ["judiVector", "Model", "srcVector", "color", "colour", "a.bb", "cdef"]:
+        match = regex.search(text)
+        if match:
+            for literal in required_literals(pattern):
+                assert literal in match.group()
+
+
+def test_search_fixed_string(index):
+    matches = index.search("judiVector(", context_lines=1)
+    assert paths(matches) == ["fwi.jl", "modeling.jl"]
+
+    match = matches[1]
+    assert match.line_number == 3
+    assert match.context == [
+        (2, "model = Model(n, d, o, m)"),
+        (3, "q = judiVector(srcGeometry, wavelet)"),
+        (4, "d_obs = F * q"),
+    ]
+
+
+def test_search_is_case_sensitive(index):
+    assert paths(index.search("judivector")) == []
+    assert paths(index.search("judiVector")) == ["index.md", "fwi.jl", "modeling.jl"]
+
+
+def test_search_regex(index):
+    assert paths(index.search(r"fwi_\w+\(model\d", is_regex=True)) == ["fwi.jl"]
+    assert paths(index.search(r"^using \w+$", is_regex=True)) == [
+        "fwi.jl",
+        "modeling.jl",
+    ]
+    with pytest.raises(ValueError):
+        index.search("judiVector(", is_regex=True)
+
+
+def test_search_include_pattern(index):
+    assert paths(index.search("judiVector", include_pattern="*.md")) == ["index.md"]
+
+
+def test_search_limits_results(index):
+    assert len(index.search("q")) == 5
+    assert len(index.search("q", max_per_file=2)) == 4
+    assert len(index.search("q", max_results=3)) == 3
+
+
+def test_search_ranks_files_by_matches(index):
+    # modeling.jl has three matching lines, fwi.jl two
+    assert paths(index.search("q", max_per_file=1)) == ["modeling.jl", "fwi.jl"]
+
+
+def test_refresh_updates_modified_and_deleted_files(index, root):
+    assert paths(index.search("fwi_objective")) == ["fwi.jl"]
+
+    (root / "examples" / "fwi.jl").unlink()
+    (root / "examples" / "lsrtm.jl").write_text(
+        "fval, grad = lsrtm_objective(model0, q, d_obs)\n"
+    )
+    modeling = root / "examples" / "modeling.jl"
+    modeling.write_text(modeling.read_text() + "fwi_objective(model0, q, d_obs)\n")
+
+    assert paths(index.search("fwi_objective")) == ["modeling.jl"]
+    assert paths(index.search("lsrtm_objective")) == ["lsrtm.jl"]
+
+
+def test_index_is_persisted(index, root):
+    index.refresh()
+    assert os.path.exists(index.index_path)
+
+    reloaded = CodeSearchIndex(str(root), index.index_path)
+    reloaded.refresh()
+    assert reloaded._files == index._files
+    # The index was loaded from disk, so no file was read yet
+    assert reloaded._lines == {}
+    assert paths(reloaded.search("judiVector", include_pattern="*.md")) == ["index.md"]
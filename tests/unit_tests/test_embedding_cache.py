@@ -0,0 +1,120 @@
+import asyncio
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from judigpt.rag.embedding_cache import CachedQueryEmbeddings, QueryEmbeddingCache
+
+
+class CountingEmbeddings(Embeddings):
+    """Embeds a text as its length and number of words, and counts the calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        return [float(len(text)), float(len(text.split()))]
+
+
+def test_cache_roundtrip(tmp_path):
+    cache = QueryEmbeddingCache(str(tmp_path), max_entries=4)
+    assert cache.get("judiVector") is None
+    cache.put("judiVector", [1.0, 2.5])
+
+    assert cache.get("judiVector") == [1.0, 2.5]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = QueryEmbeddingCache(str(tmp_path), max_entries=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    cache.get("a")
+    cache.put("c", [3.0])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0]
+    assert cache.get("c") == [3.0]
+
+
+def test_cache_persists_across_instances(tmp_path):
+    cache = QueryEmbeddingCache(str(tmp_path), max_entries=2)
+    cache.put("a", [1.0, 2.0])
+    cache.put("b", [3.0, 4.0])
+    cache.get("a")
+    cache.flush()
+
+    reloaded = QueryEmbeddingCache(str(tmp_path), max_entries=2)
+    reloaded.put("c", [5.0, 6.0])  # "a" was used after "b" before the reload
+    assert reloaded.get("a") == [1.0, 2.0]
+    assert reloaded.get("b") is None
+
+
+def test_cache_resets_on_other_dimension(tmp_path):
+    cache = QueryEmbeddingCache(str(tmp_path), max_entries=2)
+    cache.put("a", [1.0, 2.0])
+    cache.put("b", [1.0, 2.0, 3.0])
+
+    assert cache.get("a") is None
+    assert cache.get("b") == [1.0, 2.0, 3.0]
+
+
+def test_cached_query_embeddings(tmp_path):
+    embeddings = CountingEmbeddings()
+    cached = CachedQueryEmbeddings(
+        embeddings, QueryEmbeddingCache(str(tmp_path), max_entries=4)
+    )
+
+    assert cached.embed_query("sparse model") == [12.0, 2.0]
+    assert cached.embed_query("sparse model") == [12.0, 2.0]
+    assert asyncio.run(cached.aembed_query("sparse model")) == [12.0, 2.0]
+    assert embeddings.calls == 1
+
+    # Documents are not cached
+    cached.embed_documents(["sparse model"])
+    assert embeddings.calls == 2
+
+
+def test_put_appends_to_log(tmp_path):
+    cache = QueryEmbeddingCache(str(tmp_path), max_entries=4)
+    cache.put("a", [1.0])
+    index = (tmp_path / "index.json").read_text()
+    cache.put("b", [2.0])
+    cache.put("c", [3.0])
+
+    assert (tmp_path / "index.json").read_text() == index
+    assert len((tmp_path / "index.log").read_text().splitlines()) == 3
+
+
+def test_log_is_replayed_without_flush(tmp_path):
+    cache = QueryEmbeddingCache(str(tmp_path), max_entries=3)
+    for query in ["a", "b", "c"]:
+        cache.put(query, [float(ord(query))])
+    cache.get("a")
+    cache.put("d", [100.0])  # Replaces "b", the least recently used
+
+    # A partially written line, f.ex. from a killed process
+    with open(tmp_path / "index.log", "a") as f:
+        f.write("0123")
+
+    reloaded = QueryEmbeddingCache(str(tmp_path), max_entries=3)
+    assert reloaded.get("b") is None
+    assert reloaded.get("a") == [97.0]
+    assert reloaded.get("c") == [99.0]
+    assert reloaded.get("d") == [100.0]
+
+
+def test_log_is_merged_into_index(tmp_path):
+    cache = QueryEmbeddingCache(str(tmp_path), max_entries=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    assert (tmp_path / "index.log").read_text() == ""
+
+    cache.put("c", [3.0])
+    cache.flush()
+    assert (tmp_path / "index.log").read_text() == ""
+    assert QueryEmbeddingCache(str(tmp_path), max_entries=2).get("c") == [3.0]
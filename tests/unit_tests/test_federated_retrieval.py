@@ -0,0 +1,59 @@
+import asyncio
+from typing import List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from judigpt.rag.federated_retrieval import FederatedRetriever, merge_rankings
+
+
+class StaticRetriever(BaseRetriever):
+    documents: List[Document]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.documents
+
+
+def doc(text: str, source: str, **metadata) -> Document:
+    return Document(page_content=text, metadata={"source": source, **metadata})
+
+
+def test_federated_retriever_tags_collections():
+    retriever = FederatedRetriever(
+        retrievers={
+            "judi_docs": StaticRetriever(documents=[doc("judiVector", "a.md")]),
+            "judi_examples": StaticRetriever(documents=[doc("q = judiVector", "b.jl")]),
+        }
+    )
+
+    for retrieved in [
+        retriever.invoke("judiVector"),
+        asyncio.run(retriever.ainvoke("judiVector")),
+    ]:
+        assert sorted(d.metadata["collection"] for d in retrieved) == [
+            "judi_docs",
+            "judi_examples",
+        ]
+
+
+def test_federated_retriever_without_retrievers():
+    retriever = FederatedRetriever(retrievers={})
+    assert retriever.invoke("judiVector") == []
+    assert asyncio.run(retriever.ainvoke("judiVector")) == []
+
+
+def test_merge_rankings_by_relevance_score():
+    a = doc("a", "a.md", relevance_score=0.2)
+    b = doc("b", "b.md", relevance_score=0.9)
+    duplicate = doc("b", "b.md", relevance_score=0.5)
+
+    assert merge_rankings([[a], [b, duplicate]]) == [b, a]
+    assert merge_rankings([[a], [b]], k=1) == [b]
+
+
+def test_merge_rankings_by_rank_without_scores():
+    a, b, c = doc("a", "a.md"), doc("b", "b.md"), doc("c", "c.md")
+    assert merge_rankings([[a, b], [b, c]]) == [b, a, c]
@@ -0,0 +1,104 @@
+from typing import List
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from judigpt.rag import indexing
+from judigpt.rag.indexing import _embed_with_retry, _is_transient, embed_chunks
+
+
+class RateLimitError(Exception):
+    """Named like the rate limit errors of the provider clients."""
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FlakyEmbeddings(Embeddings):
+    """Raises the given errors on the first calls, then embeds a text as its length."""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture(autouse=True)
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(indexing.time, "sleep", sleeps.append)
+    return sleeps
+
+
+@pytest.mark.parametrize(
+    "error, transient",
+    [
+        (TimeoutError(), True),
+        (ConnectionResetError(), True),
+        (RateLimitError(), True),
+        (StatusError(429), True),
+        (StatusError(401), False),
+        (StatusError(404), False),
+        (ValueError("Unsupported model"), False),
+    ],
+)
+def test_is_transient(error, transient):
+    assert _is_transient(error) == transient
+
+
+def test_transient_errors_are_retried(sleeps):
+    embeddings = FlakyEmbeddings([RateLimitError(), TimeoutError()])
+    assert _embed_with_retry(embeddings, ["ab", "abc"]) == [[2.0], [3.0]]
+    assert embeddings.calls == 3
+    assert len(sleeps) == 2
+    assert sleeps[1] >= 2 * indexing.EMBEDDING_RETRY_BACKOFF
+
+
+def test_other_errors_are_raised_at_once(sleeps):
+    embeddings = FlakyEmbeddings([StatusError(401)])
+    with pytest.raises(StatusError):
+        _embed_with_retry(embeddings, ["ab"])
+    assert embeddings.calls == 1
+    assert sleeps == []
+
+
+def test_retries_are_limited(monkeypatch, sleeps):
+    monkeypatch.setattr(indexing, "EMBEDDING_MAX_RETRIES", 2)
+    embeddings = FlakyEmbeddings([TimeoutError()] * 3)
+    with pytest.raises(TimeoutError):
+        _embed_with_retry(embeddings, ["ab"])
+    assert embeddings.calls == 3
+    assert len(sleeps) == 2
+
+
+def test_embed_chunks_writes_batches_in_order():
+    chunks = [(f"id{i}", Document(page_content="x" * i)) for i in range(1, 6)]
+    written = []
+
+    def write_batch(texts, vectors, metadatas, ids):
+        written.append((ids, vectors))
+
+    n_done = embed_chunks(
+        chunks, FlakyEmbeddings(), write_batch, batch_size=2, concurrency=2
+    )
+    assert n_done == 5
+    assert [ids for ids, _ in written] == [["id1", "id2"], ["id3", "id4"], ["id5"]]
+    assert [vector for _, vectors in written for vector in vectors] == [
+        [1.0],
+        [2.0],
+        [3.0],
+        [4.0],
+        [5.0],
+    ]
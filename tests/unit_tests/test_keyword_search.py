@@ -0,0 +1,103 @@
+from typing import List
+
+import pytest
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from judigpt.rag.keyword_search import (
+    BM25Index,
+    HybridRetriever,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+
+
+def doc(text: str, source: str = "") -> Document:
+    return Document(page_content=text, metadata={"source": source})
+
+
+@pytest.fixture
+def documents():
+    return [
+        doc("Create a judiVector from the shot records.", "a.md"),
+        doc("The PhysicalParameter holds the velocity model.", "b.md"),
+        doc("Plot the velocity model and the velocity gradient.", "c.md"),
+        doc("Set up the acquisition geometry with Geometry.", "d.md"),
+    ]
+
+
+class StaticRetriever(BaseRetriever):
+    documents: List[Document]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.documents
+
+
+def test_tokenize_splits_identifiers():
+    assert tokenize("judiVector(rec_geometry, 42)") == [
+        "judivector",
+        "judi",
+        "vector",
+        "rec_geometry",
+        "rec",
+        "geometry",
+        "42",
+    ]
+    assert tokenize("HTTPServer") == ["httpserver", "http", "server"]
+    assert tokenize("model") == ["model"]
+
+
+def test_bm25_finds_exact_identifier(documents):
+    results = BM25Index(documents).search("PhysicalParameter", k=4)
+    assert results[0][0] is documents[1]
+
+
+def test_bm25_matches_identifier_parts(documents):
+    results = BM25Index(documents).search("vector", k=4)
+    assert [result[0] for result in results] == [documents[0]]
+
+
+def test_bm25_ranks_by_term_frequency(documents):
+    results = BM25Index(documents).search("velocity", k=4)
+    assert [result[0] for result in results] == [documents[2], documents[1]]
+    assert results[0][1] > results[1][1] > 0
+
+
+def test_bm25_limits_results(documents):
+    assert len(BM25Index(documents).search("the", k=2)) == 2
+    assert BM25Index(documents).search("unknown", k=4) == []
+    assert BM25Index([]).search("velocity", k=4) == []
+
+
+def test_reciprocal_rank_fusion_prefers_shared_documents(documents):
+    a, b, c, d = documents
+    fused = reciprocal_rank_fusion([[a, b, c], [c, d, b]], k=4)
+    # b and c appear in both rankings, and c ranks better on average
+    assert fused == [c, b, a, d]
+    assert reciprocal_rank_fusion([[a, b, c], [c, d, b]], k=2) == [c, b]
+
+
+def test_reciprocal_rank_fusion_merges_equal_documents():
+    first = doc("velocity model", "a.md")
+    copy = doc("velocity model", "a.md")
+    other_source = doc("velocity model", "b.md")
+
+    fused = reciprocal_rank_fusion([[first], [copy, other_source]], k=4)
+    assert fused == [first, other_source]
+    assert fused[0] is first
+
+
+def test_hybrid_retriever(documents):
+    retriever = HybridRetriever(
+        vector_retriever=StaticRetriever(documents=[documents[3], documents[1]]),
+        keyword_index=BM25Index(documents),
+        k=2,
+        fetch_k=4,
+    )
+    assert retriever.invoke("PhysicalParameter velocity") == [
+        documents[1],
+        documents[3],
+    ]
@@ -0,0 +1,125 @@
+import importlib
+import os
+
+import pytest
+
+from judigpt.julia.julia_lint_server import LintDiagnostic
+from judigpt.julia.result_cache import DiskCache
+
+# The module, since `judigpt.julia` exports a function of the same name
+linting = importlib.import_module("judigpt.julia.get_linting_result")
+
+DIAGNOSTIC = LintDiagnostic(
+    severity="Warning",
+    start_line=1,
+    start_char=1,
+    end_line=1,
+    end_char=1,
+    message="Variable has been assigned but not used: x",
+    source_line="x = 1",
+)
+
+
+class FakeLintServer:
+    def __init__(self, available=True):
+        self.available = available
+        self.linted = []
+
+    def lint(self, code, timeout):
+        self.linted.append(code)
+        return [DIAGNOSTIC]
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    cache = DiskCache(str(tmp_path / "lint"), max_entries=10)
+    monkeypatch.setattr(linting, "lint_result_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def script_runs(monkeypatch):
+    runs = []
+
+    def run_julia_file(code, julia_file_name):
+        runs.append(code)
+        return "Loading JUDI\nSTARTING LINT:\nWarning: unused variable", ""
+
+    monkeypatch.setattr(linting, "run_julia_file", run_julia_file)
+    return runs
+
+
+def use_server(monkeypatch, server):
+    monkeypatch.setattr(linting, "get_lint_server", lambda: server)
+    return server
+
+
+def test_disk_cache_roundtrip(tmp_path):
+    cache = DiskCache(str(tmp_path), max_entries=10)
+    assert cache.get("a") is None
+    cache.put("a", [{"message": "unused"}])
+
+    assert cache.get("a") == [{"message": "unused"}]
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.clear()
+    assert cache.get("a") is None
+
+
+def test_disk_cache_evicts_oldest(tmp_path):
+    cache = DiskCache(str(tmp_path), max_entries=2)
+    for i, key in enumerate(["a", "b"]):
+        cache.put(key, key)
+        os.utime(cache._path(key), (i, i))
+    cache.put("c", "c")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "b"
+    assert cache.get("c") == "c"
+
+
+def test_server_results_are_cached(monkeypatch, cache, script_runs):
+    server = use_server(monkeypatch, FakeLintServer())
+    reported = []
+
+    first = linting.get_linting_result("x = 1", on_diagnostics=reported.append)
+    second = linting.get_linting_result("x = 1", on_diagnostics=reported.append)
+
+    assert first == second == DIAGNOSTIC.format()
+    assert server.linted == ["x = 1"]
+    assert reported == [[DIAGNOSTIC], [DIAGNOSTIC]]
+    assert script_runs == []
+
+
+def test_script_results_are_cached(monkeypatch, cache, script_runs):
+    use_server(monkeypatch, FakeLintServer(available=False))
+
+    assert linting.get_linting_result("x = 1") == "Warning: unused variable"
+    assert linting.get_linting_result("x = 1") == "Warning: unused variable"
+    assert script_runs == ["x = 1"]
+
+    # The cached script result is used once the server is available again
+    server = use_server(monkeypatch, FakeLintServer())
+    assert linting.get_linting_result("x = 1") == "Warning: unused variable"
+    assert server.linted == []
+
+
+def test_failed_script_is_not_cached(monkeypatch, cache):
+    use_server(monkeypatch, FakeLintServer(available=False))
+    runs = []
+
+    def run_julia_file(code, julia_file_name):
+        runs.append(code)
+        return "", "ERROR: timed out"
+
+    monkeypatch.setattr(linting, "run_julia_file", run_julia_file)
+
+    assert linting.get_linting_result("x = 1") == ""
+    assert linting.get_linting_result("x = 1") == ""
+    assert runs == ["x = 1", "x = 1"]
+
+
+def test_cache_key_keeps_line_numbers(monkeypatch, cache, script_runs):
+    server = use_server(monkeypatch, FakeLintServer())
+    linting.get_linting_result("x = 1")
+    linting.get_linting_result("\nx = 1")
+    assert server.linted == ["x = 1", "\nx = 1"]
@@ -0,0 +1,105 @@
+import pytest
+
+from judigpt.julia import julia_lint_server
+from judigpt.julia.julia_lint_server import JuliaLintServer, LintServerNotReady
+from judigpt.julia.julia_process import JuliaProcessError, JuliaProcessTimeout
+
+
+class FakeProcess:
+    """Stands in for the Julia process, replying with a fixed list of messages."""
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def send(self, data):
+        pass
+
+    def wait_for_message(self, timeout):
+        if not self.messages:
+            raise JuliaProcessTimeout("No message")
+        message = self.messages.pop(0)
+        if isinstance(message, Exception):
+            self.alive = False
+            raise message
+        return message
+
+    def terminate(self, exit_command=None):
+        self.alive = False
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(julia_lint_server.time, "monotonic", lambda: clock["now"])
+    return clock
+
+
+@pytest.fixture
+def processes(monkeypatch):
+    """The replies of the processes started in turn, and the started processes."""
+    replies, started = [], []
+
+    def start_process(cmd, cwd, protocol_prefix):
+        process = FakeProcess(replies.pop(0))
+        started.append(process)
+        return process
+
+    monkeypatch.setattr(julia_lint_server, "PersistentJuliaProcess", start_process)
+    monkeypatch.setattr(julia_lint_server, "julia_command", lambda project: ["julia"])
+    return replies, started
+
+
+def test_lint(tmp_path, processes):
+    replies, _ = processes
+    replies.append(["READY", "DIAGNOSTIC Warning\t1\t1\t1\t5\t\tunused", "DONE"])
+    server = JuliaLintServer(str(tmp_path))
+
+    diagnostics = server.lint("x = 1")
+    assert [d.message for d in diagnostics] == ["unused"]
+    assert diagnostics[0].source_line == "x = 1"
+    assert list(tmp_path.iterdir()) == []  # The temporary file is removed
+
+
+def test_lint_while_loading(tmp_path, processes):
+    replies, started = processes
+    replies.append([])
+    server = JuliaLintServer(str(tmp_path))
+
+    with pytest.raises(LintServerNotReady):
+        server.lint("x = 1")
+    assert server.available
+    assert len(started) == 1
+
+
+def test_server_is_retried_after_failed_start(tmp_path, processes, clock):
+    replies, started = processes
+    replies.append([JuliaProcessError("Julia exited with code 137")])
+    replies.append([JuliaProcessError("Julia exited with code 137")])
+    replies.append(["READY", "DONE"])
+    server = JuliaLintServer(str(tmp_path))
+
+    with pytest.raises(JuliaProcessError):
+        server.lint("x = 1")
+    assert not server.available
+
+    clock["now"] += julia_lint_server.JULIA_LINT_RETRY_BACKOFF
+    assert server.available
+    with pytest.raises(JuliaProcessError):
+        server.lint("x = 1")
+
+    # The backoff doubles after failures in a row
+    clock["now"] += julia_lint_server.JULIA_LINT_RETRY_BACKOFF
+    assert not server.available
+    with pytest.raises(JuliaProcessError):
+        server.lint("x = 1")
+    assert len(started) == 2
+
+    clock["now"] += julia_lint_server.JULIA_LINT_RETRY_BACKOFF
+    assert server.lint("x = 1") == []
+    assert len(started) == 3
+    assert server.startup_error is None
+    assert server._startup_failures == 0
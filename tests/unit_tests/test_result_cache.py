@@ -0,0 +1,130 @@
+import os
+
+import pytest
+
+from judigpt.julia import result_cache
+from judigpt.julia.result_cache import (
+    TEMP_FILE_PREFIX,
+    ResultCache,
+    get_directory_state,
+    make_cache_key,
+    normalize_code,
+)
+
+
+@pytest.fixture
+def project_dir(tmp_path):
+    (tmp_path / "Project.toml").write_text('[deps]\nJUDI = "f3b833dc"\n')
+    return str(tmp_path)
+
+
+def test_result_cache_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_result_cache_expires_entries(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(result_cache.time, "time", lambda: now)
+    cache = ResultCache(max_entries=10, ttl=5)
+    cache.put("a", 1)
+
+    now += 4
+    assert cache.get("a") == 1
+    now += 2
+    assert cache.get("a") is None
+    assert "a" not in cache._entries
+
+
+def test_result_cache_disabled():
+    cache = ResultCache(max_entries=0, ttl=60)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+
+
+def test_result_cache_returns_copies():
+    cache = ResultCache(max_entries=10, ttl=60)
+    value = {"output": ["line"]}
+    cache.put("a", value)
+    value["output"].append("changed after put")
+    cache.get("a")["output"].append("changed after get")
+
+    assert cache.get("a") == {"output": ["line"]}
+
+
+def test_normalize_code_strips_trailing_whitespace():
+    assert normalize_code("x = 1   \r\ny = 2\t\n\n\n") == "x = 1\ny = 2"
+
+
+def test_normalize_code_keeps_leading_lines():
+    # Leading lines shift the line numbers in error messages
+    assert normalize_code("\n\nx = 1") == "\n\nx = 1"
+    assert normalize_code("    x = 1") == "    x = 1"
+
+
+def test_make_cache_key_normalization(project_dir):
+    key = make_cache_key("x = 1\n", project_dir)
+    assert make_cache_key("x = 1   \n\n", project_dir) == key
+    assert make_cache_key("x = 2\n", project_dir) != key
+    assert make_cache_key("\nx = 1\n", project_dir) != key
+    assert make_cache_key("x = 1   ", project_dir, normalize=False) != make_cache_key(
+        "x = 1", project_dir, normalize=False
+    )
+
+
+def test_make_cache_key_depends_on_environment(project_dir):
+    key = make_cache_key("x = 1", project_dir)
+    project_file = os.path.join(project_dir, "Project.toml")
+    with open(project_file, "a") as f:
+        f.write('Plots = "91a5bcdd"\n')
+    mtime = os.path.getmtime(project_file) + 1
+    os.utime(project_file, (mtime, mtime))
+
+    assert make_cache_key("x = 1", project_dir) != key
+
+
+def test_make_cache_key_depends_on_directory_state(project_dir):
+    key = make_cache_key("x = 1", project_dir)
+    assert make_cache_key("x = 1", project_dir, directory_state="a") != key
+    assert make_cache_key("x = 1", project_dir, directory_state="a") != make_cache_key(
+        "x = 1", project_dir, directory_state="b"
+    )
+
+
+def test_directory_state_changes_with_files(tmp_path):
+    data_file = tmp_path / "data" / "model.txt"
+    data_file.parent.mkdir()
+    data_file.write_text("1")
+    state = get_directory_state(str(tmp_path))
+    assert get_directory_state(str(tmp_path)) == state
+
+    data_file.write_text("12")
+    assert get_directory_state(str(tmp_path)) != state
+
+
+def test_directory_state_ignores_hidden_files(tmp_path):
+    (tmp_path / "main.jl").write_text("x = 1")
+    state = get_directory_state(str(tmp_path))
+
+    (tmp_path / f"{TEMP_FILE_PREFIX}lint.jl").write_text("x = 2")
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "HEAD").write_text("ref")
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / "__pycache__" / "module.pyc").write_bytes(b"\0")
+
+    assert get_directory_state(str(tmp_path)) == state
+
+
+def test_directory_state_too_many_files(tmp_path):
+    for i in range(3):
+        (tmp_path / f"{i}.txt").write_text(str(i))
+    assert get_directory_state(str(tmp_path), max_files=3) is not None
+    assert get_directory_state(str(tmp_path), max_files=2) is None
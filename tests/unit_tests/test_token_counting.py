@@ -0,0 +1,140 @@
+from collections import OrderedDict
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from judigpt import token_counting
+from judigpt.configuration import MAX_HISTORY_TOKENS
+from judigpt.token_counting import (
+    MESSAGE_TOKEN_OVERHEAD,
+    count_message_tokens,
+    count_messages_tokens,
+    count_text_tokens,
+    history_token_budget,
+    trim_state_messages,
+)
+
+
+@pytest.fixture(autouse=True)
+def encode_calls(monkeypatch):
+    """Count with an empty cache and the character estimate, and record the encoded texts."""
+    calls = []
+
+    def encode(text):
+        calls.append(text)
+        return token_counting._approximate_encode(text)
+
+    monkeypatch.setattr(token_counting, "_encode", encode)
+    monkeypatch.setattr(token_counting, "_token_counts", OrderedDict())
+    return calls
+
+
+def test_count_text_tokens():
+    assert count_text_tokens("") == 0
+    assert count_text_tokens("abcd") == 1
+    assert count_text_tokens("abcde") == 2
+
+
+def test_fallback_without_encoding(monkeypatch):
+    tiktoken = pytest.importorskip("tiktoken")
+
+    def get_encoding(name):
+        raise ConnectionError("offline")
+
+    monkeypatch.setattr(tiktoken, "get_encoding", get_encoding)
+    monkeypatch.setattr(token_counting, "_encode", None)
+
+    assert count_text_tokens("a" * 9) == 3
+    assert token_counting._encode is token_counting._approximate_encode
+
+
+def test_count_message_tokens():
+    assert count_message_tokens(HumanMessage("a" * 8)) == MESSAGE_TOKEN_OVERHEAD + 2
+    assert (
+        count_message_tokens(ToolMessage("a" * 8, name="run", tool_call_id="1"))
+        == MESSAGE_TOKEN_OVERHEAD + 1 + 2
+    )
+
+
+def test_count_message_tokens_includes_tool_calls():
+    message = AIMessage(
+        "",
+        tool_calls=[{"name": "run_julia_code", "args": {"code": "x = 1"}, "id": "1"}],
+    )
+    assert count_message_tokens(message) > MESSAGE_TOKEN_OVERHEAD
+
+
+def test_count_message_tokens_is_cached(encode_calls):
+    count = count_message_tokens(HumanMessage("Plot the velocity model", id="1"))
+    encode_calls.clear()
+
+    # The id is not part of the key, and equal messages are only tokenized once
+    assert (
+        count_message_tokens(HumanMessage("Plot the velocity model", id="2")) == count
+    )
+    assert encode_calls == []
+
+    count_message_tokens(HumanMessage("Plot the gradient"))
+    count_message_tokens(AIMessage("Plot the velocity model"))
+    assert encode_calls == ["Plot the gradient", "Plot the velocity model"]
+
+
+def test_token_count_cache_is_bounded(monkeypatch, encode_calls):
+    monkeypatch.setattr(token_counting, "TOKEN_COUNT_CACHE_SIZE", 2)
+    for text in ["first", "second", "third"]:
+        count_message_tokens(HumanMessage(text))
+    assert len(token_counting._token_counts) == 2
+
+    encode_calls.clear()
+    count_message_tokens(HumanMessage("third"))
+    count_message_tokens(HumanMessage("first"))
+    assert encode_calls == ["first"]
+
+
+def test_count_messages_tokens():
+    messages = [HumanMessage("a" * 4), AIMessage("a" * 8)]
+    assert count_messages_tokens(messages) == 2 * MESSAGE_TOKEN_OVERHEAD + 3
+    assert count_messages_tokens([]) == 0
+
+
+@pytest.mark.parametrize(
+    "model, budget",
+    [
+        ("openai:gpt-4.1", MAX_HISTORY_TOKENS),
+        ("gpt-4.1-mini", MAX_HISTORY_TOKENS),
+        ("ollama:qwen2.5:7b", 32768 - 16000),
+        ("ollama:qwen3:8b", 40960 - 16000),
+        ("unknown:model", MAX_HISTORY_TOKENS),
+    ],
+)
+def test_history_token_budget(model, budget):
+    assert history_token_budget(model) == budget
+
+
+def test_history_token_budget_small_context_window(monkeypatch):
+    monkeypatch.setitem(token_counting.MODEL_CONTEXT_WINDOWS, "tiny", 16000)
+    monkeypatch.setitem(token_counting.MODEL_CONTEXT_WINDOWS, "tiny-long", 32000)
+
+    # A quarter of the window is kept for the history
+    assert history_token_budget("tiny") == 4000
+    # The longest matching name is used
+    assert history_token_budget("tiny-long-v2") == 16000
+
+
+def test_history_token_budget_from_configuration():
+    assert history_token_budget("openai:gpt-4.1", max_history_tokens=1000) == 1000
+
+
+def test_trim_state_messages_keeps_last_messages():
+    messages = [
+        HumanMessage("a" * 40, id="1"),
+        AIMessage("b" * 40, id="2"),
+        HumanMessage("c" * 40, id="3"),
+        AIMessage("d" * 40, id="4"),
+    ]
+    message_tokens = MESSAGE_TOKEN_OVERHEAD + 10
+
+    assert trim_state_messages(messages, max_tokens=4 * message_tokens) == messages
+    last_two = trim_state_messages(messages, max_tokens=2 * message_tokens + 5)
+    assert last_two == messages[2:]
+    assert trim_state_messages(messages, max_tokens=message_tokens - 1) == []